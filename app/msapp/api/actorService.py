@@ -11,6 +11,10 @@ class ActorService(object):
 
 class Dashboard:
     SERVICE = '/'
+    # Number of most recent trades per symbol, if no trade range is requested.
+    TRADE_LIMIT = 100
+    # Number of most recent closed orders per position, unless requested with 'closedOrders'.
+    CLOSED_ORDER_LIMIT = 10
 
     def __init__(self, serviceHandler):
         self._l = logging.getLogger(__name__)
@@ -24,8 +28,25 @@ class Dashboard:
         self._l.debug("GET " + self.__class__.SERVICE)
         try:
             positions = msapp.datamapper.positionstore.loadAllPositions()
-            positionsFull = [ p.toDictWithFullOrders() for p in positions ]
-            trades = msapp.datamapper.tradestore.loadAllTrades()
+            closedLimit = req.get_param_as_int('closedOrders')
+            closedLimit = closedLimit if closedLimit is not None else Dashboard.CLOSED_ORDER_LIMIT
+            closedOrders = msapp.datamapper.positionstore.loadLatestClosedOrders(positions, closedLimit)
+            positionsFull = [ p.toDictWithFullOrders(c) for p, c in zip(positions, closedOrders) ]
+            # Trades of requested symbol (default: symbols of all positions), by id range, time range or most recent.
+            symbol = req.get_param('symbol')
+            symbols = [ symbol ] if symbol is not None else sorted(set(p.symbol() for p in positions))
+            fromId = req.get_param_as_int('fromId')
+            since = req.get_param_as_int('since')
+            until = req.get_param_as_int('until')
+            limit = req.get_param_as_int('limit') or Dashboard.TRADE_LIMIT
+            trades = []
+            for s in symbols:
+                if fromId is not None:
+                    trades += msapp.datamapper.tradestore.loadRange(s, fromId=fromId, limit=limit)
+                elif since is not None or until is not None:
+                    trades += msapp.datamapper.tradestore.loadByTime(s, since=since, until=until, limit=limit)
+                else:
+                    trades += msapp.datamapper.tradestore.loadLatest(s, limit)
             tradesFull = [ t.toDict() for t in trades ]
             req.context['result'] = { 'status': 'ok', 'positions': positionsFull, 'trades': tradesFull }
             resp.status = falcon.HTTP_OK
@@ -0,0 +1,46 @@
+import sys
+import time
+from decimal import Decimal
+
+from msapp.domain import Trade
+from msapp.datamapper.codec import JsonCodec
+from msapp.datamapper.codec import MsgpackCodec
+
+# Microbenchmark: trade record encode and decode throughput per codec.
+#   python -m msapp.bench.codec [trades]
+
+def _trades(count: int):
+    return [ Trade(241853011 + i,
+                   orderId=1771433210 + i // 3,
+                   symbol='BTCUSDT',
+                   timestamp=1585855462553 + i,
+                   side=Trade.SIDE_BUY if i % 2 else Trade.SIDE_SELL,
+                   price=Decimal("6668.07000000") + Decimal(i % 1000) / 100,
+                   quantity=Decimal("0.00300000"),
+                   quoteQuantity=Decimal("20.00421000"),
+                   commissionAmount=Decimal("0.00001520"),
+                   commissionAsset='BNB') for i in range(count) ]
+
+def _measure(codec, trades: list):
+    start = time.perf_counter()
+    records = [ codec.encode(t.toDict()) for t in trades ]
+    encodeDuration = time.perf_counter() - start
+    start = time.perf_counter()
+    for r in records:
+        Trade.fromDict(codec.decode(r))
+    decodeDuration = time.perf_counter() - start
+    size = sum(len(r) for r in records) / len(records)
+    return encodeDuration, decodeDuration, size
+
+def run(count: int = 100000):
+    trades = _trades(count)
+    results = {
+        'json (simplejson)': _measure(JsonCodec(), trades),
+        'msgpack + decimal ext': _measure(MsgpackCodec(), trades)
+    }
+    print(f"{'codec':<24} {'encode/s':>12} {'decode/s':>12} {'bytes/record':>14}")
+    for name, (encodeDuration, decodeDuration, size) in results.items():
+        print(f"{name:<24} {count / encodeDuration:>12.0f} {count / decodeDuration:>12.0f} {size:>14.1f}")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,79 @@
+import logging
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from msapp.domain import Trade
+from msapp.domain import TradeColumns
+
+# Microbenchmark: memory and construction time of trade representations.
+#   python -m msapp.bench.domainModel [trades]
+
+class _DictTrade:
+    # Previous domain model: per-instance __dict__, logger lookup in the constructor, fromDict via constructor.
+    @staticmethod
+    def fromDict(data: dict):
+        o = _DictTrade(data['tradeId'])
+        for f in Trade.FIELDS[1:]:
+            setattr(o, '_' + f, data[f])
+        return o
+
+    def __init__(self, tradeId: int, orderId: int = None, symbol: str = None, timestamp: int = None, side: str = None,
+                 price: Decimal = None, quantity: Decimal = None, quoteQuantity: Decimal = None, commissionAmount: Decimal = None, commissionAsset: str = None):
+        logging.getLogger(__name__)
+        self._tradeId = tradeId
+        self._orderId = orderId
+        self._symbol = symbol
+        self._timestamp = timestamp
+        self._side = side
+        self._price = price
+        self._quantity = quantity
+        self._quoteQuantity = quoteQuantity
+        self._commissionAmount = commissionAmount
+        self._commissionAsset = commissionAsset
+
+def _records(count: int):
+    prices = [ Decimal("6668.07000000") + Decimal(i) / 100 for i in range(1000) ]
+    quantity = Decimal("0.00300000")
+    quoteQuantity = Decimal("20.00421000")
+    commission = Decimal("0.00001520")
+    return [ {
+        'tradeId': 241853011 + i,
+        'orderId': 1771433210 + i // 3,
+        'symbol': 'BTCUSDT',
+        'timestamp': 1585855462553 + i,
+        'side': Trade.SIDE_BUY if i % 2 else Trade.SIDE_SELL,
+        'price': prices[i % 1000],
+        'quantity': quantity,
+        'quoteQuantity': quoteQuantity,
+        'commissionAmount': commission,
+        'commissionAsset': 'BNB'
+    } for i in range(count) ]
+
+def _measure(build):
+    # Time and memory are measured in separate runs, tracing allocations slows construction down.
+    start = time.perf_counter()
+    result = build()
+    duration = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = build()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return duration, memory
+
+def run(count: int = 1000000):
+    records = _records(count)
+    results = {
+        'dict model (previous)': _measure(lambda: [ _DictTrade.fromDict(r) for r in records ]),
+        'Trade (__slots__)': _measure(lambda: [ Trade.fromDict(r) for r in records ]),
+        'TradeColumns': _measure(lambda: TradeColumns.fromTrades(Trade.fromDict(r) for r in records))
+    }
+    print(f"{'representation':<24} {'build s':>10} {'trades/s':>12} {'MB':>10} {'bytes/trade':>12}")
+    for name, (duration, memory) in results.items():
+        print(f"{name:<24} {duration:>10.2f} {count / duration:>12.0f} {memory / 2**20:>10.1f} {memory / count:>12.1f}")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,64 @@
+import time
+from decimal import Decimal
+from multiprocessing import Manager
+
+from msapp.gateway.priceBoard import PriceBoard
+
+# Microbenchmark: symbol price updates and reads per second.
+#   python -m msapp.bench.priceBoard [ticks]
+
+def _managerPath(ticks: int, prices: list):
+    manager = Manager()
+    mutex = manager.Lock()
+    table = manager.dict()
+    table['BTCUSDT'] = None
+    start = time.perf_counter()
+    for i in range(ticks):
+        mutex.acquire()
+        try:
+            table['BTCUSDT'] = prices[i % len(prices)]
+        finally:
+            mutex.release()
+    writeDuration = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(ticks):
+        mutex.acquire()
+        try:
+            table['BTCUSDT']
+        finally:
+            mutex.release()
+    readDuration = time.perf_counter() - start
+    manager.shutdown()
+    return writeDuration, readDuration
+
+def _priceBoardPath(ticks: int, prices: list):
+    board = PriceBoard(name="msapp_bench_prices")
+    board.register('BTCUSDT')
+    try:
+        start = time.perf_counter()
+        for i in range(ticks):
+            board.update('BTCUSDT', prices[i % len(prices)], i)
+        writeDuration = time.perf_counter() - start
+        reader = PriceBoard.attach(board.name())
+        start = time.perf_counter()
+        for i in range(ticks):
+            reader.price('BTCUSDT')
+        readDuration = time.perf_counter() - start
+        reader.close()
+    finally:
+        board.close()
+    return writeDuration, readDuration
+
+def run(ticks: int = 20000):
+    prices = [ Decimal("6668.07000000") + Decimal(i) / 100 for i in range(100) ]
+    results = {
+        'Manager dict + Lock': _managerPath(ticks, prices),
+        'PriceBoard (shared memory)': _priceBoardPath(ticks, prices)
+    }
+    print(f"{'path':<28} {'writes/s':>12} {'reads/s':>12}")
+    for name, (writeDuration, readDuration) in results.items():
+        print(f"{name:<28} {ticks / writeDuration:>12.0f} {ticks / readDuration:>12.0f}")
+
+if __name__ == '__main__':
+    import sys
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,88 @@
+import datetime
+import sys
+import time
+from multiprocessing import Manager
+
+from msapp.domain.mscore import TaskQueue
+from msapp.domain.mscore import TTLtool
+
+# Microbenchmark: task queue throughput with a backlog of deferred tasks.
+#   python -m msapp.bench.taskQueue [tasks]
+
+class _ManagerTaskQueue:
+    # Previous task queue: Manager list proxies, linear scans and ISO time parsing per deferred task.
+    def __init__(self):
+        self.manager = Manager()
+        self.mutex = self.manager.Lock()
+        self.queuedTasks = self.manager.list()
+        self.runningTasks = self.manager.list()
+
+    def add(self, task):
+        with self.mutex:
+            self.queuedTasks.append(task)
+
+    def startNext(self):
+        with self.mutex:
+            for i, task in enumerate(self.queuedTasks):
+                not_before = task.get('JQ_not_before', None)
+                if not_before and not TTLtool.isExpirationtimeIsoExpired(not_before):
+                    continue
+                self.queuedTasks.pop(i)
+                task.pop('JQ_not_before', None)
+                self.runningTasks.append(task)
+                return task
+        return None
+
+    def finalize(self, job_id):
+        with self.mutex:
+            for i, task in enumerate(self.runningTasks):
+                if task['id'] == job_id:
+                    self.runningTasks.pop(i)
+                    return
+
+    def inList(self, job_id):
+        with self.mutex:
+            for task in self.runningTasks:
+                if task['id'] == job_id:
+                    return True
+            for task in self.queuedTasks:
+                if task['id'] == job_id:
+                    return True
+        return False
+
+    def shutdown(self):
+        self.manager.shutdown()
+
+def _tasks(count: int, deferred: int):
+    notBefore = (datetime.datetime.utcnow() + datetime.timedelta(hours=1)).isoformat()
+    tasks = [ { 'id': f"deferred-{i}", 'JQ_not_before': notBefore, 'data': {} } for i in range(deferred) ]
+    tasks += [ { 'id': f"task-{i}", 'data': {} } for i in range(count) ]
+    return tasks
+
+def _measure(queue, count: int, deferred: int):
+    # Deferred tasks are queued first, as rescheduled tasks are, and stay put while the ready tasks run through.
+    start = time.perf_counter()
+    for task in _tasks(count, deferred):
+        if not queue.inList(task['id']):
+            queue.add(task)
+    while True:
+        task = queue.startNext()
+        if task is None:
+            break
+        queue.finalize(task['id'])
+    return time.perf_counter() - start
+
+def run(count: int = 1000, deferred: int = 100):
+    legacy = _ManagerTaskQueue()
+    results = {
+        'Manager list (previous)': _measure(legacy, count, deferred),
+        'heap + index': _measure(TaskQueue(), count, deferred)
+    }
+    legacy.shutdown()
+    print(f"{count} tasks behind {deferred} deferred tasks (inList + add + startNext + finalize)")
+    print(f"{'queue':<24} {'s':>10} {'tasks/s':>12}")
+    for name, duration in results.items():
+        print(f"{name:<24} {duration:>10.3f} {count / duration:>12.0f}")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
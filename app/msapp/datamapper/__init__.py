@@ -1,22 +1,68 @@
+kvstore = None
 orderstore = None
 tradestore = None
 positionstore = None
 tradingconfig = None
+synccursorstore = None
+exchangeinfostore = None
 # Not needed, but Task asks for existence.
 taskstore = None
 
-def initDatastores():
+def createStorage():
+    # Storage backend from config section 'datastore': 'redis' (default) or the embedded 'sqlite'.
+    # Redis options: host, port, unix-socket (instead of TCP), pool-size, socket-timeout, retries.
+    from msapp import config
+    conf = config.c.get('datastore', {})
+    backend = conf.get('backend', 'redis')
+    assert backend in [ 'redis', 'sqlite' ], f"Unknown datastore backend '{backend}'."
+    if backend == 'sqlite':
+        from .sqliteDB import SqliteDB
+        return SqliteDB(conf.get('path', SqliteDB.DEFAULT_PATH))
+    from .redisDB import RedisDB
+    return RedisDB(
+        host=conf.get('host', RedisDB.HOST),
+        port=conf.get('port', RedisDB.PORT),
+        unixSocket=conf.get('unix-socket'),
+        poolSize=conf.get('pool-size', RedisDB.POOL_SIZE),
+        socketTimeout=conf.get('socket-timeout', RedisDB.SOCKET_TIMEOUT),
+        retries=conf.get('retries', RedisDB.RETRIES))
+
+def createCodec():
+    # Record format of the domain object stores from config section 'datastore': 'msgpack' (default) or 'json'.
+    # The msgpack codec also loads JSON records written before.
+    from msapp import config
+    from .codec import byName
+    return byName(config.c.get('datastore', {}).get('codec', 'msgpack'))
+
+def initDatastores(storage=None, codec=None):
+    global kvstore
     global orderstore
     global tradestore
     global positionstore
     global tradingconfig
-    from .redisDB import RedisDB
-    kvstore = RedisDB()
+    global synccursorstore
+    global exchangeinfostore
+    kvstore = storage if storage is not None else createStorage()
+    codec = codec if codec is not None else createCodec()
     from .orderStore import OrderStore
-    orderstore = OrderStore(kvstore)
+    orderstore = OrderStore(kvstore, codec)
     from .tradeStore import TradeStore
-    tradestore = TradeStore(kvstore)
+    tradestore = TradeStore(kvstore, codec)
     from .positionStore import PositionStore
-    positionstore = PositionStore(kvstore)
+    positionstore = PositionStore(kvstore, codec)
     from .tradingConfig import TradingConfig
     tradingconfig = TradingConfig(kvstore)
+    from .syncCursorStore import SyncCursorStore
+    synccursorstore = SyncCursorStore(kvstore)
+    from .exchangeInfoStore import ExchangeInfoStore
+    exchangeinfostore = ExchangeInfoStore(kvstore)
+
+def session():
+    # Unit of work: collect dirty domain objects and persist them in one datastore transaction.
+    from .unitOfWork import UnitOfWork
+    return UnitOfWork(kvstore)
+
+def saveAll(objects: list):
+    # Persist domain objects (Order, Trade, Position, ...) in one datastore transaction.
+    with session() as uow:
+        uow.add(*objects)
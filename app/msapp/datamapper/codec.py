@@ -0,0 +1,67 @@
+import logging
+import simplejson as json
+from decimal import Decimal
+
+class JsonCodec:
+    '''
+      Plain JSON records, Decimal values are stored as JSON numbers.
+    '''
+    NAME = 'json'
+
+    def encode(self, data: dict):
+        return json.dumps(data)
+
+    def decode(self, raw):
+        return json.loads(raw, use_decimal=True)
+
+class MsgpackCodec:
+    '''
+      Compact binary records: versioned header followed by a msgpack document.
+
+      Decimals are stored as extension type holding their canonical string, which keeps the exact
+      representation (e.g. '0.00300000') and decodes with the C implementation of Decimal, without
+      a JSON number scan. Records without the header are JSON records written before, and still load.
+    '''
+    NAME = 'msgpack'
+    # JSON records never start with a NUL byte.
+    MAGIC = b'\x00mk'
+    VERSION = 1
+    HEADER = MAGIC + bytes([ VERSION ])
+
+    EXT_DECIMAL = 1
+
+    def __init__(self):
+        self._l = logging.getLogger(__name__)
+        import msgpack
+        self._msgpack = msgpack
+        self._json = JsonCodec()
+
+    def encode(self, data: dict):
+        # packb() with a fresh packer per call, codecs are shared between threads.
+        return MsgpackCodec.HEADER + self._msgpack.packb(data, default=self._packDecimal, use_bin_type=True)
+
+    def decode(self, raw):
+        if isinstance(raw, str) or raw[:3] != MsgpackCodec.MAGIC:
+            return self._json.decode(raw)
+        version = raw[3]
+        assert version == MsgpackCodec.VERSION, f"ERROR: Unsupported record version '{version}'."
+        return self._msgpack.unpackb(raw[4:], ext_hook=self._unpackDecimal, raw=False, strict_map_key=False)
+
+    def _packDecimal(self, value):
+        if not isinstance(value, Decimal):
+            raise TypeError(f"Unsupported type '{type(value).__name__}' in record.")
+        return self._msgpack.ExtType(MsgpackCodec.EXT_DECIMAL, str(value).encode('ascii'))
+
+    def _unpackDecimal(self, code: int, payload: bytes):
+        if code == MsgpackCodec.EXT_DECIMAL:
+            return Decimal(payload.decode('ascii'))
+        return self._msgpack.ExtType(code, payload)
+
+CODECS = {
+    JsonCodec.NAME: JsonCodec,
+    MsgpackCodec.NAME: MsgpackCodec
+}
+
+def byName(name: str):
+    assert name in CODECS, f"Unknown datastore codec '{name}'."
+    return CODECS[name]()
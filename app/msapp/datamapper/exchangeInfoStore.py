@@ -0,0 +1,38 @@
+import logging
+import hashlib
+import time
+import simplejson as json
+
+class ExchangeInfoStore:
+    def __init__(self, storage):
+        self._l = logging.getLogger(__name__)
+        self._storage = storage
+
+    def save(self, exchange: str, symbols: dict, ttl: int):
+        # Version identifies the content, so readers only rebuild their caches if filters really changed.
+        data = json.dumps(symbols, sort_keys=True)
+        version = hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+        meta = {
+            'version': version,
+            'fetched': int(time.time() * 1000)
+        }
+        # Data and meta in one transaction, readers never see a new version with old data.
+        batch = self._storage.batch()
+        batch.set(f"exchangeinfo:{exchange}", data, expire=ttl)
+        batch.set(f"exchangeinfo:{exchange}:meta", json.dumps(meta), expire=ttl)
+        batch.execute()
+        return version
+
+    def load(self, exchange: str):
+        data = self._storage.get(f"exchangeinfo:{exchange}")
+        if data is None:
+            self._l.debug(f"No exchange info for '{exchange}' found in datastore.")
+            return None
+        return json.loads(data)
+
+    def meta(self, exchange: str):
+        # Small record with 'version' and 'fetched' (ms) of the stored exchange info.
+        data = self._storage.get(f"exchangeinfo:{exchange}:meta")
+        if data is None:
+            return None
+        return json.loads(data)
@@ -1,27 +1,97 @@
 import logging
-import simplejson as json
 
 from msapp.domain import Order
+from .codec import JsonCodec
 
 class OrderStore:
-    def __init__(self, storage):
+    '''
+      Orders in one hash per symbol, keyed by exchange order id. Order ids are only unique per symbol
+      on the exchange. Orders without symbol are kept in the plain 'order' hash.
+    '''
+    # Record layout version, orders stored in the plain 'order' hash before are moved once on first use.
+    LAYOUT_VERSION = 1
+    SCAN_COUNT = 1000
+
+    def __init__(self, storage, codec=None):
         self._l = logging.getLogger(__name__)
         self._storage = storage
+        self._codec = codec if codec is not None else JsonCodec()
+        self._layoutChecked = False
 
-    def save(self, order: Order):
+    def save(self, order: Order, batch=None):
+        self._ensureLayout()
         data = order.toDict()
-        self._storage.hashSet('order', str(order.id()), json.dumps(data))
+        storage = batch if batch is not None else self._storage
+        storage.hashSet(self._key(order.symbol()), str(order.id()), self._codec.encode(data))
+        if order.symbol() is not None:
+            storage.sortedSetAdd('order:symbols', { order.symbol(): 0 })
 
-    def load(self, orderId):
-        data = self._storage.hashGet('order', str(orderId))
+    def load(self, symbol: str, orderId):
+        self._ensureLayout()
+        data = self._storage.hashGet(self._key(symbol), str(orderId))
         if data is None:
-            self._l.error(f"Requested orderId '{orderId}' not found in datastore.")
+            self._l.error(f"Requested orderId '{orderId}' of '{symbol}' not found in datastore.")
             return None
-        return Order.fromDict(json.loads(data, use_decimal=True))
+        return Order.fromDict(self._codec.decode(data))
+
+    def loadMany(self, symbol: str, orderIds: list):
+        # Load orders of symbol with one datastore request. Returns a list in order of orderIds, None for unknown orders.
+        self._ensureLayout()
+        if len(orderIds) == 0:
+            return []
+        data = self._storage.hashGetMany(self._key(symbol), [ str(oid) for oid in orderIds ])
+        orders = []
+        for oid, e in zip(orderIds, data):
+            if e is None:
+                self._l.error(f"Requested orderId '{oid}' of '{symbol}' not found in datastore.")
+                orders.append(None)
+                continue
+            orders.append(Order.fromDict(self._codec.decode(e)))
+        return orders
+
+    def symbols(self):
+        self._ensureLayout()
+        return self._storage.sortedSetRange('order:symbols')
+
+    def iterAll(self, count: int = SCAN_COUNT):
+        # Stream all orders with bounded memory, about 'count' records are fetched per round trip.
+        self._ensureLayout()
+        for key in [ 'order' ] + [ self._key(s) for s in self.symbols() ]:
+            for _, data in self._storage.hashScan(key, count=count):
+                yield Order.fromDict(self._codec.decode(data))
 
     def loadAllOrders(self):
-        data = self._storage.hashValues('order')
-        if data is None:
-            self._l.error(f"Requested name 'order' not found in datastore.")
-            return None
-        return [ Order.fromDict(json.loads(e, use_decimal=True)) for e in data ]
+        return list(self.iterAll())
+
+    def _ensureLayout(self):
+        if self._layoutChecked:
+            return
+        version = self._storage.get('order:layoutversion')
+        if version is None or int(version) < OrderStore.LAYOUT_VERSION:
+            self._migrate()
+        self._layoutChecked = True
+
+    def _migrate(self):
+        # Move orders with symbol out of the plain 'order' hash into their symbol hash.
+        count = 0
+        batch = self._storage.batch()
+        for oid, data in self._storage.hashScan('order', count=OrderStore.SCAN_COUNT):
+            symbol = self._codec.decode(data).get('symbol')
+            if symbol is None:
+                continue
+            oid = oid.decode('utf-8')
+            batch.hashSet(self._key(symbol), oid, data)
+            batch.sortedSetAdd('order:symbols', { symbol: 0 })
+            batch.hashDelete('order', [ oid ])
+            count += 1
+            # Bound the batch size for large histories.
+            if len(batch) >= 3 * OrderStore.SCAN_COUNT:
+                batch.execute()
+                batch = self._storage.batch()
+        batch.set('order:layoutversion', str(OrderStore.LAYOUT_VERSION))
+        batch.execute()
+        if count > 0:
+            self._l.info(f"Moved {count} orders to their symbol.")
+
+    def _key(self, symbol: str):
+        return f"order:{symbol}" if symbol is not None else 'order'
@@ -1,27 +1,109 @@
 import logging
-import simplejson as json
 
+import msapp.datamapper
 from msapp.domain.repository import Position
+from .codec import JsonCodec
 
 class PositionStore:
-    def __init__(self, storage):
+    SCAN_COUNT = 1000
+
+    def __init__(self, storage, codec=None):
         self._l = logging.getLogger(__name__)
         self._storage = storage
+        self._codec = codec if codec is not None else JsonCodec()
 
-    def save(self, position: Position):
+    def save(self, position: Position, batch=None):
         data = position.toDict()
-        self._storage.hashSet('position', str(position.id()), json.dumps(data))
+        storage = batch if batch is not None else self._storage
+        storage.hashSet('position', str(position.id()), self._codec.encode(data))
+        # Append closed orders, moved out of the position since the last save, to the archive. In a batch,
+        # the position keeps them pending until the batch has been executed (see UnitOfWork.flush()).
+        archived = position.archivedOrders()
+        if len(archived) > 0:
+            storage.sortedSetAdd(self._archiveKey(position.id()), { str(o.id()): o.timestamp() or 0 for o in archived })
+            if batch is None:
+                position.clearArchivedOrders(archived)
 
     def load(self, positionId):
         data = self._storage.hashGet('position', str(positionId))
         if data is None:
             self._l.error(f"Requested positionId '{positionId}' not found in datastore.")
             return None
-        return Position.fromDict(json.loads(data, use_decimal=True))
+        return Position.fromDict(self._codec.decode(data))
+
+    def loadMany(self, positionIds: list):
+        # Load positions including all their orders with two datastore requests. Unknown positions are None.
+        data = self._storage.hashGetMany('position', [ str(pid) for pid in positionIds ])
+        positions = []
+        for pid, e in zip(positionIds, data):
+            if e is None:
+                self._l.error(f"Requested positionId '{pid}' not found in datastore.")
+                positions.append(None)
+                continue
+            positions.append(Position.fromDict(self._codec.decode(e)))
+        self._hydrateOrders([ p for p in positions if p is not None ])
+        return positions
+
+    def iterAll(self, count: int = SCAN_COUNT):
+        # Stream all positions including their orders with bounded memory, about 'count' records are fetched per
+        # round trip. The orders of each page of positions are hydrated with one request.
+        page = []
+        for _, data in self._storage.hashScan('position', count=count):
+            page.append(Position.fromDict(self._codec.decode(data)))
+            if len(page) >= count:
+                self._hydrateOrders(page)
+                yield from page
+                page = []
+        if len(page) > 0:
+            self._hydrateOrders(page)
+            yield from page
 
     def loadAllPositions(self):
         data = self._storage.hashValues('position')
         if data is None:
             self._l.error(f"Requested name 'position' not found in datastore.")
             return None
-        return [ Position.fromDict(json.loads(e, use_decimal=True)) for e in data ]
+        positions = [ Position.fromDict(self._codec.decode(e)) for e in data ]
+        self._hydrateOrders(positions)
+        return positions
+
+    def loadClosedOrders(self, position: Position, start: int = 0, end: int = -1):
+        # Archived orders of position, oldest first, by rank from start to end (inclusive).
+        orderIds = self._storage.sortedSetRange(self._archiveKey(position.id()), start, end)
+        return [ o for o in msapp.datamapper.orderstore.loadMany(position.symbol(), orderIds) if o is not None ]
+
+    def loadLatestClosedOrders(self, positions: list, limit: int):
+        # Latest 'limit' archived orders (oldest first) of each position, with one datastore request for the
+        # archives and one per symbol for the orders.
+        if limit <= 0:
+            return [ [] for _ in positions ]
+        orderIds = self._storage.sortedSetRangeMany([ self._archiveKey(p.id()) for p in positions ], -limit, -1)
+        orders = self._loadOrdersBySymbol([ (p.symbol(), oid) for p, ids in zip(positions, orderIds) for oid in ids ])
+        closed = []
+        for p, ids in zip(positions, orderIds):
+            ordersById = orders.get(p.symbol(), {})
+            closed.append([ ordersById[oid] for oid in ids if oid in ordersById ])
+        return closed
+
+    def countClosedOrders(self, positionId):
+        return self._storage.sortedSetCount(self._archiveKey(positionId))
+
+    def _archiveKey(self, positionId):
+        return f"position:{positionId}:closedorders"
+
+    def _hydrateOrders(self, positions: list):
+        # Fetch the orders of all positions with one request per symbol, instead of one per order.
+        orders = self._loadOrdersBySymbol([ (p.symbol(), o.id()) for p in positions for o in p.orders(load=False) ])
+        for p in positions:
+            p.hydrateOrders(orders.get(p.symbol(), {}))
+
+    def _loadOrdersBySymbol(self, keys: list):
+        # Orders of (symbol, orderId) keys as symbol -> orderId -> Order, loaded with one request per symbol.
+        orderIds = {}
+        for symbol, oid in keys:
+            orderIds.setdefault(symbol, []).append(oid)
+        orders = {}
+        for symbol, oids in orderIds.items():
+            loaded = msapp.datamapper.orderstore.loadMany(symbol, oids)
+            orders[symbol] = { oid: o for oid, o in zip(oids, loaded) if o is not None }
+        return orders
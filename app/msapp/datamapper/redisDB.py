@@ -1,17 +1,88 @@
 import redis
 import logging
+import threading
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 
-class RedisDB:
+from .storage import Storage
+from .storage import StorageBatch
+
+class RedisDB(Storage):
+    '''
+      Redis storage on a connection pool shared by all RedisDB instances of a process with the
+      same connection settings (web workers, scheduler and trading loop).
+
+      The pool is sized and blocking, i.e. callers wait up to POOL_TIMEOUT for a free connection
+      instead of failing. Connections use TCP keepalive, bounded socket timeouts and are health
+      checked when idle. Commands are retried with exponential backoff on connection errors and
+      timeouts, so a short Redis outage does not surface in the trading path. A Unix socket can
+      be used for a co-located Redis instead of TCP.
+    '''
     HOST = 'redis'
     PORT = 6379
     ENCODING = 'utf-8'
+    POOL_SIZE = 32
+    POOL_TIMEOUT = 10
+    SOCKET_TIMEOUT = 5
+    CONNECT_TIMEOUT = 2
+    HEALTH_CHECK_INTERVAL = 30
+    RETRIES = 3
 
-    def __init__(self):
+    _pools = {}
+    _poolsMutex = threading.Lock()
+
+    def __init__(self, host: str = HOST, port: int = PORT, unixSocket: str = None, poolSize: int = POOL_SIZE, socketTimeout: float = SOCKET_TIMEOUT, retries: int = RETRIES):
         self._l = logging.getLogger(__name__)
-        self._db = redis.Redis(host=RedisDB.HOST, port=RedisDB.PORT, encoding=RedisDB.ENCODING)
+        self._pool = RedisDB._sharedPool(host, port, unixSocket, poolSize, socketTimeout, retries)
+        self._db = redis.Redis(connection_pool=self._pool)
+
+    @staticmethod
+    def _sharedPool(host: str, port: int, unixSocket: str, poolSize: int, socketTimeout: float, retries: int):
+        key = (host, port, unixSocket, poolSize, socketTimeout, retries)
+        with RedisDB._poolsMutex:
+            pool = RedisDB._pools.get(key)
+            if pool is None:
+                options = {
+                    'max_connections': poolSize,
+                    'timeout': RedisDB.POOL_TIMEOUT,
+                    'encoding': RedisDB.ENCODING,
+                    'socket_timeout': socketTimeout,
+                    'health_check_interval': RedisDB.HEALTH_CHECK_INTERVAL,
+                    # Retry policy is applied per connection, also for pipelines.
+                    'retry': Retry(ExponentialBackoff(cap=1, base=0.05), retries),
+                    'retry_on_error': [ redis.exceptions.ConnectionError, redis.exceptions.TimeoutError ]
+                }
+                if unixSocket is not None:
+                    pool = redis.BlockingConnectionPool(connection_class=redis.UnixDomainSocketConnection, path=unixSocket, **options)
+                else:
+                    pool = redis.BlockingConnectionPool(host=host, port=port, socket_keepalive=True, socket_connect_timeout=RedisDB.CONNECT_TIMEOUT, **options)
+                RedisDB._pools[key] = pool
+            return pool
 
-    def set(self, key: str, value: str):
-        self._db.set(key, value)
+    def status(self):
+        # Pool utilisation: connections created, in use and idle, out of the pool size. Derived from
+        # BlockingConnectionPool internals, which are not part of the redis-py API and may change.
+        try:
+            created = len(self._pool._connections)
+            idle = len([ c for c in list(self._pool.pool.queue) if c is not None ])
+        except (AttributeError, TypeError) as e:
+            self._l.warning(f"Connection pool status not available: {e}")
+            return {}
+        return {
+            'Backend': 'redis',
+            'PoolSize': self._pool.max_connections,
+            'PoolCreated': created,
+            'PoolInUse': created - idle,
+            'PoolIdle': idle,
+            'PoolUtilisation': round((created - idle) / self._pool.max_connections, 3)
+        }
+
+    def batch(self):
+        # Collect writes and apply them in one MULTI/EXEC transaction on execute().
+        return RedisBatch(self._db.pipeline(transaction=True))
+
+    def set(self, key: str, value: str, expire: int = None):
+        self._db.set(key, value, ex=expire)
 
     def get(self, key: str):
         return self._db.get(key)
@@ -22,12 +93,96 @@ class RedisDB:
     def hashGet(self, name: str, key: str):
         return self._db.hget(name, key)
 
+    def hashGetMany(self, name: str, keys: list):
+        # Values of keys in one round trip (HMGET), None for missing keys.
+        if len(keys) == 0:
+            return []
+        return self._db.hmget(name, keys)
+
+    def hashExists(self, name: str, key: str):
+        return self._db.hexists(name, key)
+
+    def hashDelete(self, name: str, keys: list):
+        if len(keys) == 0:
+            return 0
+        return self._db.hdel(name, *keys)
+
     def hashKeys(self, name: str):
         return self._db.hkeys(name)
 
     def hashValues(self, name: str):
         return self._db.hvals(name)
 
+    def sortedSetAdd(self, name: str, mapping: dict):
+        # Add members (member -> score) to a sorted set.
+        self._db.zadd(name, mapping)
+
+    def sortedSetRemove(self, name: str, members: list):
+        if len(members) == 0:
+            return 0
+        return self._db.zrem(name, *members)
+
+    def sortedSetRange(self, name: str, start: int = 0, end: int = -1):
+        # Members ordered by score ascending, by rank from start to end (inclusive).
+        return [ m.decode(RedisDB.ENCODING) for m in self._db.zrange(name, start, end) ]
+
+    def sortedSetRangeMany(self, names: list, start: int = 0, end: int = -1):
+        # ZRANGE of all sorted sets in one pipelined round trip.
+        pipe = self._db.pipeline(transaction=False)
+        for name in names:
+            pipe.zrange(name, start, end)
+        return [ [ m.decode(RedisDB.ENCODING) for m in members ] for members in pipe.execute() ]
+
+    def sortedSetRangeByScore(self, name: str, minScore=None, maxScore=None, offset: int = 0, count: int = None, reverse: bool = False):
+        # Members with minScore <= score <= maxScore (None is unbounded), ordered by score, optionally paged.
+        low = '-inf' if minScore is None else minScore
+        high = '+inf' if maxScore is None else maxScore
+        start, num = (None, None) if count is None else (offset, count)
+        if reverse:
+            members = self._db.zrevrangebyscore(name, high, low, start=start, num=num)
+        else:
+            members = self._db.zrangebyscore(name, low, high, start=start, num=num)
+        return [ m.decode(RedisDB.ENCODING) for m in members ]
+
+    def sortedSetCount(self, name: str):
+        return self._db.zcard(name)
+
     def hashGetAll(self, name: str):
-        data = self._db.hgetall(name)
-        return [ (key, value) for i1, key in enumerate(data[::2]) for i2, value in enumerate(data[1::2]) if i1 == i2 ]
+        return list(self._db.hgetall(name).items())
+
+    def hashScan(self, name: str, match: str = None, count: int = None):
+        # Iterate (key, value) pairs with HSCAN, a page of about 'count' entries at a time.
+        for key, value in self._db.hscan_iter(name, match=match, count=count):
+            yield key, value
+
+class RedisBatch(StorageBatch):
+    '''
+      Write batch with the write methods of RedisDB. Nothing is sent before execute(), which
+      applies all writes atomically in one round trip.
+    '''
+    def __init__(self, pipeline):
+        self._l = logging.getLogger(__name__)
+        self._pipe = pipeline
+
+    def set(self, key: str, value: str, expire: int = None):
+        self._pipe.set(key, value, ex=expire)
+
+    def hashSet(self, name: str, key: str, value: str):
+        self._pipe.hset(name, key, value)
+
+    def hashDelete(self, name: str, keys: list):
+        assert len(keys) > 0, "ERROR: HDEL needs at least one key."
+        self._pipe.hdel(name, *keys)
+
+    def sortedSetAdd(self, name: str, mapping: dict):
+        self._pipe.zadd(name, mapping)
+
+    def sortedSetRemove(self, name: str, members: list):
+        assert len(members) > 0, "ERROR: ZREM needs at least one member."
+        self._pipe.zrem(name, *members)
+
+    def __len__(self):
+        return len(self._pipe)
+
+    def execute(self):
+        return self._pipe.execute()
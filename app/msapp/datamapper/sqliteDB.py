@@ -0,0 +1,254 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .storage import Storage
+from .storage import StorageBatch
+
+class SqliteDB(Storage):
+    '''
+      Embedded storage in a local SQLite database (WAL mode), for single node deployments and tests.
+
+      Reads are served in-process without a network hop. Keys, hashes and sorted sets live in one
+      table each. The connection is opened per process, so the database can be shared by forked
+      worker processes; WAL mode lets readers proceed while a writer commits.
+    '''
+    DEFAULT_PATH = 'msapp.db'
+    ENCODING = 'utf-8'
+    # Seconds to wait for the write lock of another process.
+    BUSY_TIMEOUT = 5
+    # Default page size of hashScan().
+    SCAN_COUNT = 1000
+    # Keys per statement, stays below the SQLite host parameter limit.
+    CHUNK_SIZE = 500
+
+    _SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS hash (name TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, PRIMARY KEY (name, key)) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS zset (name TEXT NOT NULL, member TEXT NOT NULL, score REAL NOT NULL, PRIMARY KEY (name, member)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS zset_score ON zset (name, score, member)"
+    ]
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self._l = logging.getLogger(__name__)
+        self._path = path
+        self._mutex = threading.RLock()
+        self._conn = None
+        self._pid = None
+        self._connection()
+
+    def status(self):
+        return {
+            'Backend': 'sqlite',
+            'Path': self._path
+        }
+
+    def batch(self):
+        return SqliteBatch(self)
+
+    def set(self, key: str, value: str, expire: int = None):
+        self._write([ SqliteDB._setOp(key, value, expire) ])
+
+    def get(self, key: str):
+        row = self._fetchOne("SELECT value, expires FROM kv WHERE key = ?", (key,))
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            self._write([ ("DELETE FROM kv WHERE key = ? AND expires <= ?", (key, time.time())) ])
+            return None
+        return row[0]
+
+    def hashSet(self, name: str, key: str, value: str):
+        self._write([ SqliteDB._hashSetOp(name, key, value) ])
+
+    def hashGet(self, name: str, key: str):
+        row = self._fetchOne("SELECT value FROM hash WHERE name = ? AND key = ?", (name, str(key)))
+        return row[0] if row is not None else None
+
+    def hashGetMany(self, name: str, keys: list):
+        # Values of keys in order, None for missing keys.
+        keys = [ str(k) for k in keys ]
+        values = {}
+        for i in range(0, len(keys), SqliteDB.CHUNK_SIZE):
+            chunk = keys[i:i + SqliteDB.CHUNK_SIZE]
+            rows = self._fetchAll(f"SELECT key, value FROM hash WHERE name = ? AND key IN ({','.join('?' * len(chunk))})", [ name ] + chunk)
+            values.update(rows)
+        return [ values.get(k) for k in keys ]
+
+    def hashExists(self, name: str, key: str):
+        return self._fetchOne("SELECT 1 FROM hash WHERE name = ? AND key = ?", (name, str(key))) is not None
+
+    def hashDelete(self, name: str, keys: list):
+        return sum(self._write(SqliteDB._hashDeleteOps(name, keys)))
+
+    def hashKeys(self, name: str):
+        return [ k.encode(SqliteDB.ENCODING) for (k,) in self._fetchAll("SELECT key FROM hash WHERE name = ?", (name,)) ]
+
+    def hashValues(self, name: str):
+        return [ v for (v,) in self._fetchAll("SELECT value FROM hash WHERE name = ?", (name,)) ]
+
+    def hashGetAll(self, name: str):
+        return [ (k.encode(SqliteDB.ENCODING), v) for k, v in self._fetchAll("SELECT key, value FROM hash WHERE name = ?", (name,)) ]
+
+    def hashScan(self, name: str, match: str = None, count: int = None):
+        # Iterate (key, value) pairs in key order, one page per query (keyset pagination).
+        count = count if count is not None else SqliteDB.SCAN_COUNT
+        query = "SELECT key, value FROM hash WHERE name = ? AND key > ?" + (" AND key GLOB ?" if match is not None else "") + " ORDER BY key LIMIT ?"
+        last = ''
+        while True:
+            params = [ name, last ] + ([ match ] if match is not None else []) + [ count ]
+            rows = self._fetchAll(query, params)
+            for k, v in rows:
+                yield k.encode(SqliteDB.ENCODING), v
+            if len(rows) < count:
+                break
+            last = rows[-1][0]
+
+    def sortedSetAdd(self, name: str, mapping: dict):
+        self._write(SqliteDB._sortedSetAddOps(name, mapping))
+
+    def sortedSetRemove(self, name: str, members: list):
+        return sum(self._write(SqliteDB._sortedSetRemoveOps(name, members)))
+
+    def sortedSetRange(self, name: str, start: int = 0, end: int = -1):
+        # Members ordered by score ascending, by rank from start to end (inclusive, negative counts from the end).
+        if start < 0 or end < 0:
+            count = self.sortedSetCount(name)
+            start = max(0, count + start) if start < 0 else start
+            end = count + end if end < 0 else end
+        if end < start:
+            return []
+        rows = self._fetchAll("SELECT member FROM zset WHERE name = ? ORDER BY score, member LIMIT ? OFFSET ?", (name, end - start + 1, start))
+        return [ m for (m,) in rows ]
+
+    def sortedSetRangeByScore(self, name: str, minScore=None, maxScore=None, offset: int = 0, count: int = None, reverse: bool = False):
+        # Members with minScore <= score <= maxScore (None is unbounded), ordered by score, optionally paged.
+        query = "SELECT member FROM zset WHERE name = ?"
+        params = [ name ]
+        if minScore is not None:
+            query += " AND score >= ?"
+            params.append(minScore)
+        if maxScore is not None:
+            query += " AND score <= ?"
+            params.append(maxScore)
+        query += " ORDER BY score DESC, member DESC" if reverse else " ORDER BY score, member"
+        if count is not None:
+            query += " LIMIT ? OFFSET ?"
+            params += [ count, offset ]
+        return [ m for (m,) in self._fetchAll(query, params) ]
+
+    def sortedSetCount(self, name: str):
+        return self._fetchOne("SELECT COUNT(*) FROM zset WHERE name = ?", (name,))[0]
+
+    def close(self):
+        with self._mutex:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _encode(value):
+        return value if isinstance(value, bytes) else str(value).encode(SqliteDB.ENCODING)
+
+    @staticmethod
+    def _setOp(key: str, value: str, expire: int):
+        expires = time.time() + expire if expire is not None else None
+        return ("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)", (key, SqliteDB._encode(value), expires))
+
+    @staticmethod
+    def _hashSetOp(name: str, key: str, value: str):
+        return ("INSERT OR REPLACE INTO hash (name, key, value) VALUES (?, ?, ?)", (name, str(key), SqliteDB._encode(value)))
+
+    @staticmethod
+    def _hashDeleteOps(name: str, keys: list):
+        return SqliteDB._deleteOps("DELETE FROM hash WHERE name = ? AND key IN", name, keys)
+
+    @staticmethod
+    def _sortedSetAddOps(name: str, mapping: dict):
+        return [ ("INSERT OR REPLACE INTO zset (name, member, score) VALUES (?, ?, ?)", (name, str(m), float(s))) for m, s in mapping.items() ]
+
+    @staticmethod
+    def _sortedSetRemoveOps(name: str, members: list):
+        return SqliteDB._deleteOps("DELETE FROM zset WHERE name = ? AND member IN", name, members)
+
+    @staticmethod
+    def _deleteOps(query: str, name: str, keys: list):
+        keys = [ str(k) for k in keys ]
+        return [ (f"{query} ({','.join('?' * len(keys[i:i + SqliteDB.CHUNK_SIZE]))})", [ name ] + keys[i:i + SqliteDB.CHUNK_SIZE]) for i in range(0, len(keys), SqliteDB.CHUNK_SIZE) ]
+
+    def _connection(self):
+        # Connections must not cross process boundaries, reopen after fork.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self._path, timeout=SqliteDB.BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SqliteDB._SCHEMA:
+                self._conn.execute(statement)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _fetchOne(self, query: str, params):
+        with self._mutex:
+            return self._connection().execute(query, params).fetchone()
+
+    def _fetchAll(self, query: str, params):
+        with self._mutex:
+            return self._connection().execute(query, params).fetchall()
+
+    def _write(self, ops: list):
+        # Apply all statements in one transaction, returns the number of changed rows per statement.
+        with self._mutex:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rowcounts = [ conn.execute(query, params).rowcount for query, params in ops ]
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return rowcounts
+
+class SqliteBatch(StorageBatch):
+    '''
+      Write batch of SqliteDB, applied in one transaction on execute().
+    '''
+    def __init__(self, db: SqliteDB):
+        self._l = logging.getLogger(__name__)
+        self._db = db
+        self._ops = []
+        self._calls = []    # (number of statements, result is the number of removed rows) per call
+
+    def set(self, key: str, value: str, expire: int = None):
+        self._add([ SqliteDB._setOp(key, value, expire) ])
+
+    def hashSet(self, name: str, key: str, value: str):
+        self._add([ SqliteDB._hashSetOp(name, key, value) ])
+
+    def hashDelete(self, name: str, keys: list):
+        self._add(SqliteDB._hashDeleteOps(name, keys), counting=True)
+
+    def sortedSetAdd(self, name: str, mapping: dict):
+        self._add(SqliteDB._sortedSetAddOps(name, mapping))
+
+    def sortedSetRemove(self, name: str, members: list):
+        self._add(SqliteDB._sortedSetRemoveOps(name, members), counting=True)
+
+    def __len__(self):
+        return len(self._ops)
+
+    def execute(self):
+        ops, calls = self._ops, self._calls
+        self._ops, self._calls = [], []
+        rowcounts = self._db._write(ops)
+        results = []
+        i = 0
+        for n, counting in calls:
+            results.append(sum(rowcounts[i:i + n]) if counting else True)
+            i += n
+        return results
+
+    def _add(self, ops: list, counting: bool = False):
+        self._ops += ops
+        self._calls.append((len(ops), counting))
@@ -0,0 +1,95 @@
+class Storage:
+    '''
+      Key-value storage interface of the datamappers, with plain keys, hashes and sorted sets.
+
+      Values are returned as bytes, the way they were stored, and None if missing. Sorted set
+      members are returned as str. Writes collected in a batch are applied atomically on
+      execute(). Implementations: RedisDB (shared, networked) and SqliteDB (embedded, local).
+    '''
+    def status(self):
+        # Backend health and utilisation figures for the service status.
+        return {}
+
+    def batch(self):
+        raise NotImplementedError()
+
+    def set(self, key: str, value: str, expire: int = None):
+        raise NotImplementedError()
+
+    def get(self, key: str):
+        raise NotImplementedError()
+
+    def hashSet(self, name: str, key: str, value: str):
+        raise NotImplementedError()
+
+    def hashGet(self, name: str, key: str):
+        raise NotImplementedError()
+
+    def hashGetMany(self, name: str, keys: list):
+        raise NotImplementedError()
+
+    def hashExists(self, name: str, key: str):
+        raise NotImplementedError()
+
+    def hashKeys(self, name: str):
+        raise NotImplementedError()
+
+    def hashValues(self, name: str):
+        raise NotImplementedError()
+
+    def hashDelete(self, name: str, keys: list):
+        # Number of keys removed.
+        raise NotImplementedError()
+
+    def hashGetAll(self, name: str):
+        raise NotImplementedError()
+
+    def hashScan(self, name: str, match: str = None, count: int = None):
+        # Generator over (key, value) pairs, fetched in pages. 'match' is a glob-style key pattern.
+        raise NotImplementedError()
+
+    def sortedSetAdd(self, name: str, mapping: dict):
+        raise NotImplementedError()
+
+    def sortedSetRemove(self, name: str, members: list):
+        # Number of members removed, so concurrent consumers can claim a member by removing it.
+        raise NotImplementedError()
+
+    def sortedSetRange(self, name: str, start: int = 0, end: int = -1):
+        raise NotImplementedError()
+
+    def sortedSetRangeMany(self, names: list, start: int = 0, end: int = -1):
+        # sortedSetRange() of several sorted sets, one member list per name. Backends override it with one round trip.
+        return [ self.sortedSetRange(name, start, end) for name in names ]
+
+    def sortedSetRangeByScore(self, name: str, minScore=None, maxScore=None, offset: int = 0, count: int = None, reverse: bool = False):
+        raise NotImplementedError()
+
+    def sortedSetCount(self, name: str):
+        raise NotImplementedError()
+
+class StorageBatch:
+    '''
+      Write batch of a Storage. Nothing is written before execute(), which returns one result per
+      call (the number of removed entries for hashDelete and sortedSetRemove).
+    '''
+    def set(self, key: str, value: str, expire: int = None):
+        raise NotImplementedError()
+
+    def hashSet(self, name: str, key: str, value: str):
+        raise NotImplementedError()
+
+    def hashDelete(self, name: str, keys: list):
+        raise NotImplementedError()
+
+    def sortedSetAdd(self, name: str, mapping: dict):
+        raise NotImplementedError()
+
+    def sortedSetRemove(self, name: str, members: list):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def execute(self):
+        raise NotImplementedError()
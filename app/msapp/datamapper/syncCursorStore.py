@@ -0,0 +1,16 @@
+import logging
+
+class SyncCursorStore:
+    def __init__(self, storage):
+        self._l = logging.getLogger(__name__)
+        self._storage = storage
+
+    def save(self, name: str, cursor: int):
+        self._storage.hashSet('synccursor', name, str(cursor))
+
+    def load(self, name: str):
+        data = self._storage.hashGet('synccursor', name)
+        if data is None:
+            self._l.debug(f"No sync cursor '{name}' found in datastore.")
+            return None
+        return int(data)
@@ -1,27 +1,167 @@
 import logging
-import simplejson as json
 
 from msapp.domain import Trade
+from .codec import JsonCodec
 
 class TradeStore:
-    def __init__(self, storage):
+    '''
+      Trades in one hash per symbol keyed by exchange trade id, which is only unique per symbol, with
+      secondary indexes per symbol: sorted sets of trade ids scored by trade id and by timestamp.
+      Range queries read the index first and load only the matching trades. Trades without symbol
+      are kept in the plain 'trade' hash.
+    '''
+    # Index and record layout version, trades stored with an older layout are moved and indexed once on first use.
+    INDEX_VERSION = 2
+    PAGE_SIZE = 500
+    SCAN_COUNT = 1000
+
+    def __init__(self, storage, codec=None):
         self._l = logging.getLogger(__name__)
         self._storage = storage
+        self._codec = codec if codec is not None else JsonCodec()
+        self._indexChecked = False
 
-    def save(self, trade: Trade):
+    def save(self, trade: Trade, batch=None):
+        self._ensureIndexed()
         data = trade.toDict()
-        self._storage.hashSet('trade', str(trade.id()), json.dumps(data))
+        storage = batch if batch is not None else self._storage
+        storage.hashSet(self._key(trade.symbol()), str(trade.id()), self._codec.encode(data))
+        if trade.symbol() is not None:
+            storage.sortedSetAdd('trade:symbols', { trade.symbol(): 0 })
+        self._index(trade, storage)
 
-    def load(self, tradeId):
-        data = self._storage.hashGet('trade', str(tradeId))
+    def load(self, symbol: str, tradeId):
+        self._ensureIndexed()
+        data = self._storage.hashGet(self._key(symbol), str(tradeId))
         if data is None:
-            self._l.error(f"Requested tradeId '{tradeId}' not found in datastore.")
+            self._l.error(f"Requested tradeId '{tradeId}' of '{symbol}' not found in datastore.")
             return None
-        return Trade.fromDict(json.loads(data, use_decimal=True))
+        return Trade.fromDict(self._codec.decode(data))
+
+    def loadMany(self, symbol: str, tradeIds: list):
+        # Load trades of symbol with one datastore request, unknown trades are skipped.
+        self._ensureIndexed()
+        if len(tradeIds) == 0:
+            return []
+        data = self._storage.hashGetMany(self._key(symbol), [ str(tid) for tid in tradeIds ])
+        return [ Trade.fromDict(self._codec.decode(e)) for e in data if e is not None ]
+
+    def exists(self, symbol: str, tradeId):
+        self._ensureIndexed()
+        return self._storage.hashExists(self._key(symbol), str(tradeId))
+
+    def symbols(self):
+        self._ensureIndexed()
+        return self._storage.sortedSetRange('trade:symbols')
+
+    def maxTradeId(self, symbol: str):
+        # Highest known trade id of symbol, or None. Served from the top of the id index.
+        self._ensureIndexed()
+        tids = self._storage.sortedSetRangeByScore(self._idIndex(symbol), count=1, reverse=True)
+        return int(tids[0]) if len(tids) > 0 else None
+
+    def loadRange(self, symbol: str, fromId: int = None, toId: int = None, limit: int = None):
+        # Trades of symbol with fromId <= id <= toId, ordered by id.
+        self._ensureIndexed()
+        tids = self._storage.sortedSetRangeByScore(self._idIndex(symbol), fromId, toId, count=limit)
+        return self.loadMany(symbol, tids)
+
+    def loadByTime(self, symbol: str, since: int = None, until: int = None, limit: int = None):
+        # Trades of symbol with since <= timestamp (ms) <= until, ordered by time.
+        self._ensureIndexed()
+        tids = self._storage.sortedSetRangeByScore(self._timeIndex(symbol), since, until, count=limit)
+        return self.loadMany(symbol, tids)
+
+    def loadLatest(self, symbol: str, limit: int):
+        # Most recent trades of symbol, ordered by id.
+        self._ensureIndexed()
+        tids = self._storage.sortedSetRangeByScore(self._idIndex(symbol), count=limit, reverse=True)
+        return self.loadMany(symbol, list(reversed(tids)))
+
+    def iterTrades(self, symbol: str, fromId: int = None, pageSize: int = PAGE_SIZE):
+        """
+          Walk trades of symbol ordered by id starting with 'fromId', loading one page at a time.
+        """
+        while True:
+            trades = self.loadRange(symbol, fromId=fromId, limit=pageSize)
+            for t in trades:
+                yield t
+            if len(trades) < pageSize:
+                break
+            fromId = int(trades[-1].id()) + 1
+
+    def iterAll(self, count: int = SCAN_COUNT):
+        # Stream all trades with bounded memory, about 'count' records are fetched per round trip.
+        self._ensureIndexed()
+        return self._iterRecords(count)
 
     def loadAllTrades(self):
-        data = self._storage.hashValues('trade')
-        if data is None:
-            self._l.error(f"Requested name 'trade' not found in datastore.")
-            return None
-        return [ Trade.fromDict(json.loads(e, use_decimal=True)) for e in data ]
+        return list(self.iterAll())
+
+    def reindex(self):
+        # Move trades of the plain 'trade' hash to their symbol and rebuild the secondary indexes from all stored trades.
+        self._migrate()
+        batch = self._storage.batch()
+        count = 0
+        for trade in self._iterRecords(TradeStore.SCAN_COUNT):
+            count += self._index(trade, batch)
+            # Bound the batch size for large histories.
+            if len(batch) >= 2 * TradeStore.SCAN_COUNT:
+                batch.execute()
+                batch = self._storage.batch()
+        batch.set('trade:indexversion', str(TradeStore.INDEX_VERSION))
+        batch.execute()
+        self._l.info(f"Indexed {count} trades.")
+
+    def _ensureIndexed(self):
+        if self._indexChecked:
+            return
+        version = self._storage.get('trade:indexversion')
+        if version is None or int(version) < TradeStore.INDEX_VERSION:
+            self.reindex()
+        self._indexChecked = True
+
+    def _iterRecords(self, count: int):
+        for key in [ 'trade' ] + [ self._key(s) for s in self._storage.sortedSetRange('trade:symbols') ]:
+            for _, data in self._storage.hashScan(key, count=count):
+                yield Trade.fromDict(self._codec.decode(data))
+
+    def _migrate(self):
+        # Move trades with symbol out of the plain 'trade' hash into their symbol hash.
+        count = 0
+        batch = self._storage.batch()
+        for tid, data in self._storage.hashScan('trade', count=TradeStore.SCAN_COUNT):
+            symbol = self._codec.decode(data).get('symbol')
+            if symbol is None:
+                continue
+            tid = tid.decode('utf-8')
+            batch.hashSet(self._key(symbol), tid, data)
+            batch.sortedSetAdd('trade:symbols', { symbol: 0 })
+            batch.hashDelete('trade', [ tid ])
+            count += 1
+            # Bound the batch size for large histories.
+            if len(batch) >= 3 * TradeStore.SCAN_COUNT:
+                batch.execute()
+                batch = self._storage.batch()
+        if len(batch) > 0:
+            batch.execute()
+        if count > 0:
+            self._l.info(f"Moved {count} trades to their symbol.")
+
+    def _index(self, trade: Trade, storage):
+        # Only exchange trades (symbol and numeric id) are indexed.
+        if trade.symbol() is None or type(trade.id()) is not int:
+            return 0
+        member = str(trade.id())
+        storage.sortedSetAdd(self._idIndex(trade.symbol()), { member: trade.id() })
+        storage.sortedSetAdd(self._timeIndex(trade.symbol()), { member: trade.timestamp() or 0 })
+        return 1
+
+    def _key(self, symbol: str):
+        return f"trade:{symbol}" if symbol is not None else 'trade'
+
+    def _idIndex(self, symbol: str):
+        return f"trade:{symbol}:byid"
+
+    def _timeIndex(self, symbol: str):
+        return f"trade:{symbol}:bytime"
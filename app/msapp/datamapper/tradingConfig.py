@@ -2,10 +2,23 @@ import logging
 import simplejson as json
 
 class TradingConfig:
+    # Hash of all registered trading config names (name -> strategy).
+    REGISTRY = 'tradingconfig'
+
     def __init__(self, storage):
         self._l = logging.getLogger(__name__)
         self._storage = storage
 
+    def save(self, name: str, conf: dict):
+        # Store config and register it, so the trading service picks it up on bootstrap.
+        batch = self._storage.batch()
+        batch.set(name, json.dumps(conf))
+        batch.hashSet(TradingConfig.REGISTRY, name, conf.get('strategy', ''))
+        batch.execute()
+
+    def names(self):
+        return sorted(k.decode('utf-8') if isinstance(k, bytes) else k for k in self._storage.hashKeys(TradingConfig.REGISTRY))
+
     def loadByName(self, name: str):
         self._l.debug(f"Fetching config '{name}' from datastore.")
         data = self._storage.get(name)
@@ -13,3 +26,12 @@ class TradingConfig:
             self._l.error(f"Requested trading config '{name}' not found in datastore.")
             return None
         return json.loads(data, use_decimal=True)
+
+    def loadAll(self):
+        # All registered configs by name, missing configs are skipped.
+        configs = {}
+        for name in self.names():
+            conf = self.loadByName(name)
+            if conf is not None:
+                configs[name] = conf
+        return configs
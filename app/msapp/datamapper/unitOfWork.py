@@ -0,0 +1,57 @@
+import logging
+
+from msapp.domain.repository import Position
+
+class UnitOfWork:
+    '''
+      Session collecting dirty domain objects (Order, Trade, Position, ...), which are persisted in
+      one datastore transaction on flush().
+
+      An object added several times is written once, with its state at flush time. Used as context
+      manager, the session is flushed when the block completes and discarded if it raises, so a
+      failure never leaves a partial write behind.
+    '''
+    def __init__(self, storage):
+        self._l = logging.getLogger(__name__)
+        self._storage = storage
+        self._dirty = {}
+
+    def add(self, *objects):
+        for o in objects:
+            self._dirty[(type(o), o.id())] = o
+        return self
+
+    def __len__(self):
+        return len(self._dirty)
+
+    def flush(self):
+        # Returns the number of objects written.
+        if len(self._dirty) == 0:
+            return 0
+        batch = self._storage.batch()
+        archived = []
+        for o in self._dirty.values():
+            if isinstance(o, Position):
+                archived.append((o, o.archivedOrders()))
+            o.save(batch=batch)
+        batch.execute()
+        # Archived orders leave the positions only once they are stored.
+        for position, orders in archived:
+            position.clearArchivedOrders(orders)
+        count = len(self._dirty)
+        self._dirty = {}
+        return count
+
+    def discard(self):
+        self._dirty = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is not None:
+            self._l.warning(f"Discarding {len(self._dirty)} unsaved objects due to error.")
+            self.discard()
+            return False
+        self.flush()
+        return False
@@ -1,2 +1,3 @@
 from .order import Order
 from .trade import Trade
+from .tradeColumns import TradeColumns
@@ -3,6 +3,8 @@ from .tTLtool import TTLtool
 from .actor import Actor
 from .actorExecutor import ActorExecutor
 from .taskQueue import TaskQueue
+from .durableTaskQueue import DurableTaskQueue
+from .histogram import Histogram
 from .exceptions import ShortTemporaryFailureException, LongTemporaryFailureException, PermanentFailureException
 
 actor = Actor(ActorExecutor())
@@ -4,13 +4,15 @@ import datetime
 from msapp import config
 from .exceptions import LongTemporaryFailureException
 from .taskQueue import TaskQueue
+from .durableTaskQueue import DurableTaskQueue
 from .task import Task
 from .timingManager import TimingManager
 
 class Actor(object):
     def __init__(self, actorExecutor):
         self._l = logging.getLogger(__name__)
-        self._taskQueue = TaskQueue()  # Multiprocessing and thread-safe task queue with status information
+        # Thread-safe task queue with status information, optionally kept in the datastore.
+        self._taskQueue = DurableTaskQueue("actor") if config.c['actor'].get('durable-queue', False) else TaskQueue()
         self._actorExecutor = actorExecutor
         self._taskTiming = TimingManager()
 
@@ -24,7 +26,7 @@ class Actor(object):
         status['Time'] = datetime.datetime.now().isoformat()
         status['Message'] = ''
         # Collect active and queued tasks information
-        status['TasksInQueue'] = len(self._taskQueue.list())
+        status['TasksInQueue'] = len(self._taskQueue)
         status['AvgTaskDuration'] = self._taskTiming.averageExecutionDuration()
         is_online = True
         # Overall health status of this microservice
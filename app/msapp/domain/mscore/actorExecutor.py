@@ -17,7 +17,8 @@ class ActorExecutor:
           This method is called after gathering the base actor status. So changing existing status
           fields will overwrite the response.
         """
-        pass
+        if self._service:
+            self._service.status(status)
 
     def validateTaskParams(self, task_id: str, params: dict):
         """
@@ -0,0 +1,150 @@
+import logging
+import time
+
+import msapp.datamapper
+from msapp.datamapper.codec import MsgpackCodec
+from .taskQueue import TaskQueue
+from .tTLtool import TTLtool
+
+class DurableTaskQueue:
+    '''
+      Task queue in the datastore, with the API of TaskQueue. Queued tasks survive a restart.
+
+      Task bodies live in a hash, queued task ids in a sorted set scored by their 'not before'
+      epoch (arrival time for ready tasks), started task ids in an in-flight sorted set scored by
+      their visibility deadline. startNext() claims a task by removing it from the queued set,
+      finalize() acknowledges it. Tasks not acknowledged within the visibility timeout are
+      delivered again, recover() redelivers all in-flight tasks of a previous process at once.
+      Delivery is at least once, consumers have to tolerate duplicates.
+    '''
+    # Seconds a started task may stay unacknowledged before it is delivered again.
+    VISIBILITY_TIMEOUT = 60
+    # Minimum seconds between checks for expired in-flight tasks.
+    REDELIVERY_INTERVAL = 1
+    CLAIM_RETRIES = 3
+
+    def __init__(self, name: str, storage=None, codec=None, visibilityTimeout: float = VISIBILITY_TIMEOUT):
+        self.logger = logging.getLogger(__name__)
+        self._name = name
+        self._tasksKey = f"taskqueue:{name}:tasks"
+        self._queuedKey = f"taskqueue:{name}:queued"
+        self._inflightKey = f"taskqueue:{name}:inflight"
+        self._storage = storage
+        self._codec = codec if codec is not None else MsgpackCodec()
+        self._visibilityTimeout = visibilityTimeout
+        self._lastRedelivery = 0
+
+    def __len__(self):
+        db = self._db()
+        return db.sortedSetCount(self._queuedKey) + db.sortedSetCount(self._inflightKey)
+
+    def add(self, task):
+        # 'JQ_not_before' (epoch seconds or UTC ISO time) defers the task. Re-adding a queued id replaces the task.
+        notBefore = task.pop('JQ_not_before', None)
+        if isinstance(notBefore, str):
+            notBefore = TTLtool.expirationTimeIsoToEpoch(notBefore)
+        batch = self._db().batch()
+        batch.hashSet(self._tasksKey, task['id'], self._codec.encode(task))
+        batch.sortedSetAdd(self._queuedKey, { task['id']: notBefore if notBefore else time.time() })
+        batch.execute()
+
+    def addStarted(self, task):
+        batch = self._db().batch()
+        batch.hashSet(self._tasksKey, task['id'], self._codec.encode(task))
+        batch.sortedSetAdd(self._inflightKey, { task['id']: time.time() + self._visibilityTimeout })
+        batch.execute()
+
+    def startNext(self):
+        db = self._db()
+        now = time.time()
+        if now - self._lastRedelivery >= DurableTaskQueue.REDELIVERY_INTERVAL:
+            self._lastRedelivery = now
+            expired = db.sortedSetRangeByScore(self._inflightKey, maxScore=now)
+            if len(expired) > 0:
+                self.logger.warning(f"Visibility timeout of {len(expired)} tasks in queue '{self._name}' expired, delivering them again.")
+                self._requeue(expired)
+        for _ in range(DurableTaskQueue.CLAIM_RETRIES):
+            due = db.sortedSetRangeByScore(self._queuedKey, maxScore=now, count=1)
+            if len(due) == 0:
+                return None
+            taskId = due[0]
+            batch = db.batch()
+            batch.sortedSetRemove(self._queuedKey, [ taskId ])
+            batch.sortedSetAdd(self._inflightKey, { taskId: now + self._visibilityTimeout })
+            claimed, _ = batch.execute()
+            if not claimed:
+                # Another consumer was faster, it owns the in-flight entry.
+                continue
+            raw = db.hashGet(self._tasksKey, taskId)
+            if raw is None:
+                # Acknowledged or flushed in the meantime.
+                db.sortedSetRemove(self._inflightKey, [ taskId ])
+                continue
+            return self._codec.decode(raw)
+        return None
+
+    def finalize(self, job_id, rescheduleDeferralTime=None):
+        db = self._db()
+        if rescheduleDeferralTime:
+            # Instead of dropping the Job, reschedule it. Moved in one transaction, a failure never loses the task.
+            batch = db.batch()
+            batch.sortedSetRemove(self._inflightKey, [ job_id ])
+            batch.sortedSetAdd(self._queuedKey, { job_id: time.time() + rescheduleDeferralTime })
+            inflight, _ = batch.execute()
+            if not inflight:
+                if not db.hashExists(self._tasksKey, job_id):
+                    # Acknowledged or flushed in the meantime, nothing to reschedule.
+                    db.sortedSetRemove(self._queuedKey, [ job_id ])
+                raise Exception(f"Job '{job_id}' not found in running tasks list.")
+            return
+        # Acknowledge, also if the task has been delivered again in the meantime.
+        batch = db.batch()
+        batch.sortedSetRemove(self._inflightKey, [ job_id ])
+        batch.sortedSetRemove(self._queuedKey, [ job_id ])
+        batch.hashDelete(self._tasksKey, [ job_id ])
+        inflight, queued, _ = batch.execute()
+        if not inflight and not queued:
+            raise Exception(f"Job '{job_id}' not found in running tasks list.")
+
+    def inList(self, job_id):
+        return self._db().hashExists(self._tasksKey, job_id)
+
+    def list(self):
+        db = self._db()
+        tasklist = [ { 'Job': taskId, 'Status': TaskQueue.TASK_STATUS_IN_PROGRESS } for taskId in db.sortedSetRange(self._inflightKey) ]
+        tasklist += [ { 'Job': taskId, 'Status': TaskQueue.TASK_STATUS_QUEUED } for taskId in db.sortedSetRange(self._queuedKey) ]
+        return tasklist
+
+    def flushQueued(self):
+        db = self._db()
+        taskIds = db.sortedSetRange(self._queuedKey)
+        if len(taskIds) == 0:
+            return 0
+        batch = db.batch()
+        batch.sortedSetRemove(self._queuedKey, taskIds)
+        batch.hashDelete(self._tasksKey, taskIds)
+        nof, _ = batch.execute()
+        return nof
+
+    def recover(self):
+        # Deliver all in-flight tasks again, e.g. on start after a crash. Returns the number of tasks.
+        taskIds = self._db().sortedSetRange(self._inflightKey)
+        if len(taskIds) > 0:
+            self.logger.warning(f"Recovering {len(taskIds)} unacknowledged tasks of queue '{self._name}'.")
+        self._requeue(taskIds)
+        return len(taskIds)
+
+    def _requeue(self, taskIds: list):
+        # Move in-flight tasks ahead of all queued tasks, in the order they were started.
+        if len(taskIds) == 0:
+            return
+        batch = self._db().batch()
+        batch.sortedSetRemove(self._inflightKey, taskIds)
+        batch.sortedSetAdd(self._queuedKey, { taskId: i for i, taskId in enumerate(taskIds) })
+        batch.execute()
+
+    def _db(self):
+        # Resolved on use, gateways are initialized before the datastores.
+        storage = self._storage if self._storage is not None else msapp.datamapper.kvstore
+        assert storage is not None, f"FATAL: No datastore for task queue '{self._name}'."
+        return storage
@@ -0,0 +1,40 @@
+import bisect
+import threading
+
+class Histogram:
+    '''
+      Fixed bucket histogram for status figures, e.g. batch sizes or latencies.
+
+      Bucket i counts values <= bounds[i] (and > bounds[i - 1]), the last bucket counts values
+      above the highest bound. Thread-safe, observations are cheap enough for hot paths.
+    '''
+    def __init__(self, bounds: list):
+        assert len(bounds) > 0 and list(bounds) == sorted(bounds), "ERROR: Histogram bounds must be sorted ascending."
+        self._bounds = list(bounds)
+        self._mutex = threading.Lock()
+        self._counts = [ 0 ] * (len(bounds) + 1)
+        self._count = 0
+        self._sum = 0
+        self._max = None
+
+    def observe(self, value):
+        i = bisect.bisect_left(self._bounds, value)
+        with self._mutex:
+            self._counts[i] += 1
+            self._count += 1
+            self._sum += value
+            self._max = value if self._max is None or value > self._max else self._max
+
+    def count(self):
+        return self._count
+
+    def status(self):
+        with self._mutex:
+            buckets = { f"<={b}": c for b, c in zip(self._bounds, self._counts) }
+            buckets[f">{self._bounds[-1]}"] = self._counts[-1]
+            return {
+                'Count': self._count,
+                'Avg': self._sum / self._count if self._count else None,
+                'Max': self._max,
+                'Buckets': buckets
+            }
@@ -11,3 +11,8 @@ class TTLtool:
         current_time = datetime.datetime.utcnow()
         expiration_time = datetime.datetime.strptime(expirationtimeIso.split('.')[0], '%Y-%m-%dT%H:%M:%S')
         return current_time > expiration_time
+
+    @staticmethod
+    def expirationTimeIsoToEpoch(expirationtimeIso):
+        expiration_time = datetime.datetime.strptime(expirationtimeIso.split('.')[0], '%Y-%m-%dT%H:%M:%S')
+        return expiration_time.replace(tzinfo=datetime.timezone.utc).timestamp()
@@ -1,125 +1,115 @@
+import heapq
 import logging
-import datetime
-from multiprocessing import Manager
+import threading
+import time
+from collections import deque
 
 from .tTLtool import TTLtool
 
 class TaskQueue:
+    '''
+      Thread-safe task queue of the trading process, with task status information.
+
+      Ready tasks are served FIFO from a deque, deferred tasks wait in a min-heap keyed by their
+      'not before' epoch, so startNext() only looks at the heap top. An id index over queued and
+      running tasks makes inList() and finalize() O(1). Heap and ready lane entries are dropped
+      lazily, when their task has been flushed or re-added in the meantime.
+    '''
     TASK_STATUS_QUEUED = "QUEUED"
     TASK_STATUS_IN_PROGRESS = "IN_PROGRESS"
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        # Shared objects between gunicorn workers and task executor.
-        self.manager = Manager()
-        self.mutex = self.manager.Lock()
-        self.queuedTasks = self.manager.list()   # multitasking and thread-safe list of tasks
-        self.runningTasks = self.manager.list()  # multitasking and thread-safe list of tasks
+        self.mutex = threading.Lock()
+        self._ready = deque()           # (task id, task) in arrival order
+        self._deferred = []             # heap of (not before epoch, sequence, task id, task)
+        self._sequence = 0
+        self._queued = {}               # task id -> task, ready and deferred
+        self._running = {}              # task id -> task, in start order
+
+    def __len__(self):
+        with self.mutex:
+            return len(self._queued) + len(self._running)
 
     def add(self, task):
-        self.mutex.acquire()
-        try:
-            self.queuedTasks.append(task)
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
+        # 'JQ_not_before' (epoch seconds or UTC ISO time) defers the task. Re-adding a queued id replaces the task.
+        notBefore = task.pop('JQ_not_before', None)
+        if isinstance(notBefore, str):
+            notBefore = TTLtool.expirationTimeIsoToEpoch(notBefore)
+        with self.mutex:
+            self._queued[task['id']] = task
+            if notBefore and notBefore > time.time():
+                self._defer(task, notBefore)
+            else:
+                self._ready.append((task['id'], task))
 
     def addStarted(self, task):
-        self.mutex.acquire()
-        try:
-            self.runningTasks.append(task)
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
+        with self.mutex:
+            self._running[task['id']] = task
 
     def startNext(self):
-        self.mutex.acquire()
-        try:
-            for i, task in enumerate(self.queuedTasks):
-                not_before = task.get('JQ_not_before', None)
-                if not_before and not TTLtool.isExpirationtimeIsoExpired(not_before):
-                    continue
-                self.queuedTasks.pop(i)
-                task.pop('JQ_not_before', None)
-                self.runningTasks.append(task)
-                return task
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
+        with self.mutex:
+            try:
+                # Due deferred tasks go first, they have been waiting longest.
+                now = time.time()
+                while self._deferred and self._deferred[0][0] <= now:
+                    _, _, taskId, task = heapq.heappop(self._deferred)
+                    if self._queued.get(taskId) is task:
+                        return self._start(taskId, task)
+                while self._ready:
+                    taskId, task = self._ready.popleft()
+                    if self._queued.get(taskId) is task:
+                        return self._start(taskId, task)
+            except Exception:
+                self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
+                raise
         return None
 
     def finalize(self, job_id, rescheduleDeferralTime=None):
-        self.mutex.acquire()
-        try:
-            # Match job_id to find task to drop.
-            for i, task in enumerate(self.runningTasks):
-                if task['id'] == job_id:
-                    self.runningTasks.pop(i)
-                    if rescheduleDeferralTime:
-                        # Instead of dropping the Job, reschedule it.
-                        task['JQ_not_before'] = TTLtool.calculateExpirationTimeIso(datetime.datetime.utcnow().isoformat(), rescheduleDeferralTime)
-                        # Insert in front of the queue, so it gets rescheduled soon.
-                        self.queuedTasks.insert(0, task)
-                    return
-            raise Exception("Job '%s' not found in running tasks list.", job_id)
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
+        with self.mutex:
+            task = self._running.pop(job_id, None)
+            if task is None:
+                self.logger.error("FATAL: Job queue broken, this is a bug, please investigate!")
+                raise Exception(f"Job '{job_id}' not found in running tasks list.")
+            if rescheduleDeferralTime:
+                # Instead of dropping the Job, reschedule it.
+                self._queued[job_id] = task
+                self._defer(task, time.time() + rescheduleDeferralTime)
 
     def inList(self, job_id):
-        self.mutex.acquire()
-        try:
-            for task in self.runningTasks:
-                if task['id'] == job_id:
-                    return True
-            for task in self.queuedTasks:
-                if task['id'] == job_id:
-                    return True
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
-        return False
+        with self.mutex:
+            return job_id in self._running or job_id in self._queued
 
     def list(self):
-        tasklist = []
-        self.mutex.acquire()
-        try:
-            for task in self.runningTasks:
-                tasklist.append({
-                    'Job': task['id'],
-                    'Status': TaskQueue.TASK_STATUS_IN_PROGRESS
-                })
-            for task in self.queuedTasks:
-                tasklist.append({
-                    'Job': task['id'],
-                    'Status': TaskQueue.TASK_STATUS_QUEUED
-                })
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
+        with self.mutex:
+            tasklist = [ { 'Job': taskId, 'Status': TaskQueue.TASK_STATUS_IN_PROGRESS } for taskId in self._running ]
+            tasklist += [ { 'Job': taskId, 'Status': TaskQueue.TASK_STATUS_QUEUED } for taskId in self._queued ]
         return tasklist
 
+    def recover(self):
+        # Queue started tasks again, ahead of all queued tasks. Returns the number of tasks.
+        with self.mutex:
+            recovered = list(self._running.items())
+            self._running.clear()
+            for taskId, task in reversed(recovered):
+                self._queued[taskId] = task
+                self._ready.appendleft((taskId, task))
+        return len(recovered)
+
     def flushQueued(self):
-        nof = 0
-        self.mutex.acquire()
-        try:
-            nof = len(self.queuedTasks)
-            self.queuedTasks[:] = []
-        except Exception:
-            self.logger.exception("FATAL: Job queue broken, this is a bug, please investigate!")
-            raise
-        finally:
-            self.mutex.release()
+        with self.mutex:
+            nof = len(self._queued)
+            self._queued.clear()
+            self._ready.clear()
+            self._deferred = []
         return nof
+
+    # Internals, called with mutex held.
+    def _defer(self, task, notBefore: float):
+        self._sequence += 1
+        heapq.heappush(self._deferred, (notBefore, self._sequence, task['id'], task))
+
+    def _start(self, taskId, task):
+        del self._queued[taskId]
+        self._running[taskId] = task
+        return task
@@ -14,9 +14,18 @@ class Order:
     STATUS_REJECTED = 'REJECTED'
     STATUS_EXPIRED = 'EXPIRED'
 
+    # Record fields, in row order of fromRow()/toRow().
+    FIELDS = ('orderId', 'symbol', 'status', 'timestamp', 'side', 'price', 'origQuantity')
+
+    __slots__ = ('_orderId', '_symbol', '_status', '_timestamp', '_side', '_price', '_origQuantity')
+
+    _l = logging.getLogger(__name__)
+
     @staticmethod
     def fromDict(data: dict):
-        o = Order(data['orderId'])
+        # Fast path, bypasses the constructor.
+        o = Order.__new__(Order)
+        o._orderId = data['orderId']
         o._symbol = data['symbol']
         o._status = data['status']
         o._timestamp = data['timestamp']
@@ -25,6 +34,13 @@ class Order:
         o._origQuantity = data['origQuantity']
         return o
 
+    @staticmethod
+    def fromRow(row):
+        # Order from a sequence of values in FIELDS order.
+        o = Order.__new__(Order)
+        (o._orderId, o._symbol, o._status, o._timestamp, o._side, o._price, o._origQuantity) = row
+        return o
+
     def __init__(self, orderId: str,
                  symbol: str = None,
                  status: str = None,
@@ -32,7 +48,6 @@ class Order:
                  side: str = None,
                  price: Decimal = None,
                  origQuantity: Decimal = None):
-        self._l = logging.getLogger(__name__)
         self._orderId = orderId
         self._symbol = symbol
         self._status = status
@@ -41,19 +56,21 @@ class Order:
         self._price = price
         self._origQuantity = origQuantity
 
-    def save(self):
-        msapp.datamapper.orderstore.save(self)
-
-    def updateFromStore(self):
-        o = msapp.datamapper.orderstore.load(self.id())
-        self.update(o)
+    def save(self, batch=None):
+        msapp.datamapper.orderstore.save(self, batch=batch)
 
     def id(self):
         return self._orderId
 
+    def symbol(self):
+        return self._symbol
+
     def status(self):
         return self._status
 
+    def timestamp(self):
+        return self._timestamp
+
     def setStatus(self, status: str):
         assert status in [ Order.STATUS_CANCELED, Order.STATUS_EXPIRED, Order.STATUS_FILLED, Order.STATUS_NEW, Order.STATUS_PARTIALLY_FILLED, Order.STATUS_REJECTED ]
         self._status = status
@@ -72,6 +89,9 @@ class Order:
         self._price = order._price
         self._origQuantity = order._origQuantity
 
+    def toRow(self):
+        return (self._orderId, self._symbol, self._status, self._timestamp, self._side, self._price, self._origQuantity)
+
     def toDict(self):
         data = {
             'orderId': self._orderId,
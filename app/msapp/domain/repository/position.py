@@ -10,14 +10,23 @@ from msapp.domain import Trade
 class Position:
     TYPE_LONG_LADDER = "LONG_LADDER"
 
+    __slots__ = ('_id', '_symbol', '_position', '_volume', '_quoteVolume', '_orders', '_orderIndex', '_ordersLoaded', '_archivedOrders')
+
+    _l = logging.getLogger(__name__)
+
     @staticmethod
     def fromDict(data: dict):
-        o = Position(data['id'])
+        # Fast path, bypasses the constructor.
+        o = Position.__new__(Position)
+        o._id = data['id']
         o._position = data['position']
         o._symbol = data['symbol']
         o._volume = data['volume']
         o._quoteVolume = data['quoteVolume']
         o._orders = [ Order(oid) for oid in data['orders'] ]
+        o._orderIndex = { order.id(): order for order in o._orders }
+        o._ordersLoaded = False
+        o._archivedOrders = []
         return o
 
     @staticmethod
@@ -35,7 +44,6 @@ class Position:
         return o
 
     def __init__(self, id: str = None, symbol: str = None, position: dict = None, volume: Decimal = None, quoteVolume: Decimal = None):
-        self._l = logging.getLogger(__name__)
         forceSleep = True if id is None else False
         self._id = ulid.ulid().lower() if id is None else id
         if forceSleep:
@@ -45,11 +53,15 @@ class Position:
         self._position = position
         self._volume = volume
         self._quoteVolume = quoteVolume
+        # Hot order list: open orders, and closed orders not archived yet.
         self._orders = []
+        self._orderIndex = {}
         self._ordersLoaded = False
+        # Closed orders moved out of the hot list, appended to the archive on next save.
+        self._archivedOrders = []
 
-    def save(self):
-        msapp.datamapper.positionstore.save(self)
+    def save(self, batch=None):
+        msapp.datamapper.positionstore.save(self, batch=batch)
 
     def id(self):
         return self._id
@@ -71,8 +83,7 @@ class Position:
         return self._position
 
     def updatePositionVolume(self, trade: Trade):
-        orders = [ o.id() for o in self._orders ]
-        if trade.orderId() in orders:
+        if trade.orderId() in self._orderIndex:
             if trade.side() == Trade.SIDE_BUY:
                 self._quoteVolume -= trade.quoteQuantity()
                 if self._quoteVolume.is_signed():
@@ -86,24 +97,55 @@ class Position:
 
     def assignOrder(self, order: Order):
         oid = order.id()
-        for e in self._orders:
-            if e.id() == oid:
-                self._l.error(f"Order with '{oid}' is already assigned to position '{self._id}'.")
-                return False
+        if oid in self._orderIndex:
+            self._l.error(f"Order with '{oid}' is already assigned to position '{self._id}'.")
+            return False
         self._orders.append(order)
+        self._orderIndex[oid] = order
         return True
 
     def getOrder(self, orderId: int):
         self._loadOrders(force=False)
-        for o in self._orders:
-            if o.id() == orderId:
-                return o
-        return None
+        return self._orderIndex.get(orderId)
+
+    def orders(self, load: bool = True):
+        if load:
+            self._loadOrders(force=False)
+        return list(self._orders)
 
     def openOrders(self):
         self._loadOrders(force=False)
         return [ o for o in self._orders if not o.isClosed() ]
 
+    def closedOrders(self, start: int = 0, end: int = -1):
+        # Archived orders are only needed for reporting, they are loaded from the datastore on request.
+        return msapp.datamapper.positionstore.loadClosedOrders(self, start, end)
+
+    def archiveClosedOrders(self):
+        """
+          Move closed orders out of the hot order list, to keep the per-step working set constant.
+          The orders are appended to the closed order archive of the position on next save. Returns
+          the archived orders.
+        """
+        self._loadOrders(force=False)
+        closed = [ o for o in self._orders if o.isClosed() ]
+        if len(closed) == 0:
+            return []
+        self._orders = [ o for o in self._orders if not o.isClosed() ]
+        for o in closed:
+            del self._orderIndex[o.id()]
+        self._archivedOrders += closed
+        return closed
+
+    def archivedOrders(self):
+        # Orders archived since the last successful save, not in the stored archive yet.
+        return list(self._archivedOrders)
+
+    def clearArchivedOrders(self, orders: list):
+        # Called once 'orders' have been written to the stored archive.
+        stored = { o.id() for o in orders }
+        self._archivedOrders = [ o for o in self._archivedOrders if o.id() not in stored ]
+
     def toDict(self):
         data = {
             'id': self._id,
@@ -115,7 +157,8 @@ class Position:
         }
         return data
 
-    def toDictWithFullOrders(self):
+    def toDictWithFullOrders(self, closedOrders: list = None):
+        # 'closedOrders' are the archived orders to include, see PositionStore.loadLatestClosedOrders().
         self._loadOrders(force=False)
         data = {
             'id': self._id,
@@ -123,13 +166,23 @@ class Position:
             'symbol': self._symbol,
             'volume': self._volume,
             'quoteVolume': self._quoteVolume,
-            'orders': [ o.toDict() for o in self._orders ]
+            'orders': [ o.toDict() for o in self._orders ],
+            'closedOrders': [ o.toDict() for o in closedOrders or [] ]
         }
         return data
 
+    def hydrateOrders(self, orders: dict):
+        # Update orders from already loaded orders (orderId -> Order), e.g. fetched in bulk for many positions.
+        for o in self._orders:
+            loaded = orders.get(o.id())
+            if loaded is not None:
+                o.update(loaded)
+        self._ordersLoaded = True
+
     def _loadOrders(self, force: bool = False):
         if not self._ordersLoaded or force:
             self._l.debug(f"Updating orders from datastore for position '{self._id}'.")
-            for o in self._orders:
-                o.updateFromStore()
+            # All orders with one datastore request.
+            loaded = msapp.datamapper.orderstore.loadMany(self._symbol, [ o.id() for o in self._orders ])
+            self.hydrateOrders({ o.id(): o for o in loaded if o is not None })
         self._ordersLoaded = True
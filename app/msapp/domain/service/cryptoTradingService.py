@@ -1,74 +1,110 @@
 import logging
-import re
-import ulid
 
 import msapp.datamapper
 import msapp.gateway
+from msapp import config
 from msapp.domain.mscore import Task
 from msapp.domain.service.tradingstrategy import LadderTradingStrategy
+from .shardSupervisor import ShardSupervisor
+from .tradingLoopRunner import TradingLoopRunner
 
 class CryptoTradingService:
+    DEFAULT_CONFIG = "binance_BTCUSDT_ladder"
     _taskActor = None
 
     def __init__(self):
         self._l = logging.getLogger(__name__)
         self._runningStrategies = []
+        self._tradingLoop = None
+        self._shardSupervisor = None
 
     def bootstrap(self, taskActor=None):
         # Bootstrap application.
         if not CryptoTradingService._taskActor:
             assert taskActor is not None, "FATAL: Missing initialization of _taskActor"
             CryptoTradingService._taskActor = taskActor
-        # Initializing LadderTradingStrategy for BTCUSDT on binance.
-        conf = msapp.datamapper.tradingconfig.loadByName("binance_BTCUSDT_ladder")
-        assert conf, "Missing config for 'binance_BTCUSDT_ladder'. Please prepare trading config before continuing."
-        assert conf['strategy'] in ["LadderTradingStrategy"], "FATAL: Missing strategy 'LadderTradingStrategy'."
+        configs = self._loadConfigs()
+        symbols = [ conf['symbol'] for conf in configs.values() ]
+        assert len(symbols) == len(set(symbols)), "FATAL: Only one trading config per symbol is supported."
+        # Start trade streams on binance, all streams run in this process.
+        for symbol in symbols:
+            msapp.gateway.binanceAPI.startTradeStream(symbol)
+        shards = config.c.get('trading', {}).get('shards', 0)
+        if shards > 0:
+            # Strategies run in shard processes, each with its own trading loop.
+            self._shardSupervisor = ShardSupervisor(configs, shards)
+            self._shardSupervisor.start()
+            return
+        for name, conf in configs.items():
+            self._runningStrategies.append(CryptoTradingService.createStrategy(name, conf))
+        # Start main loop, driven by execution reports and trade ticks. The actor scheduler is left to housekeeping jobs.
+        self._tradingLoop = TradingLoopRunner(self._runningStrategies, onFailure=CryptoTradingService.strategyFailed)
+        self._tradingLoop.start()
+
+    @staticmethod
+    def createStrategy(name: str, conf: dict):
+        # Create and bootstrap the strategy of trading config 'name'.
+        l = logging.getLogger(__name__)
+        assert conf['strategy'] in ["LadderTradingStrategy"], f"FATAL: Missing strategy '{conf['strategy']}'."
         symbol = conf['symbol']
-        # Start trade stream for 'symbol' on binance.
-        msapp.gateway.binanceAPI.startTradeStream(symbol)
-        positions = []
-        for p in conf['positions']:
-            self._l.info(p)
-            po = msapp.datamapper.positionstore.load(p)
+        l.info(conf['positions'])
+        # Load positions with their orders in bulk.
+        positions = msapp.datamapper.positionstore.loadMany(conf['positions'])
+        for p, po in zip(conf['positions'], positions):
             assert po is not None, f"Missing position '{p}' in datastore."
-            positions.append(po)
         assert len(positions) > 0, "ERROR: Trying to initialize LadderTradingStrategy without positions."
-        self._l.info(f"Initialize '{conf['strategy']}' ({symbol}) with {len(positions)} positions.")
-        strategy = LadderTradingStrategy(symbol, positions)
+        l.info(f"Initialize '{conf['strategy']}' ({symbol}) from '{name}' with {len(positions)} positions.")
+        strategy = LadderTradingStrategy(symbol, positions, maxEvents=conf.get('max-events', LadderTradingStrategy.MAX_EVENTS))
         assert strategy.bootstrap(), "FATAL: Strategy bootstrap initialization failed."
-        self._runningStrategies.append(strategy)
-        # Start main loop.
-        task = Task(id="TASK_LOOP_TRADING_SERVICE", data={})
-        CryptoTradingService._taskActor.postTask(task)
+        return strategy
+
+    @staticmethod
+    def strategyFailed(strategy):
+        # Notify Telegram that trading failed and strategy has been stopped!
+        msapp.gateway.telegramAPI.notify(f"Trading failed for '{strategy.symbol()}', strategy has been stopped!")
+
+    def shutdown(self):
+        if self._shardSupervisor is not None:
+            self._shardSupervisor.stop()
+            self._shardSupervisor = None
+        if self._tradingLoop is not None:
+            self._tradingLoop.stop(timeout=TradingLoopRunner.IDLE_TIMEOUT * 5)
+            self._tradingLoop = None
+
+    def status(self, status: dict):
+        # Exchange request budget utilisation.
+        if msapp.gateway.binanceAPI is not None:
+            status['BinanceRateLimit'] = msapp.gateway.binanceAPI.rateLimitStatus()
+        # Datastore connection pool utilisation.
+        if msapp.datamapper.kvstore is not None:
+            status['Datastore'] = msapp.datamapper.kvstore.status()
+        if self._tradingLoop is not None:
+            status['TradingLoop'] = self._tradingLoop.status()
+        if self._shardSupervisor is not None:
+            status['Shards'] = self._shardSupervisor.status()
+        status['Strategies'] = [ strategy.status() for strategy in list(self._runningStrategies) ]
 
     def process(self, task: Task):
         if task.status() in [ Task.STATUS_FAILED, Task.STATUS_SUCCESS ]:
             return
         if task.status() == Task.STATUS_NEW:
             task.setStatus(Task.STATUS_PROCESSING)
-            if task.id() != 'TASK_LOOP_TRADING_SERVICE':
-                task.save()
+            task.save()
         res = self._dispatchTask(task)
         return res
 
     def _dispatchTask(self, task: Task):
-        if re.match(r'TASK_LOOP_TRADING_SERVICE', task.id()) is not None:
-            self._l.debug("=> Task '" + task.id() + "'.")
-            res = False
-            for strategy in self._runningStrategies:
-                res = strategy.step()
-                if not res:
-                    task.setStatus(Task.STATUS_FAILED)
-                    self._l.error("<= (" + task.status() + ") Task '" + task.id() + "'.")
-                    self._runningStrategies.remove(strategy)
-                    # Notify Telegram that trading failed and strategy has been stopped!
-                    msapp.gateway.telegramAPI.notify(f"Trading failed, strategy has been stopped!")
-                    continue
-                task.setStatus(Task.STATUS_SUCCESS)
-            # Reschedule task to end of queue to create a loop
-            loopTask = Task(id="TASK_LOOP_TRADING_SERVICE_" + ulid.ulid(), data={})
-            CryptoTradingService._taskActor.postTask(loopTask)
-            if not res:
-                return False
-            self._l.debug("<= Task '" + task.id() + "'.")
-            return True
+        # The trading loop runs in TradingLoopRunner, no actor tasks are handled here currently.
+        self._l.error(f"Unknown task '{task.id()}'.")
+        task.setStatus(Task.STATUS_FAILED)
+        return False
+
+    def _loadConfigs(self):
+        # All registered trading configs, by name.
+        configs = msapp.datamapper.tradingconfig.loadAll()
+        if len(configs) == 0:
+            # Config stored before the config registry existed.
+            conf = msapp.datamapper.tradingconfig.loadByName(CryptoTradingService.DEFAULT_CONFIG)
+            assert conf, f"Missing config for '{CryptoTradingService.DEFAULT_CONFIG}'. Please prepare trading config before continuing."
+            configs = { CryptoTradingService.DEFAULT_CONFIG: conf }
+        return configs
@@ -0,0 +1,213 @@
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+
+import msapp.datamapper
+import msapp.gateway
+from .tradingLoopRunner import TradingLoopRunner
+
+class ShardSupervisor:
+    '''
+      Runs the trading strategies in worker processes (shards), one trading loop per shard.
+
+      Strategies are distributed over the shards by symbol. This process keeps the exchange
+      streams: prices are published on the shared memory price board, execution reports are queued
+      per symbol in the datastore (durable queues). Both wake up the shard owning the symbol through
+      its multiprocessing event, so every shard only sees the events of its own symbols and a slow
+      exchange request of one strategy never stalls the strategies of another shard.
+
+      Shards exiting with an error are restarted with exponential backoff, and replay their
+      unacknowledged execution reports. A shard whose strategies have all been stopped (trading
+      failure) exits cleanly and stays down.
+
+      Every shard sends exchange requests on its own, the exchange rate limits are split equally
+      between the shards and this process.
+    '''
+    START_METHOD = 'spawn'
+    # Log format of shard processes, they log with the level of this process.
+    LOG_FORMAT = "%(asctime)s [%(processName)s] %(levelname)s %(name)s: %(message)s"
+    SUPERVISE_INTERVAL = 1
+    RESTART_BACKOFF = 1
+    RESTART_BACKOFF_MAX = 60
+    # Seconds a shard has to run, until its restart backoff is reset.
+    STABLE_UPTIME = 300
+    STOP_TIMEOUT = 10
+
+    @staticmethod
+    def assign(configs: dict, shards: int):
+        # Config names per shard, round robin in name order, so the assignment is stable across restarts.
+        names = sorted(configs.keys())
+        groups = [ names[i::shards] for i in range(min(shards, len(names))) ]
+        return groups
+
+    def __init__(self, configs: dict, shards: int):
+        self._l = logging.getLogger(__name__)
+        assert shards > 0, "ERROR: Number of shards must be positive."
+        assert msapp.gateway.binanceAPI.durableEvents(), "ERROR: Strategy shards need durable execution report queues (binance 'durable-events')."
+        context = multiprocessing.get_context(ShardSupervisor.START_METHOD)
+        self._shards = [ _Shard(i, names, [ configs[n]['symbol'] for n in names ], context) for i, names in enumerate(ShardSupervisor.assign(configs, shards)) ]
+        self._shardBySymbol = { symbol: shard for shard in self._shards for symbol in shard.symbols }
+        self._priceBoardName = msapp.gateway.binanceAPI.priceBoardName()
+        self._processes = len(self._shards) + 1
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        msapp.gateway.binanceAPI.shareRateLimits(self._processes)
+        msapp.gateway.binanceAPI.subscribeExecutionReports(self._onExecutionReport)
+        for symbol in self._shardBySymbol:
+            # Reports are consumed from the durable queues by the shard processes.
+            msapp.gateway.binanceAPI.registerERsymbol(symbol)
+        for symbol in self._shardBySymbol:
+            msapp.gateway.binanceAPI.subscribeTrades(symbol, self._onTrade)
+        for shard in self._shards:
+            self._start(shard)
+        self._thread = threading.Thread(target=self._supervise, name='shard-supervisor', daemon=True)
+        self._thread.start()
+        self._l.info(f"Started {len(self._shards)} strategy shards.")
+
+    def stop(self):
+        self._stopped.set()
+        msapp.gateway.binanceAPI.unsubscribeExecutionReports(self._onExecutionReport)
+        for symbol in self._shardBySymbol:
+            msapp.gateway.binanceAPI.unsubscribeTrades(symbol, self._onTrade)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for shard in self._shards:
+            if shard.process is not None:
+                shard.process.terminate()
+                shard.process.join(ShardSupervisor.STOP_TIMEOUT)
+                shard.process = None
+
+    def status(self):
+        return [ {
+            'Shard': shard.id,
+            'Symbols': shard.symbols,
+            'Pid': shard.process.pid if shard.process is not None else None,
+            'Alive': shard.process is not None and shard.process.is_alive(),
+            'Restarts': shard.restarts,
+            'Finished': shard.finished
+        } for shard in self._shards ]
+
+    def _onExecutionReport(self, trade, order):
+        # Stream thread: the report is already queued, wake up its shard.
+        shard = self._shardBySymbol.get(order.symbol())
+        if shard is not None:
+            shard.notify(events=True)
+
+    def _onTrade(self, symbol, price, timestamp):
+        shard = self._shardBySymbol.get(symbol)
+        if shard is not None:
+            shard.notify(events=False)
+
+    def _supervise(self):
+        while not self._stopped.wait(ShardSupervisor.SUPERVISE_INTERVAL):
+            for shard in self._shards:
+                try:
+                    self._check(shard, time.monotonic())
+                except Exception:
+                    self._l.exception(f"Supervising shard {shard.id} failed.")
+
+    def _check(self, shard, now: float):
+        if shard.finished:
+            return
+        if shard.process is not None:
+            if shard.process.is_alive():
+                if shard.failures > 0 and now - shard.startedAt > ShardSupervisor.STABLE_UPTIME:
+                    shard.failures = 0
+                return
+            exitcode = shard.process.exitcode
+            shard.process = None
+            if exitcode == 0:
+                self._l.warning(f"Shard {shard.id} ({', '.join(shard.symbols)}) finished, all strategies stopped.")
+                shard.finished = True
+                return
+            shard.failures += 1
+            shard.restarts += 1
+            delay = min(ShardSupervisor.RESTART_BACKOFF * 2 ** (shard.failures - 1), ShardSupervisor.RESTART_BACKOFF_MAX)
+            shard.nextStart = now + delay
+            _msg = f"Shard {shard.id} ({', '.join(shard.symbols)}) crashed with exit code {exitcode}, restarting in {delay} seconds."
+            self._l.error(_msg)
+            msapp.gateway.telegramAPI.notify(_msg)
+        if now >= shard.nextStart:
+            self._start(shard)
+
+    def _start(self, shard):
+        shard.process = shard.context.Process(target=_runShard, args=(shard.id, shard.names, self._priceBoardName, self._processes, shard.wakeup, shard.reportsPending,
+                                                                      logging.getLogger().getEffectiveLevel()), name=f"trading-shard-{shard.id}")
+        shard.process.start()
+        shard.startedAt = time.monotonic()
+        self._l.info(f"Shard {shard.id} ({', '.join(shard.symbols)}) started with pid {shard.process.pid}.")
+
+class _Shard:
+    # Supervisor side state of a shard process.
+    def __init__(self, shardId: int, names: list, symbols: list, context):
+        self.id = shardId
+        self.names = names
+        self.symbols = symbols
+        self.context = context
+        # Wakeup of the shard trading loop, with a flag for pending execution reports.
+        self.wakeup = context.Event()
+        self.reportsPending = context.Value('b', 0)
+        self.process = None
+        self.startedAt = 0
+        self.nextStart = 0
+        self.failures = 0
+        self.restarts = 0
+        self.finished = False
+
+    def notify(self, events: bool):
+        if events:
+            self.reportsPending.value = 1
+            self.wakeup.set()
+        elif not self.wakeup.is_set():
+            self.wakeup.set()
+
+def _runShard(shardId: int, names: list, priceBoardName: str, processes: int, wakeup, reportsPending, logLevel: int):
+    # Entry point of a shard process. Spawned processes start without logging configuration.
+    logging.basicConfig(level=logLevel, format=ShardSupervisor.LOG_FORMAT)
+    sys.exit(TradingShard(shardId, names, priceBoardName, processes, wakeup, reportsPending).run())
+
+class TradingShard:
+    '''
+      Shard process: bootstraps its strategies and runs them in a trading loop, woken up by the
+      supervisor. Exchange requests go out directly, prices come from the shared price board.
+    '''
+    def __init__(self, shardId: int, names: list, priceBoardName: str, processes: int, wakeup, reportsPending):
+        self._l = logging.getLogger(__name__)
+        self._id = shardId
+        self._names = names
+        self._priceBoardName = priceBoardName
+        self._processes = processes
+        self._wakeup = wakeup
+        self._reportsPending = reportsPending
+
+    def run(self):
+        from .cryptoTradingService import CryptoTradingService
+        msapp.datamapper.initDatastores()
+        msapp.gateway.initShardGateway(self._priceBoardName, self._processes)
+        strategies = []
+        for name in self._names:
+            conf = msapp.datamapper.tradingconfig.loadByName(name)
+            assert conf, f"Missing config for '{name}'."
+            strategies.append(CryptoTradingService.createStrategy(name, conf))
+        runner = TradingLoopRunner(strategies, onFailure=CryptoTradingService.strategyFailed)
+        runner.start()
+        parent = multiprocessing.parent_process()
+        try:
+            # Forward wakeups of the supervisor until all strategies stopped, or the supervisor is gone.
+            while len(strategies) > 0 and (parent is None or parent.is_alive()):
+                if not self._wakeup.wait(TradingLoopRunner.IDLE_TIMEOUT):
+                    continue
+                self._wakeup.clear()
+                with self._reportsPending.get_lock():
+                    events = self._reportsPending.value != 0
+                    self._reportsPending.value = 0
+                runner.wakeup(events)
+        finally:
+            runner.stop(timeout=TradingLoopRunner.IDLE_TIMEOUT * 5)
+        self._l.info(f"Shard {self._id} stopped.")
+        return 0
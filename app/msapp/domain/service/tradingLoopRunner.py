@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+
+import msapp.gateway
+
+class TradingLoopRunner:
+    '''
+      Event driven trading loop in a dedicated thread.
+
+      The loop sleeps on a condition until an execution report or a trade tick of a strategy symbol
+      arrives, then steps every strategy: pending execution reports are processed, orders are
+      placed for the new price. Wakeups arriving while a step runs are coalesced into the next
+      step. Trade ticks alone skip the execution report queue. A strategy with a backlog of reports
+      beyond one batch is stepped again right away. Without any event, the strategies are stepped
+      every IDLE_TIMEOUT seconds for their periodic full scan.
+    '''
+    IDLE_TIMEOUT = 1
+    THREAD_NAME = 'trading-loop'
+
+    def __init__(self, strategies: list, onFailure=None):
+        self._l = logging.getLogger(__name__)
+        self._strategies = strategies
+        # onFailure(strategy) is invoked from the loop thread, after a failed strategy has been stopped.
+        self._onFailure = onFailure
+        self._wakeup = threading.Condition()
+        self._eventsPending = True    # First step picks up events queued during bootstrap.
+        self._pricePending = False
+        self._running = False
+        self._thread = None
+        self._steps = 0
+        self._lastStepDuration = None
+        self._maxStepDuration = 0
+
+    def start(self):
+        assert self._thread is None, "ERROR: Trading loop already started."
+        msapp.gateway.binanceAPI.subscribeExecutionReports(self._onExecutionReport)
+        for symbol in self._symbols():
+            msapp.gateway.binanceAPI.subscribeTrades(symbol, self._onTrade)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=TradingLoopRunner.THREAD_NAME, daemon=True)
+        self._thread.start()
+        self._l.info(f"Trading loop started for {len(self._strategies)} strategies.")
+
+    def stop(self, timeout: float = None):
+        msapp.gateway.binanceAPI.unsubscribeExecutionReports(self._onExecutionReport)
+        for symbol in self._symbols():
+            msapp.gateway.binanceAPI.unsubscribeTrades(symbol, self._onTrade)
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self):
+        return {
+            'Running': self._thread is not None and self._thread.is_alive(),
+            'Strategies': len(self._strategies),
+            'Steps': self._steps,
+            'LastStepDuration': self._lastStepDuration,
+            'MaxStepDuration': self._maxStepDuration
+        }
+
+    def wakeup(self, events: bool):
+        # Wake up the loop, for queued execution reports (events) or a new price only.
+        with self._wakeup:
+            if events:
+                self._eventsPending = True
+            else:
+                self._pricePending = True
+            self._wakeup.notify()
+
+    def _symbols(self):
+        return { strategy.symbol() for strategy in self._strategies }
+
+    def _onExecutionReport(self, trade, order):
+        # Stream thread: the report is already queued, wake up the loop.
+        self.wakeup(events=True)
+
+    def _onTrade(self, symbol, price, timestamp):
+        self.wakeup(events=False)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                woken = self._wakeup.wait_for(lambda: self._eventsPending or self._pricePending or not self._running, TradingLoopRunner.IDLE_TIMEOUT)
+                if not self._running:
+                    break
+                # An idle timeout also polls the queue, for redelivered events.
+                events = self._eventsPending or not woken
+                self._eventsPending = False
+                self._pricePending = False
+            self._step(events)
+        self._l.info("Trading loop stopped.")
+
+    def _step(self, events: bool):
+        start = time.perf_counter()
+        for strategy in list(self._strategies):
+            try:
+                res = strategy.step(events=events)
+            except Exception:
+                self._l.exception("Trading loop step failed.")
+                res = False
+            if res:
+                if strategy.backlog():
+                    # More execution reports queued than one batch takes, step again right away.
+                    with self._wakeup:
+                        self._eventsPending = True
+                continue
+            self._l.error(f"Strategy for '{strategy.symbol()}' failed and has been stopped.")
+            self._strategies.remove(strategy)
+            if self._onFailure is not None:
+                self._onFailure(strategy)
+        duration = time.perf_counter() - start
+        self._steps += 1
+        self._lastStepDuration = duration
+        self._maxStepDuration = max(self._maxStepDuration, duration)
@@ -1,22 +1,70 @@
 import logging
 import time
+import bisect
 
 import msapp.gateway
 import msapp.datamapper
 from msapp.domain import Trade
+from msapp.domain import Order
 from msapp.domain.repository import Position
 from msapp.domain.mscore import Task
-from msapp.domain.mscore import TaskQueue
+from msapp.domain.mscore import Histogram
 
 class LadderTradingStrategy:
-    def __init__(self, symbol: str, positions: list):
+    # Full re-evaluation of all positions (seconds), as safety net for the incremental order placement.
+    FULL_SCAN_INTERVAL = 60
+    # Maximum number of execution reports applied in one batch per step.
+    MAX_EVENTS = 100
+    BATCH_SIZE_BOUNDS = [ 1, 2, 5, 10, 20, 50, 100 ]
+    BATCH_LATENCY_BOUNDS = [ 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5 ]
+
+    def __init__(self, symbol: str, positions: list, maxEvents: int = MAX_EVENTS):
         self._l = logging.getLogger(__name__)
         self._symbol = symbol
+        self._maxEvents = maxEvents
+        self._backlog = False
+        self._batchSize = Histogram(LadderTradingStrategy.BATCH_SIZE_BOUNDS)
+        self._batchLatency = Histogram(LadderTradingStrategy.BATCH_LATENCY_BOUNDS)
         self._positions = positions
+        self._positionById = { p.id(): p for p in positions }
+        self._positionRank = { p.id(): i for i, p in enumerate(positions) }
         self._tradeEvents = None
+        # Incremental order placement: positions waiting for the price to cross their limit, and
+        # positions to re-evaluate due to fills or cancels.
+        self._waitingSell = _LimitIndex()  # Sell order is placed once price <= sellLimit.
+        self._waitingBuy = _LimitIndex()   # Buy order is placed once price >= buyLimit.
+        self._dirty = set()
+        self._lastPrice = None
+        self._lastFullScan = 0
+        # Index of all orders held by the positions: orderId -> (position, order).
+        self._orderIndex = {}
+        self._rebuildOrderIndex()
+
+    def symbol(self):
+        return self._symbol
+
+    def backlog(self):
+        # True if the last step left execution reports in the queue.
+        return self._backlog
+
+    def status(self):
+        # Event batch figures for tuning MAX_EVENTS (batch latency in seconds, from claim to acknowledgement).
+        return {
+            'Symbol': self._symbol,
+            'Positions': len(self._positions),
+            'EventBatchSize': self._batchSize.status(),
+            'EventBatchLatency': self._batchLatency.status()
+        }
 
     def bootstrap(self):
         self._l.info("LadderTradingStrategy bootstrap start...")
+        # Register for trade updates and replay events not acknowledged before the last shutdown,
+        # so the trade walk below only has to cover the downtime.
+        self._tradeEvents = msapp.gateway.binanceAPI.registerERqueue(self._symbol)
+        assert self._tradeEvents is not None, "Registering trade listener failed."
+        if not self._replayEvents():
+            self._l.error("Replaying pending execution reports failed.")
+            return False
         # Check new trades and update orders and positions (if needed).
         if not self._updateTradesFromExchange():
             self._l.error("Fetching new trades from exchange.")
@@ -29,47 +77,79 @@ class LadderTradingStrategy:
         if not self._placeMissingOrders():
             self._l.error("Placing missing trades failed. Abort trading.")
             return False
-        # Register for trade updates.
-        self._tradeEvents = msapp.gateway.binanceAPI.registerERqueue()
-        assert self._tradeEvents is not None, "Registering trade listener failed."
         self._l.info("LadderTradingStrategy bootstrap finished :-)")
         return True
 
-    def step(self):
-        taskdata = self._tradeEvents.startNext()
-        if taskdata:
-            try:
-                task = Task.createFromJson(taskdata)
-                task.setStatus(Task.STATUS_PROCESSING)
-                data = task.data()
-                trade = Trade.fromDict(data)
-                res = self._tradeEvent(trade)
-                task.setStatus(Task.STATUS_SUCCESS if res is True else Task.STATUS_FAILED)
-                self._tradeEvents.finalize(task.id())
-            except Exception:
-                self._l.exception("Failed processing trade.")
-                return False
+    def step(self, events: bool = True, maxEvents: int = None):
+        # Apply up to maxEvents pending execution reports in one batch (unless only the price changed), then place orders once.
+        maxEvents = maxEvents if maxEvents is not None else self._maxEvents
         try:
-            self._placeMissingOrders()
+            processed = self._processEvents(maxEvents) if events else 0
+            self._backlog = processed >= maxEvents
+        except Exception:
+            self._l.exception("Failed processing trade.")
+            return False
+        try:
+            self._placeTriggeredOrders()
         except Exception:
             self._l.exception("Failed placing missing orders.")
             return False
         return True
 
+    def _processEvents(self, maxEvents: int):
+        # Claim up to maxEvents execution reports, apply and persist them, then acknowledge them. Returns their number.
+        start = time.perf_counter()
+        tasks = []
+        while len(tasks) < maxEvents:
+            taskdata = self._tradeEvents.startNext()
+            if not taskdata:
+                break
+            tasks.append(Task.createFromJson(taskdata))
+        if len(tasks) == 0:
+            return 0
+        events = []
+        for task in tasks:
+            data = task.data()
+            if 'order' in data:
+                # Execution report with order snapshot, trade is only present for executions.
+                events.append((Trade.fromDict(data['trade']) if data['trade'] is not None else None, Order.fromDict(data['order'])))
+            else:
+                events.append((Trade.fromDict(data), None))
+        self._applyEvents(events)
+        # Acknowledge only after the batch has been persisted, unacknowledged reports are delivered again.
+        for task in tasks:
+            self._tradeEvents.finalize(task.id())
+        self._batchSize.observe(len(tasks))
+        self._batchLatency.observe(time.perf_counter() - start)
+        return len(tasks)
+
+    def _replayEvents(self):
+        # Process the events pending at bootstrap, events arriving meanwhile are left to step().
+        try:
+            remaining = len(self._tradeEvents)
+            while remaining > 0:
+                processed = self._processEvents(min(remaining, self._maxEvents))
+                if processed == 0:
+                    break
+                remaining -= processed
+        except Exception:
+            self._l.exception("Failed processing trade.")
+            return False
+        return True
+
     def _updateTradesFromExchange(self):
         self._l.info("Check new trades and update orders and positions.")
         # Fetch open orders for this strategy.
-        orders = { o.id(): o for p in self._positions for o in p.openOrders()  }
-        # Evaluate if new trades occurred on exchange.
-        trades = { t.id(): t for t in msapp.datamapper.tradestore.loadAllTrades() }
-        # Fetch all trades starting with last known trade ID.
-        tid = max(trades.keys()) if len(trades) > 0 else None
-        exTrades = msapp.gateway.binanceAPI.getTrades(symbol=self._symbol, fromId=tid)
-        # Skip trades not part of this strategy.
-        exTrades = [ exTrade for exTrade in exTrades if exTrade.orderId() in orders ]
-        # Update missing local trades.
+        orders = self._openOrders()
+        # Walk all trades starting with last known trade ID of symbol, or resume from last sync checkpoint.
+        tid = msapp.datamapper.tradestore.maxTradeId(self._symbol)
+        exTrades = msapp.gateway.binanceAPI.iterTrades(symbol=self._symbol, fromId=tid, cursorKey=f"ladder:{self._symbol}:trades")
         for exTrade in exTrades:
-            if exTrade.id() not in trades:
+            # Skip trades not part of this strategy.
+            if exTrade.orderId() not in orders:
+                continue
+            # Update missing local trades.
+            if not msapp.datamapper.tradestore.exists(self._symbol, exTrade.id()):
                 self._l.info(f"New trade detected '{exTrade.id()}'.")
                 self._tradeEvent(exTrade)
         return True
@@ -77,44 +157,135 @@ class LadderTradingStrategy:
     def _invalidateClosedOrders(self):
         self._l.info("Invalidate (manually) closed orders in positions.")
         # Fetch open orders for this strategy.
-        orders = { o.id(): o for p in self._positions for o in p.openOrders()  }
+        orders = self._openOrders()
         # Fetch all orders starting with first open order.
         oid = min(orders.keys()) if len(orders) > 0 else None
         if oid is None:
             return True
-        exOrders = msapp.gateway.binanceAPI.getAllOrders(symbol=self._symbol, fromId=oid)
-        # Skip orders not part of this strategy and skip open orders.
-        exClosedOrders = [ exOrder for exOrder in exOrders if exOrder.id() in orders and exOrder.isClosed() ]
-        # Compare exchange orders with local open orders, if status changed, .
-        for exco in exClosedOrders:
-            if exco.id() in orders:
-                self._l.info(f"Found manually closed order '{exco.id()}' on exchange. Update local order.")
-                order = orders[exco.id()]
-                order.update(exco)
-                order.save()
+        pages = msapp.gateway.binanceAPI.iterAllOrderPages(symbol=self._symbol, fromId=oid, cursorKey=f"ladder:{self._symbol}:orders")
+        # Compare exchange orders with local open orders. Persist per page, the walk checkpoint only
+        # advances once the next page is requested, i.e. after the updates of this page are stored.
+        for exOrders in pages:
+            with msapp.datamapper.session() as uow:
+                for exco in exOrders:
+                    # Skip orders not part of this strategy and skip open orders.
+                    if exco.id() in orders and exco.isClosed():
+                        self._l.info(f"Found manually closed order '{exco.id()}' on exchange. Update local order.")
+                        order = orders[exco.id()]
+                        order.update(exco)
+                        uow.add(order)
         return True
 
-    def _tradeEvent(self, trade: Trade):
-        # Update existing orders and positions.
-        for position in self._positions:
-            order = position.getOrder(trade.orderId())
-            # Only process trades that belong to orders in this strategy object.
-            if order is not None:
-                _msg = f"New trade detected for position '{position.id()}' with order '{order.id()}': {trade.toDict()}"
-                self._l.info(_msg)
-                msapp.gateway.telegramAPI.notify(_msg)
-                # Fetch updated order data from binance and update order data.
-                bOrder = msapp.gateway.binanceAPI.getOrder(self._symbol, trade.orderId())
+    def _tradeEvent(self, trade: Trade, bOrder: Order = None):
+        self._applyEvents([ (trade, bOrder) ])
+        return True
+
+    def _applyEvents(self, events: list):
+        '''
+          Apply execution reports (trade or None, order snapshot or None) in one pass and persist
+          the changed orders, positions and trades in one transaction.
+
+          Reports are coalesced per order: the position volume follows every new trade, the order
+          takes the latest snapshot once. Reports of orders not held by this strategy are ignored.
+        '''
+        pending = {}
+        for trade, bOrder in events:
+            orderId = trade.orderId() if trade is not None else bOrder.id()
+            if orderId not in self._orderIndex:
+                continue
+            trades, snapshot = pending.get(orderId, ([], None))
+            if trade is not None:
+                trades.append(trade)
+            pending[orderId] = (trades, bOrder if bOrder is not None else snapshot)
+        if len(pending) == 0:
+            return
+        # Events are delivered at least once. Order, position and trade are persisted together, a known trade is done.
+        known = { t.id() for t in msapp.datamapper.tradestore.loadMany(self._symbol, [ t.id() for trades, _ in pending.values() for t in trades ]) }
+        changed = []
+        # Entering critical section, orders, positions and trades are persisted atomically.
+        with msapp.datamapper.session() as uow:
+            for orderId, (trades, bOrder) in pending.items():
+                position, order = self._orderIndex[orderId]
+                fills = []
+                for trade in trades:
+                    if trade.id() in known:
+                        self._l.info(f"Trade '{trade.id()}' has been processed before, skipped.")
+                        continue
+                    known.add(trade.id())
+                    fills.append(trade)
+                if len(trades) > 0 and len(fills) == 0:
+                    continue
+                if len(fills) > 0:
+                    _msg = "\n".join(f"New trade detected for position '{position.id()}' with order '{order.id()}': {t.toDict()}" for t in fills)
+                    self._l.info(_msg)
+                    msapp.gateway.telegramAPI.notify(_msg)
+                    if bOrder is None:
+                        # No order snapshot delivered with the trade (e.g. reconciliation), fetch it from binance.
+                        bOrder = msapp.gateway.binanceAPI.getOrder(self._symbol, orderId)
+                    for trade in fills:
+                        position.updatePositionVolume(trade)
+                    uow.add(position, *fills)
+                else:
+                    # Order status changed without execution, e.g. order canceled or expired on exchange.
+                    self._l.info(f"Order '{order.id()}' of position '{position.id()}' changed to '{bOrder.status()}'.")
                 assert bOrder is not None
-                # Entering critical section.
                 order.update(bOrder)
-                position.updatePositionVolume(trade)
-                order.save()
-                position.save()
-                trade.save()
+                uow.add(order)
+                changed.append(position)
+        for position in changed:
+            self._markDirty(position)
+
+    def _rebuildOrderIndex(self):
+        self._orderIndex = { o.id(): (p, o) for p in self._positions for o in p.orders() }
+
+    def _openOrders(self):
+        return { oid: o for oid, (_, o) in self._orderIndex.items() if not o.isClosed() }
+
+    def _assignOrder(self, position: Position, order: Order):
+        if order.id() in self._orderIndex:
+            self._l.error(f"Order '{order.id()}' is already assigned to position '{self._orderIndex[order.id()][0].id()}'.")
+            return False
+        if not position.assignOrder(order):
+            return False
+        self._orderIndex[order.id()] = (position, order)
         return True
 
     def _placeMissingOrders(self):
+        # Full scan: re-evaluate every position and rebuild the incremental placement state.
+        price = self._currentPrice()
+        self._waitingSell.clear()
+        self._waitingBuy.clear()
+        self._dirty.clear()
+        self._lastPrice = price
+        self._lastFullScan = time.monotonic()
+        self._archiveClosedOrders(self._positions)
+        # Arm the whole ladder with one batch of concurrent order requests.
+        self._placeOrders(self._positionOrders(self._positions, price))
+        return True
+
+    def _placeTriggeredOrders(self):
+        # Incremental: only re-evaluate positions whose limits the price crossed, or whose orders changed.
+        if time.monotonic() - self._lastFullScan > LadderTradingStrategy.FULL_SCAN_INTERVAL:
+            return self._placeMissingOrders()
+        price = self._currentPrice()
+        if price != self._lastPrice:
+            self._dirty.update(self._waitingSell.popAtOrAbove(price))
+            self._dirty.update(self._waitingBuy.popAtOrBelow(price))
+            self._lastPrice = price
+        if not self._dirty:
+            return True
+        dirty = [ self._positionById[positionId] for positionId in sorted(self._dirty, key=self._positionRank.get) ]
+        self._dirty.clear()
+        self._archiveClosedOrders(dirty)
+        self._placeOrders(self._positionOrders(dirty, price))
+        return True
+
+    def _markDirty(self, position: Position):
+        self._waitingSell.remove(position.id())
+        self._waitingBuy.remove(position.id())
+        self._dirty.add(position.id())
+
+    def _currentPrice(self):
         # Get current symbol price.
         price = None
         while price is None:
@@ -123,64 +294,145 @@ class LadderTradingStrategy:
                 self._l.warning(f"Price not found, waiting for exchange initialization to get current symbol price for '{self._symbol}'.")
                 time.sleep(1)
         assert price, f"ERROR: Price not found for '{self._symbol}'. Wait for exchange initialization."
-        # Orders placed on exchange.
-        for position in self._positions:
-            openOrders = position.openOrders()
-            if len(openOrders) > 0:
-                # Buy or sell order placed, nothing to do.
+        return price
+
+    def _archiveClosedOrders(self, positions: list):
+        # Closed orders are archived before placement, i.e. after all trades of an order have been applied.
+        with msapp.datamapper.session() as uow:
+            for position in positions:
+                archived = position.archiveClosedOrders()
+                for order in archived:
+                    self._orderIndex.pop(order.id(), None)
+                if len(archived) > 0:
+                    uow.add(position, *archived)
+
+    def _placeOrders(self, orders: list):
+        # Place orders (position, side, volume, price) in one batch, and persist results in one transaction.
+        orders = [ o for o in orders if o is not None ]
+        if len(orders) == 0:
+            return
+        placed = msapp.gateway.binanceAPI.placeLimitOrders([ (self._symbol, side, volume, orderPrice) for _, side, volume, orderPrice in orders ])
+        modified = []
+        failed = False
+        for (position, side, _, _), order in zip(orders, placed):
+            if order is None:
+                # Notify user - intervention required.
+                _msg = f"Placing {side.lower()} order failed for '{self._symbol}'."
+                self._l.error(_msg)
+                msapp.gateway.telegramAPI.notify(_msg)
+                failed = True
                 continue
-            # Fetch position parameters for placing orders.
-            positionDef = position.position()
-            assert positionDef['type'] == Position.TYPE_LONG_LADDER
-            # Determine buy or sell order to be placed.
-            volume = position.volume()
-            if not volume.is_zero():
-                # Place sell order, if price is below sellLimit.
-                orderPrice = positionDef['high']['sellLimit']
-                if price > orderPrice:
-                    _msg = f"Current price {price} for '{self._symbol}' is above sell limit {orderPrice}. Avoid selling for more revenue."
-                    self._l.warning(_msg)
-                    # Notify user - intervention recommended.
-                    _key = f"Current price for '{self._symbol}' is above sell limit {orderPrice}. Avoid selling for more revenue."
-                    msapp.gateway.telegramAPI.notifyOnce(_key, _msg)
-                    continue
-                self._l.info(f"Try placing order for '{self._symbol}' - SELL '{volume}' for '{orderPrice}'.")
-                if msapp.gateway.binanceAPI.isOrderPlaceable(self._symbol, "LIMIT_SELL", volume, orderPrice):
-                    order = msapp.gateway.binanceAPI.placeLimitSellOrder(self._symbol, volume, orderPrice)
-                    if order is None:
-                        # Notify user - intervention required
-                        _msg = f"Placing sell order failed for '{self._symbol}'."
-                        self._l.error(_msg)
-                        msapp.gateway.telegramAPI.notify(_msg)
-                        raise Exception("STOP TRADING.")
-                    position.assignOrder(order)
-                    position.save()
-                    order.save()
-                    # For now, only single order is allowed per ladder.
-                    continue
-                else:
-                    self._l.warning("Order can not be placed, maybe requested volume is out of accepted range.")
-            quoteVolume = position.quoteVolume()
-            if not quoteVolume.is_zero():
-                # Place buy order, if price is above buyLimit.
-                orderPrice = positionDef['low']['buyLimit']
-                if price < orderPrice:
-                    self._l.debug(f"Current price {price} for '{self._symbol}' is below buy limit {orderPrice}. Position '{position.id()}' not placed.")
-                    continue
-                # Calculate max buy volume.
-                volume = position.calculateMaxBuyVolume(orderPrice)
-                self._l.info(f"Try placing order for '{self._symbol}' - BUY '{volume}' at '{orderPrice}'.")
-                if msapp.gateway.binanceAPI.isOrderPlaceable(self._symbol, "LIMIT_BUY", volume, orderPrice):
-                    order = msapp.gateway.binanceAPI.placeLimitBuyOrder(self._symbol, volume, orderPrice)
-                    if order is None:
-                        # Notify user - intervention required.
-                        _msg = f"Placing buy order failed for '{self._symbol}'."
-                        self._l.error(_msg)
-                        msapp.gateway.telegramAPI.notify(_msg)
-                        raise Exception("STOP TRADING.")
-                    position.assignOrder(order)
-                    position.save()
-                    order.save()
-                else:
-                    self._l.warning("Order can not be placed, maybe requested volume is out of accepted range.")
-        return True
+            self._assignOrder(position, order)
+            modified += [ position, order ]
+        # Keep successfully placed orders, even if others in the batch failed.
+        msapp.datamapper.saveAll(modified)
+        if failed:
+            raise Exception("STOP TRADING.")
+
+    def _positionOrders(self, positions: list, price):
+        # Orders to place for positions. Orders planned in this batch count as open for the MAX_NUM_ORDERS filter.
+        openOrders = len(self._openOrders())
+        orders = []
+        for position in positions:
+            order = self._positionOrder(position, price, openOrders)
+            if order is not None:
+                orders.append(order)
+                openOrders += 1
+        return orders
+
+    def _positionOrder(self, position: Position, price, openOrders: int = None):
+        # Determine the order to place for position: (position, side, volume, price), or None.
+        # 'openOrders' is the number of open orders of the symbol, validated against MAX_NUM_ORDERS.
+        if len(position.openOrders()) > 0:
+            # Buy or sell order placed, nothing to do.
+            return None
+        # Fetch position parameters for placing orders.
+        positionDef = position.position()
+        assert positionDef['type'] == Position.TYPE_LONG_LADDER
+        # Determine buy or sell order to be placed.
+        volume = position.volume()
+        if not volume.is_zero():
+            # Place sell order, if price is below sellLimit.
+            orderPrice = positionDef['high']['sellLimit']
+            if price > orderPrice:
+                _msg = f"Current price {price} for '{self._symbol}' is above sell limit {orderPrice}. Avoid selling for more revenue."
+                self._l.warning(_msg)
+                # Notify user - intervention recommended.
+                _key = f"Current price for '{self._symbol}' is above sell limit {orderPrice}. Avoid selling for more revenue."
+                msapp.gateway.telegramAPI.notifyOnce(_key, _msg)
+                # Revisit once the price drops to sellLimit.
+                self._waitingSell.add(position.id(), orderPrice)
+                return None
+            self._l.info(f"Try placing order for '{self._symbol}' - SELL '{volume}' for '{orderPrice}'.")
+            if msapp.gateway.binanceAPI.isOrderPlaceable(self._symbol, "LIMIT_SELL", volume, orderPrice, openOrders=openOrders):
+                # For now, only single order is allowed per ladder.
+                return (position, Order.SIDE_SELL, volume, orderPrice)
+            self._l.warning("Order can not be placed, maybe requested volume is out of accepted range.")
+        quoteVolume = position.quoteVolume()
+        if not quoteVolume.is_zero():
+            # Place buy order, if price is above buyLimit.
+            orderPrice = positionDef['low']['buyLimit']
+            if price < orderPrice:
+                self._l.debug(f"Current price {price} for '{self._symbol}' is below buy limit {orderPrice}. Position '{position.id()}' not placed.")
+                # Revisit once the price rises to buyLimit.
+                self._waitingBuy.add(position.id(), orderPrice)
+                return None
+            # Calculate max buy volume.
+            volume = position.calculateMaxBuyVolume(orderPrice)
+            self._l.info(f"Try placing order for '{self._symbol}' - BUY '{volume}' at '{orderPrice}'.")
+            if msapp.gateway.binanceAPI.isOrderPlaceable(self._symbol, "LIMIT_BUY", volume, orderPrice, openOrders=openOrders):
+                return (position, Order.SIDE_BUY, volume, orderPrice)
+            self._l.warning("Order can not be placed, maybe requested volume is out of accepted range.")
+        return None
+
+class _LimitIndex:
+    '''
+      Positions sorted by a price limit, to find the positions a price move crossed with bisect.
+    '''
+    def __init__(self):
+        self._limits = []
+        self._ids = []
+        self._limitById = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def clear(self):
+        self._limits = []
+        self._ids = []
+        self._limitById = {}
+
+    def add(self, positionId: str, limit):
+        self.remove(positionId)
+        i = bisect.bisect_right(self._limits, limit)
+        self._limits.insert(i, limit)
+        self._ids.insert(i, positionId)
+        self._limitById[positionId] = limit
+
+    def remove(self, positionId: str):
+        limit = self._limitById.pop(positionId, None)
+        if limit is None:
+            return
+        i = bisect.bisect_left(self._limits, limit)
+        while self._ids[i] != positionId:
+            i += 1
+        del self._limits[i]
+        del self._ids[i]
+
+    def popAtOrAbove(self, price):
+        # Remove and return all positions with limit >= price.
+        i = bisect.bisect_left(self._limits, price)
+        return self._pop(i, len(self._ids))
+
+    def popAtOrBelow(self, price):
+        # Remove and return all positions with limit <= price.
+        i = bisect.bisect_right(self._limits, price)
+        return self._pop(0, i)
+
+    def _pop(self, start: int, end: int):
+        ids = self._ids[start:end]
+        del self._limits[start:end]
+        del self._ids[start:end]
+        for positionId in ids:
+            del self._limitById[positionId]
+        return ids
@@ -7,9 +7,19 @@ class Trade:
     SIDE_BUY = 'BUY'
     SIDE_SELL = 'SELL'
 
+    # Record fields, in row order of fromRow()/toRow().
+    FIELDS = ('tradeId', 'orderId', 'symbol', 'timestamp', 'side', 'price', 'quantity', 'quoteQuantity', 'commissionAmount', 'commissionAsset')
+
+    # Many trades are held at once (history, bulk loads), keep instances small.
+    __slots__ = ('_tradeId', '_orderId', '_symbol', '_timestamp', '_side', '_price', '_quantity', '_quoteQuantity', '_commissionAmount', '_commissionAsset')
+
+    _l = logging.getLogger(__name__)
+
     @staticmethod
     def fromDict(data: dict):
-        o = Trade(data['tradeId'])
+        # Fast path, bypasses the constructor.
+        o = Trade.__new__(Trade)
+        o._tradeId = data['tradeId']
         o._orderId = data['orderId']
         o._symbol = data['symbol']
         o._timestamp = data['timestamp']
@@ -21,6 +31,13 @@ class Trade:
         o._commissionAsset = data['commissionAsset']
         return o
 
+    @staticmethod
+    def fromRow(row):
+        # Trade from a sequence of values in FIELDS order.
+        o = Trade.__new__(Trade)
+        (o._tradeId, o._orderId, o._symbol, o._timestamp, o._side, o._price, o._quantity, o._quoteQuantity, o._commissionAmount, o._commissionAsset) = row
+        return o
+
     def __init__(self, tradeId: int,
                  orderId: int = None,
                  symbol: str = None,
@@ -31,7 +48,6 @@ class Trade:
                  quoteQuantity: Decimal = None,
                  commissionAmount: Decimal = None,
                  commissionAsset: str = None):
-        logging.getLogger(__name__)
         self._tradeId = tradeId
         self._orderId = orderId
         self._symbol = symbol
@@ -43,8 +59,8 @@ class Trade:
         self._commissionAmount = commissionAmount
         self._commissionAsset = commissionAsset
 
-    def save(self):
-        msapp.datamapper.tradestore.save(self)
+    def save(self, batch=None):
+        msapp.datamapper.tradestore.save(self, batch=batch)
 
     def id(self):
         return self._tradeId
@@ -52,9 +68,18 @@ class Trade:
     def orderId(self):
         return self._orderId
 
+    def symbol(self):
+        return self._symbol
+
+    def timestamp(self):
+        return self._timestamp
+
     def side(self):
         return self._side
 
+    def price(self):
+        return self._price
+
     def quantity(self):
         return self._quantity
 
@@ -67,6 +92,9 @@ class Trade:
     def commissionAsset(self):
         return self._commissionAsset
 
+    def toRow(self):
+        return (self._tradeId, self._orderId, self._symbol, self._timestamp, self._side, self._price, self._quantity, self._quoteQuantity, self._commissionAmount, self._commissionAsset)
+
     def toDict(self):
         data = {
             'tradeId': self._tradeId,
@@ -0,0 +1,99 @@
+from array import array
+from decimal import Decimal
+
+from .trade import Trade
+
+class TradeColumns:
+    '''
+      Columnar batch of trades for bulk analytics.
+
+      Every field is kept in its own typed array. Decimal amounts are stored as int64 scaled by
+      10^8 (the precision of Binance amounts), so sums and averages run on plain integers. Symbol
+      and commission asset are interned per batch. Single rows convert back into Trade objects.
+    '''
+    EXPONENT = 8
+    _SCALE = 10 ** EXPONENT
+    _SIDES = [ Trade.SIDE_BUY, Trade.SIDE_SELL ]
+    _SIDE_INDEX = { Trade.SIDE_BUY: 0, Trade.SIDE_SELL: 1 }
+
+    @staticmethod
+    def fromTrades(trades):
+        columns = TradeColumns()
+        for t in trades:
+            columns.append(t)
+        return columns
+
+    def __init__(self):
+        self.ids = array('q')
+        self.orderIds = array('q')
+        self.timestamps = array('q')
+        self.sides = array('b')
+        self.prices = array('q')
+        self.quantities = array('q')
+        self.quoteQuantities = array('q')
+        self.commissionAmounts = array('q')
+        self._symbols = array('H')
+        self._commissionAssets = array('H')
+        self._names = []
+        self._nameIndex = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, trade: Trade):
+        self.appendRow(trade.toRow())
+
+    def appendRow(self, row):
+        # Row in Trade.FIELDS order.
+        tradeId, orderId, symbol, timestamp, side, price, quantity, quoteQuantity, commissionAmount, commissionAsset = row
+        self.ids.append(tradeId)
+        self.orderIds.append(orderId if orderId is not None else -1)
+        self._symbols.append(self._intern(symbol))
+        self.timestamps.append(timestamp or 0)
+        self.sides.append(TradeColumns._SIDE_INDEX[side])
+        self.prices.append(self._scale(price))
+        self.quantities.append(self._scale(quantity))
+        self.quoteQuantities.append(self._scale(quoteQuantity))
+        self.commissionAmounts.append(self._scale(commissionAmount))
+        self._commissionAssets.append(self._intern(commissionAsset))
+
+    def row(self, i: int):
+        return (self.ids[i], self.orderIds[i], self._names[self._symbols[i]], self.timestamps[i], TradeColumns._SIDES[self.sides[i]],
+                self._unscale(self.prices[i]), self._unscale(self.quantities[i]), self._unscale(self.quoteQuantities[i]),
+                self._unscale(self.commissionAmounts[i]), self._names[self._commissionAssets[i]])
+
+    def trade(self, i: int):
+        return Trade.fromRow(self.row(i))
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self.trade(i)
+
+    def volume(self, side: str = None):
+        # Total traded quantity and quote quantity (Decimal tuple), optionally of one side only.
+        if side is None:
+            return self._unscale(sum(self.quantities)), self._unscale(sum(self.quoteQuantities))
+        s = TradeColumns._SIDE_INDEX[side]
+        sides = self.sides
+        quantity = sum(q for q, x in zip(self.quantities, sides) if x == s)
+        quoteQuantity = sum(q for q, x in zip(self.quoteQuantities, sides) if x == s)
+        return self._unscale(quantity), self._unscale(quoteQuantity)
+
+    def averagePrice(self, side: str = None):
+        # Volume weighted average price, None if there is no volume.
+        quantity, quoteQuantity = self.volume(side)
+        return (quoteQuantity / quantity) if quantity else None
+
+    def _intern(self, name: str):
+        i = self._nameIndex.get(name)
+        if i is None:
+            i = len(self._names)
+            self._names.append(name)
+            self._nameIndex[name] = i
+        return i
+
+    def _scale(self, value: Decimal):
+        return int(value * TradeColumns._SCALE) if value is not None else 0
+
+    def _unscale(self, value: int):
+        return Decimal(value).scaleb(-TradeColumns.EXPONENT)
@@ -1,5 +1,6 @@
 telegramAPI = None
 binanceAPI = None
+asyncBinanceAPI = None
 
 def initGateway():
     # Initialize pushNotifier (Telegram).
@@ -11,3 +12,23 @@ def initGateway():
     from .binanceApi import BinanceAPI
     binanceAPI = BinanceAPI()
     binanceAPI.startUserStream()
+    global asyncBinanceAPI
+    from .asyncBinanceApi import AsyncBinanceAPI
+    asyncBinanceAPI = AsyncBinanceAPI(binanceAPI)
+    # Keep exchange info (symbol filters) up to date in the background.
+    import msapp.domain.mscore
+    msapp.domain.mscore.actor_job_scheduler.registerAppJobInterval("binance_exchangeinfo_refresh", lambda: binanceAPI.refreshExchangeInfo(force=False), seconds=BinanceAPI.EXCHANGE_INFO_REFRESH_INTERVAL)
+
+def initShardGateway(priceBoardName: str, processes: int):
+    # Gateways of a strategy shard process: exchange requests only, the streams run in the supervisor
+    # process, which publishes prices on the shared price board 'priceBoardName'. The exchange rate limits
+    # are shared by 'processes' processes (shards and supervisor).
+    global telegramAPI
+    from .telegram import Telegram
+    telegramAPI = Telegram("monkytrader")
+    global binanceAPI
+    from .binanceApi import BinanceAPI
+    binanceAPI = BinanceAPI(priceBoardName=priceBoardName, processes=processes)
+    global asyncBinanceAPI
+    from .asyncBinanceApi import AsyncBinanceAPI
+    asyncBinanceAPI = AsyncBinanceAPI(binanceAPI)
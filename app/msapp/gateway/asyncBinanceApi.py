@@ -0,0 +1,115 @@
+import logging
+import asyncio
+import functools
+from decimal import Decimal
+
+from msapp.domain import Order
+
+class AsyncBinanceAPI:
+    '''
+      Awaitable gateway with the method surface of BinanceAPI.
+
+      REST calls run concurrently in the REST pool of the wrapped BinanceAPI, which shares one
+      keep-alive HTTP connection pool, so a slow response only blocks its own awaitable. Stream
+      events are consumed with 'async for' from the running event loop.
+    '''
+    # Bounded buffer for price ticks per consumer, the oldest ticks are dropped if the consumer lags.
+    TRADE_BUFFER_SIZE = 1000
+
+    def __init__(self, binanceAPI):
+        self._l = logging.getLogger(__name__)
+        self._api = binanceAPI
+
+    async def getCurrentPrice(self, symbol: str):
+        # Shared memory read, does not leave the event loop.
+        return self._api.getCurrentPrice(symbol)
+
+    async def getOrder(self, symbol: str, orderId: int):
+        return await self._call(self._api.getOrder, symbol, orderId)
+
+    async def getOrders(self, symbol: str, orderIds: list):
+        # Fan out order requests, results are in order of orderIds.
+        return await asyncio.gather(*[ self.getOrder(symbol, orderId) for orderId in orderIds ])
+
+    async def getAllOrders(self, symbol: str, fromId: int = None, filterRejectedExpired: bool = True):
+        return await self._call(self._api.getAllOrders, symbol=symbol, fromId=fromId, filterRejectedExpired=filterRejectedExpired)
+
+    async def getTrades(self, symbol: str, fromId: int = None):
+        return await self._call(self._api.getTrades, symbol=symbol, fromId=fromId)
+
+    async def isOrderPlaceable(self, symbol: str, tradeType: str, quantity: Decimal, price: Decimal, openOrders: int = None):
+        return await self._call(self._api.isOrderPlaceable, symbol, tradeType, quantity, price, openOrders=openOrders)
+
+    async def placeLimitBuyOrder(self, symbol: str, quantity: Decimal, price: Decimal, isTest: bool = False):
+        return await self._call(self._api.placeLimitBuyOrder, symbol, quantity, price, isTest=isTest)
+
+    async def placeLimitSellOrder(self, symbol: str, quantity: Decimal, price: Decimal, isTest: bool = False):
+        return await self._call(self._api.placeLimitSellOrder, symbol, quantity, price, isTest=isTest)
+
+    async def cancelOrder(self, symbol: str, orderId: int):
+        return await self._call(self._api.cancelOrder, symbol, orderId)
+
+    async def placeLimitOrders(self, orders: list):
+        # Items (symbol, side, quantity, price), per item result is the placed Order or None.
+        return await asyncio.gather(*[ self._placeItem(*o) for o in orders ])
+
+    async def cancelOrders(self, orders: list):
+        # Items (symbol, orderId), per item result is the canceled Order or None.
+        return await asyncio.gather(*[ self._cancelItem(*o) for o in orders ])
+
+    async def _placeItem(self, symbol: str, side: str, quantity: Decimal, price: Decimal):
+        assert side in [ Order.SIDE_BUY, Order.SIDE_SELL ], f"Unknown side '{side}'"
+        place = self._api.placeLimitBuyOrder if side == Order.SIDE_BUY else self._api.placeLimitSellOrder
+        try:
+            return await self._call(place, symbol, quantity, price)
+        except Exception:
+            self._l.exception(f"Placing {side} order for '{symbol}' - '{quantity}' at '{price}' failed.")
+            return None
+
+    async def _cancelItem(self, symbol: str, orderId: int):
+        try:
+            return await self._call(self._api.cancelOrder, symbol, orderId)
+        except Exception:
+            self._l.exception(f"Canceling order '{orderId}' for '{symbol}' failed.")
+            return None
+
+    async def trades(self, symbol: str):
+        """
+          Async iterator over (symbol, price, timestamp) of the symbol trade stream.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=AsyncBinanceAPI.TRADE_BUFFER_SIZE)
+        def _put(item):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(item)
+        def _onTrade(symbol, price, timestamp):
+            # Invoked from the stream thread.
+            loop.call_soon_threadsafe(_put, (symbol, price, timestamp))
+        self._api.subscribeTrades(symbol, _onTrade)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._api.unsubscribeTrades(symbol, _onTrade)
+
+    async def executionReports(self):
+        """
+          Async iterator over (trade, order) execution reports of the user data stream. 'trade' is None
+          for order status changes without execution.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        def _onExecutionReport(trade, order):
+            # Invoked from the stream thread.
+            loop.call_soon_threadsafe(queue.put_nowait, (trade, order))
+        self._api.subscribeExecutionReports(_onExecutionReport)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._api.unsubscribeExecutionReports(_onExecutionReport)
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._api.restPool(), functools.partial(fn, *args, **kwargs))
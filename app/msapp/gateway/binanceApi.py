@@ -1,107 +1,264 @@
 import logging
+import threading
+import time
 import simplejson as json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from binance.client import Client
 from binance.websockets import BinanceSocketManager
 from twisted.internet import reactor
-from multiprocessing import Manager
 from decimal import Decimal
 
+import msapp.datamapper
 from msapp.domain import Trade
 from msapp.domain import Order
 from msapp.domain.mscore import Task
 from msapp.domain.mscore import TaskQueue
+from msapp.domain.mscore import DurableTaskQueue
 from msapp import config
+from .priceBoard import PriceBoard
+from .tradeStream import CombinedTradeStream
+from .symbolFilters import SymbolFilters
+from .rateLimiter import RateLimiter
 
 class BinanceAPI:
     _self = None
 
-    def __init__(self):
+    # Maximum page size of the paginated history endpoints.
+    HISTORY_PAGE_LIMIT = 1000
+    # Request weight, priority and order count of the REST endpoints in use.
+    ENDPOINTS = {
+        'get_order': (2, RateLimiter.PRIORITY_QUERY, 0),
+        'create_order': (1, RateLimiter.PRIORITY_ORDER, 1),
+        'create_test_order': (1, RateLimiter.PRIORITY_ORDER, 0),
+        'cancel_order': (1, RateLimiter.PRIORITY_ORDER, 0),
+        'get_all_orders': (10, RateLimiter.PRIORITY_SYNC, 0),
+        'get_my_trades': (10, RateLimiter.PRIORITY_SYNC, 0),
+        'get_exchange_info': (10, RateLimiter.PRIORITY_SYNC, 0)
+    }
+    # Exchange info is shared by all processes through the datastore. Entries expire after TTL seconds,
+    # processes check for a new version at most every EXCHANGE_INFO_CHECK_INTERVAL seconds.
+    EXCHANGE_INFO_TTL = 3600
+    EXCHANGE_INFO_REFRESH_INTERVAL = 900
+    EXCHANGE_INFO_CHECK_INTERVAL = 30
+    # Concurrent in-flight REST requests, sharing one keep-alive connection pool of the same size.
+    REST_POOL_SIZE = 8
+
+    def __init__(self, priceBoardName: str = None, processes: int = 1):
         BinanceAPI._self = self
         self._l = logging.getLogger(__name__)
-        # Track prices of symbols.
-        self._mpManager = Manager()
-        self._symbolCurrentPricesMutex = self._mpManager.Lock()
-        self._symbolCurrentPrices = self._mpManager.dict()
-        # Symbol info cache.
+        # Track prices of symbols in shared memory, readable by all processes without IPC. Strategy
+        # shard processes attach to the price board of the process running the streams.
+        self._priceBoard = PriceBoard.attach(priceBoardName) if priceBoardName is not None else PriceBoard()
+        # Symbol info and filter cache, loaded from the shared exchange info.
         self._symbolInfo = {}
-        # Execution event transporter.
-        self._execReportQueue = TaskQueue()
+        self._symbolFilters = {}
+        self._exchangeInfoMutex = threading.Lock()
+        self._exchangeInfoVersion = None
+        self._exchangeInfoChecked = 0
+        # In paranoid mode, every locally validated order is additionally checked with a test order on the exchange.
+        self._paranoid = config.c['binance'].get('paranoid-mode', False)
+        # Client side request weight and order rate accounting, shared with the other 'processes' using the account.
+        self._rateLimiter = RateLimiter(
+            weightPerMinute=config.c['binance'].get('weight-limit', 1200),
+            ordersPer10s=config.c['binance'].get('order-limit-10s', 100),
+            ordersPerDay=config.c['binance'].get('order-limit-daily', 200000),
+            processes=processes)
+        # Execution event transporter, one queue per symbol. By default in the datastore, so unacknowledged
+        # events survive a restart and can be consumed by strategies in other processes.
+        self._durableEvents = config.c['binance'].get('durable-events', True)
+        self._execReportQueuesMutex = threading.Lock()
+        self._execReportQueues = {}
+        self._execReportRecovered = set()
+        # Symbols with a consuming strategy, in this or a shard process. Reports of other symbols are not queued.
+        self._execReportSymbols = set()
+        self._execReportSubscribersMutex = threading.Lock()
+        self._execReportSubscribers = []
         # Initialize binance client.
         self._client = Client(config.c['binance']['apikey'], config.c['binance']['apisecret'])
+        # Requests run concurrently in the REST pool (see AsyncBinanceAPI) and reuse pooled keep-alive connections.
+        self._client.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=BinanceAPI.REST_POOL_SIZE))
+        self._client.session.hooks['response'].append(self._rateLimiter.onResponse)
+        self._restPool = ThreadPoolExecutor(max_workers=BinanceAPI.REST_POOL_SIZE, thread_name_prefix='binance-rest')
         # Initialize stream connections.
         self._bmu = BinanceSocketManager(self._client, user_timeout=60)
         self._bmuConnKey = None
         self._bmt = BinanceSocketManager(self._client, user_timeout=60)
         self._bmtConnKey = None
+        self._bmtStarted = False
+        # All trade streams are multiplexed over one connection, events are routed by symbol.
+        self._tradeStream = CombinedTradeStream(self._bmt, BinanceAPI._processStreamEvent)
+        self._tradeSubscribersMutex = threading.Lock()
+        self._tradeSubscribers = {}
 
     def startTradeStream(self, symbol: str):
-        self._symbolCurrentPricesMutex.acquire()
+        self.addSymbol(symbol)
+
+    def addSymbol(self, symbol: str):
+        # Subscribe symbol trade stream on the combined stream, without reconnecting other symbols.
         try:
-            self._symbolCurrentPrices[symbol] = None
+            self._priceBoard.register(symbol)
         except Exception:
             self._l.exception("ERROR: Initializing symbol price tracker.")
-        finally:
-            self._symbolCurrentPricesMutex.release()
-        self._bmtConnKey = self._bmt.start_trade_socket(symbol, BinanceAPI._processEvent)
-        self._bmt.start()
+        with self._tradeSubscribersMutex:
+            self._tradeSubscribers.setdefault(symbol, [])
+        if not self._tradeStream.add(symbol):
+            return False
+        self._bmtConnKey = self._tradeStream.connKey()
+        if not self._bmtStarted:
+            self._bmt.start()
+            self._bmtStarted = True
+        self._l.info(f"Trade stream for '{symbol}' added.")
+        return True
+
+    def removeSymbol(self, symbol: str):
+        with self._tradeSubscribersMutex:
+            self._tradeSubscribers.pop(symbol, None)
+        if not self._tradeStream.remove(symbol):
+            return False
+        self._l.info(f"Trade stream for '{symbol}' removed.")
+        return True
+
+    def symbols(self):
+        return self._tradeStream.symbols()
+
+    def subscribeTrades(self, symbol: str, callback):
+        # callback(symbol: str, price: Decimal, timestamp: int) is invoked from the stream thread on every trade.
+        with self._tradeSubscribersMutex:
+            self._tradeSubscribers.setdefault(symbol, []).append(callback)
+
+    def unsubscribeTrades(self, symbol: str, callback):
+        with self._tradeSubscribersMutex:
+            subscribers = self._tradeSubscribers.get(symbol, [])
+            if callback in subscribers:
+                subscribers.remove(callback)
 
     def startUserStream(self):
         self._bmuConnKey = self._bmu.start_user_socket(BinanceAPI._processEvent)
         self._bmu.start()
 
     def shutdown(self):
-        self._bmt.stop_socket(self._bmtConnKey)
+        self._tradeStream.stop()
         self._bmt.close()
         self._bmu.stop_socket(self._bmuConnKey)
         self._bmu.close()
         reactor.stop()
-        self._execReportQueue = []
+        self._execReportQueues = {}
+        self._restPool.shutdown(wait=False)
+        self._priceBoard.close()
+
+    def registerERsymbol(self, symbol: str):
+        # Queue execution reports of symbol from now on, for a strategy consuming them in this or another process.
+        with self._execReportQueuesMutex:
+            self._execReportSymbols.add(symbol)
 
-    def registerERqueue(self):
-        self._l.debug("DISABLED: Registering new tradeEvents listener to binance does not work currently. Shared event queue is returned instead.")
-        return self._execReportQueue
+    def registerERqueue(self, symbol: str):
+        # Execution report queue of symbol, for its (single) consuming strategy.
+        self.registerERsymbol(symbol)
+        queue = self._execReportQueue(symbol)
+        with self._execReportQueuesMutex:
+            recover = symbol not in self._execReportRecovered
+            self._execReportRecovered.add(symbol)
+        if recover:
+            # Events started but not acknowledged by the previous consumer are delivered again.
+            queue.recover()
+        return queue
+
+    def durableEvents(self):
+        return self._durableEvents
+
+    def subscribeExecutionReports(self, callback):
+        # callback(trade: Trade, order: Order) is invoked from the stream thread for every execution report.
+        # 'trade' is None for reports without execution (NEW, CANCELED, REJECTED, EXPIRED).
+        with self._execReportSubscribersMutex:
+            self._execReportSubscribers.append(callback)
+
+    def unsubscribeExecutionReports(self, callback):
+        with self._execReportSubscribersMutex:
+            if callback in self._execReportSubscribers:
+                self._execReportSubscribers.remove(callback)
+
+    def shareRateLimits(self, processes: int):
+        # Rate limits are used by 'processes' processes including this one, e.g. strategy shards.
+        self._rateLimiter.share(processes)
+
+    def rateLimitStatus(self):
+        return self._rateLimiter.status()
+
+    def restPool(self):
+        return self._restPool
+
+    def priceBoardName(self):
+        # Name of the shared memory price board, see PriceBoard.attach().
+        return self._priceBoard.name()
 
     def getCurrentPrice(self, symbol: str):
-        self._symbolCurrentPricesMutex.acquire()
-        price = None
-        try:
-            price = self._symbolCurrentPrices[symbol]
-        except Exception:
-            self._l.exception(f"ERROR: Symbol not found {symbol}.")
-        finally:
-            self._symbolCurrentPricesMutex.release()
-        return price
+        return self._priceBoard.price(symbol)
+
+    def getCurrentPriceTimestamp(self, symbol: str):
+        return self._priceBoard.read(symbol)[1]
+
+    def getAllOrders(self, symbol: str, fromId: int = None, limit: int = HISTORY_PAGE_LIMIT, filterRejectedExpired: bool = True):
+        return list(self.iterAllOrders(symbol=symbol, fromId=fromId, limit=limit, filterRejectedExpired=filterRejectedExpired))
+
+    def iterAllOrders(self, symbol: str, fromId: int = None, limit: int = HISTORY_PAGE_LIMIT, filterRejectedExpired: bool = True, cursorKey: str = None):
+        # Lazily walk all orders starting with order ID 'fromId', see iterAllOrderPages().
+        for orders in self.iterAllOrderPages(symbol=symbol, fromId=fromId, limit=limit, filterRejectedExpired=filterRejectedExpired, cursorKey=cursorKey):
+            yield from orders
+
+    def iterAllOrderPages(self, symbol: str, fromId: int = None, limit: int = HISTORY_PAGE_LIMIT, filterRejectedExpired: bool = True, cursorKey: str = None):
+        """
+          Lazily walk all orders starting with order ID 'fromId' (complete history if None), page by page.
 
-    def getAllOrders(self, symbol: str, fromId: int = None, limit: int = 500, filterRejectedExpired: bool = True):
-        # TODO: Pagination!
+          Order status changes, so a checkpoint never replaces an explicit 'fromId' (e.g. the lowest
+          local open order). If 'cursorKey' is given and 'fromId' is None, the walk starts at the
+          checkpoint stored in the datastore. The checkpoint is the lowest order still open on the
+          exchange (or the next order ID), stored when the caller requests the next page, i.e. after
+          it has consumed (and persisted) the previous one.
+        """
         if fromId is None:
-            orders = self._client.get_all_orders(symbol=symbol, limit=limit)
-        else:
-            orders = self._client.get_all_orders(symbol=symbol, orderId=fromId, limit=limit)
-        self._l.debug(json.dumps(orders, indent=4, ensure_ascii=False))
-        result = []
-        for o in orders:
-            order = self._assembleOrder(o, filterRejectedExpired)
-            if order is not None:
-                result.append(order)
-        return result
+            fromId = self._resumeCursor(cursorKey, 0)
+        firstOpenId = None
+        while True:
+            orders = self._request('get_all_orders', symbol=symbol, orderId=fromId, limit=limit)
+            self._l.debug(f"Fetched {len(orders)} orders for '{symbol}' starting with '{fromId}'.")
+            if len(orders) == 0:
+                break
+            for o in orders:
+                if firstOpenId is None and o['status'] in [ 'NEW', 'PARTIALLY_FILLED' ]:
+                    firstOpenId = o['orderId']
+            page = [ order for order in (self._assembleOrder(o, filterRejectedExpired) for o in orders) if order is not None ]
+            yield page
+            fromId = orders[-1]['orderId'] + 1
+            self._saveCursor(cursorKey, firstOpenId if firstOpenId is not None else fromId)
+            if len(orders) < limit:
+                break
 
     def getOrder(self, symbol: str, orderId: int):
-        bOrder = self._client.get_order(symbol=symbol, orderId=orderId)
+        bOrder = self._request('get_order', symbol=symbol, orderId=orderId)
         self._l.debug(json.dumps(bOrder, indent=4, ensure_ascii=False))
         return self._assembleOrder(bOrder, filterRejectedExpired=False)
 
-    def isOrderPlaceable(self, symbol: str, tradeType: str, quantity: Decimal, price: Decimal):
+    def isOrderPlaceable(self, symbol: str, tradeType: str, quantity: Decimal, price: Decimal, openOrders: int = None):
         assert tradeType in [ "LIMIT_BUY", "LIMIT_SELL" ], f"Unknown tradeType '{tradeType}'"
-        # Check quoteVolume is the minimum required for placing a trade.
-        symbolInfo = self._getSymbolInfo(symbol)
-        minNotional = Decimal([ f['minNotional'] for f in symbolInfo['filters'] if f['filterType'] == "MIN_NOTIONAL" ][0])
-        self._l.debug(f"{minNotional} {quantity} {price} {quantity * price}")
-        if minNotional > price * quantity:
-            self._l.warning("Quote volume too small: " + str(price * quantity) + " < " + str(minNotional))
+        # Validate the order (as it will be quantized on placement) against the exchange filters locally.
+        filters = self._getSymbolFilters(symbol)
+        quantity = filters.quantizeQuantity(quantity)
+        price = filters.quantizePrice(price)
+        currentPrice = self.getCurrentPrice(symbol) if symbol in self._tradeSubscribers else None
+        violation = filters.validate(price, quantity, currentPrice=currentPrice, openOrders=openOrders)
+        if violation is not None:
+            self._l.warning(f"Order for '{symbol}' not placeable - {violation}")
             return False
+        if not self._paranoid:
+            return True
         return self.placeLimitBuyOrder(symbol, quantity, price, isTest=True) if tradeType == "LIMIT_BUY" else self.placeLimitSellOrder(symbol, quantity, price, isTest=True)
 
+    def quantizeOrder(self, symbol: str, quantity: Decimal, price: Decimal):
+        # Returns (quantity, price) rounded down to the step and tick size accepted by the exchange.
+        filters = self._getSymbolFilters(symbol)
+        return filters.quantizeQuantity(quantity), filters.quantizePrice(price)
+
     def placeLimitBuyOrder(self, symbol: str, quantity: Decimal, price: Decimal, isTest: bool = False):
         return self._placeLimitOrder(symbol=symbol, side=Client.SIDE_BUY, quantity=quantity, price=price, isTest=isTest)
 
@@ -109,42 +266,182 @@ class BinanceAPI:
         return self._placeLimitOrder(symbol=symbol, side=Client.SIDE_SELL, quantity=quantity, price=price, isTest=isTest)
 
     def cancelOrder(self, symbol: str, orderId: int):
-        bOrder = self._client.cancel_order(symbol=symbol, orderId=orderId)
+        bOrder = self._request('cancel_order', symbol=symbol, orderId=orderId)
         self._l.debug(json.dumps(bOrder, indent=2, ensure_ascii=False))
         return self._assembleOrder(bOrder, filterRejectedExpired=False)
 
-    def getTrades(self, symbol: str, fromId: int = None, limit: int = 500):
-        # TODO: Pagination!
-        if fromId is None:
-            trades = self._client.get_my_trades(symbol=symbol, limit=limit)
-        else:
-            trades = self._client.get_my_trades(symbol=symbol, fromId=fromId, limit=limit)
-        self._l.debug(json.dumps(trades, indent=4, ensure_ascii=False))
-        result = []
-        for t in trades:
-            # Assemble trade object.
-            trade = self._assembleTrade(t)
-            result.append(trade)
-        return result
+    def placeLimitOrders(self, orders: list):
+        """
+          Place limit orders concurrently in the REST pool, under the rate limiter.
+
+          'orders' is a list of tuples (symbol, side, quantity, price) with side Order.SIDE_BUY or
+          Order.SIDE_SELL. Returns one result per item, in order: the placed Order, or None if placing
+          the item failed. Must not be called from a REST pool thread.
+        """
+        return self._batch(self._placeBatchItem, orders)
+
+    def cancelOrders(self, orders: list):
+        """
+          Cancel orders concurrently in the REST pool, under the rate limiter.
+
+          'orders' is a list of tuples (symbol, orderId). Returns one result per item, in order: the
+          canceled Order, or None if canceling the item failed. Must not be called from a REST pool thread.
+        """
+        return self._batch(self._cancelBatchItem, orders)
+
+    def getTrades(self, symbol: str, fromId: int = None, limit: int = HISTORY_PAGE_LIMIT):
+        return list(self.iterTrades(symbol=symbol, fromId=fromId, limit=limit))
+
+    def iterTrades(self, symbol: str, fromId: int = None, limit: int = HISTORY_PAGE_LIMIT, cursorKey: str = None):
+        """
+          Lazily walk all trades starting with trade ID 'fromId' (complete history if None), page by page.
+
+          If 'cursorKey' is given, the walk resumes from the checkpoint stored in the datastore (if
+          it is ahead of 'fromId'), and the checkpoint is advanced after a page has been consumed.
+        """
+        fromId = self._resumeCursor(cursorKey, fromId if fromId is not None else 0)
+        while True:
+            trades = self._request('get_my_trades', symbol=symbol, fromId=fromId, limit=limit)
+            self._l.debug(f"Fetched {len(trades)} trades for '{symbol}' starting with '{fromId}'.")
+            for t in trades:
+                # Assemble trade object.
+                yield self._assembleTrade(t)
+            if len(trades) == 0:
+                break
+            fromId = trades[-1]['id'] + 1
+            self._saveCursor(cursorKey, fromId)
+            if len(trades) < limit:
+                break
+
+    def _batch(self, fn, items: list):
+        if len(items) <= 1:
+            return [ fn(*item) for item in items ]
+        futures = [ self._restPool.submit(fn, *item) for item in items ]
+        return [ f.result() for f in futures ]
+
+    def _placeBatchItem(self, symbol: str, side: str, quantity: Decimal, price: Decimal):
+        assert side in [ Order.SIDE_BUY, Order.SIDE_SELL ], f"Unknown side '{side}'"
+        try:
+            if side == Order.SIDE_BUY:
+                return self.placeLimitBuyOrder(symbol, quantity, price)
+            return self.placeLimitSellOrder(symbol, quantity, price)
+        except Exception:
+            self._l.exception(f"Placing {side} order for '{symbol}' - '{quantity}' at '{price}' failed.")
+            return None
+
+    def _cancelBatchItem(self, symbol: str, orderId: int):
+        try:
+            return self.cancelOrder(symbol, orderId)
+        except Exception:
+            self._l.exception(f"Canceling order '{orderId}' for '{symbol}' failed.")
+            return None
+
+    def _resumeCursor(self, cursorKey: str, fromId: int):
+        if cursorKey is None:
+            return fromId
+        cursor = msapp.datamapper.synccursorstore.load(cursorKey)
+        if cursor is None:
+            return fromId
+        if cursor > fromId:
+            self._l.info(f"Resuming '{cursorKey}' from checkpoint '{cursor}'.")
+            return cursor
+        return fromId
+
+    def _saveCursor(self, cursorKey: str, cursor: int):
+        if cursorKey is not None:
+            msapp.datamapper.synccursorstore.save(cursorKey, cursor)
+
+    def _request(self, endpoint: str, **params):
+        # Issue REST request, once the rate limiter grants the endpoint weight.
+        weight, priority, orders = BinanceAPI.ENDPOINTS[endpoint]
+        self._rateLimiter.acquire(weight, priority=priority, orders=orders)
+        return getattr(self._client, endpoint)(**params)
+
+    def refreshExchangeInfo(self, force: bool = True):
+        """
+          Fetch exchange info for all symbols with one request and publish it in the datastore for all
+          processes. Without 'force', the request is skipped if another process refreshed it recently.
+        """
+        store = msapp.datamapper.exchangeinfostore
+        if not force and store is not None:
+            meta = store.meta('binance')
+            if meta is not None and meta['fetched'] > (time.time() - BinanceAPI.EXCHANGE_INFO_REFRESH_INTERVAL) * 1000:
+                self._syncExchangeInfo(force=True)
+                return True
+        try:
+            exchangeInfo = self._request('get_exchange_info')
+            symbols = { s['symbol']: s for s in exchangeInfo['symbols'] }
+        except Exception:
+            self._l.exception("Fetching exchange info failed.")
+            return False
+        self._l.info(f"Fetched exchange info for {len(symbols)} symbols.")
+        if store is None:
+            # No datastore in this context, keep exchange info local to this process.
+            self._loadExchangeInfo(None, symbols)
+            return True
+        version = store.save('binance', symbols, ttl=BinanceAPI.EXCHANGE_INFO_TTL)
+        self._loadExchangeInfo(version, symbols)
+        return True
+
+    def _syncExchangeInfo(self, force: bool = False):
+        # Pick up exchange info published by other processes. Cheap unless the check interval elapsed.
+        now = time.monotonic()
+        if not force and self._symbolInfo and now - self._exchangeInfoChecked < BinanceAPI.EXCHANGE_INFO_CHECK_INTERVAL:
+            return
+        self._exchangeInfoChecked = now
+        store = msapp.datamapper.exchangeinfostore
+        if store is None:
+            if not self._symbolInfo:
+                self.refreshExchangeInfo()
+            return
+        meta = store.meta('binance')
+        if meta is None:
+            # Expired or never fetched.
+            self.refreshExchangeInfo()
+        elif meta['version'] != self._exchangeInfoVersion:
+            symbols = store.load('binance')
+            if symbols is None:
+                self.refreshExchangeInfo()
+            else:
+                self._loadExchangeInfo(meta['version'], symbols)
+
+    def _loadExchangeInfo(self, version: str, symbols: dict):
+        with self._exchangeInfoMutex:
+            if version is not None and version == self._exchangeInfoVersion:
+                return
+            self._l.info(f"Loaded exchange info version '{version}'.")
+            self._exchangeInfoVersion = version
+            self._symbolInfo = symbols
+            # Filters are compiled on demand per symbol.
+            self._symbolFilters = {}
 
     def _getSymbolInfo(self, symbol: str):
-        if symbol not in self._symbolInfo:
-            self._symbolInfo[symbol] = self._client.get_symbol_info(symbol)
-            self._l.debug(f"Fetched symbol info for '{symbol}': " + json.dumps(self._symbolInfo[symbol], indent=2, ensure_ascii=False))
-        return self._symbolInfo[symbol]
+        self._syncExchangeInfo()
+        symbolInfo = self._symbolInfo.get(symbol)
+        assert symbolInfo is not None, f"ERROR: Symbol '{symbol}' not found in exchange info."
+        return symbolInfo
+
+    def _getSymbolFilters(self, symbol: str):
+        self._syncExchangeInfo()
+        filters = self._symbolFilters.get(symbol)
+        if filters is None:
+            filters = SymbolFilters(self._getSymbolInfo(symbol))
+            self._symbolFilters[symbol] = filters
+        return filters
 
     def _placeLimitOrder(self, symbol: str, side: str, quantity: Decimal, price: Decimal, isTest: bool):
+        quantity, price = self.quantizeOrder(symbol, quantity, price)
         qty = str(quantity)
         prc = str(price)
         if isTest:
             try:
-                res = self._client.create_test_order(symbol=symbol, side=side, type=Client.ORDER_TYPE_LIMIT, timeInForce=Client.TIME_IN_FORCE_GTC, quantity=qty, price=prc)
+                res = self._request('create_test_order', symbol=symbol, side=side, type=Client.ORDER_TYPE_LIMIT, timeInForce=Client.TIME_IN_FORCE_GTC, quantity=qty, price=prc)
                 assert type(res) is dict and len(res) == 0, "ERROR: Placing test order failed."
             except Exception:
                 self._l.exception("Placing test order failed.")
                 return False
             return True
-        bOrder = self._client.create_order(symbol=symbol, side=side, type=Client.ORDER_TYPE_LIMIT, timeInForce=Client.TIME_IN_FORCE_GTC, quantity=qty, price=prc)
+        bOrder = self._request('create_order', symbol=symbol, side=side, type=Client.ORDER_TYPE_LIMIT, timeInForce=Client.TIME_IN_FORCE_GTC, quantity=qty, price=prc)
         self._l.info(f"Placed new order: {bOrder['orderId']}")
         order = self._assembleOrder(bOrder, filterRejectedExpired=True)
         assert order is not None, "ERROR: Placing or assembling order failed."
@@ -152,6 +449,18 @@ class BinanceAPI:
         return order
 
     def _assembleOrder(self, binanceOrder: dict, filterRejectedExpired: bool):
+        if 'orderId' not in binanceOrder:
+            # Execution report from user data stream, carries the complete order state.
+            binanceOrder = {
+                'orderId': binanceOrder['i'],
+                'symbol': binanceOrder['s'],
+                'status': binanceOrder['X'],
+                'time': binanceOrder['O'],
+                'side': binanceOrder['S'],
+                'price': binanceOrder['p'],
+                'origQty': binanceOrder['q'],
+                'executedQty': binanceOrder['z']
+            }
         # Remap order status.
         _osMap = {
             'NEW': Order.STATUS_NEW,
@@ -213,9 +522,42 @@ class BinanceAPI:
         assert trade is not None
         return trade
 
-    def _notifyERqueue(self, trade: Trade):
-        task = Task(trade.toDict())
-        self._execReportQueue.add(task.toDict())
+    def _notifyERqueue(self, trade: Trade, order: Order):
+        # Execution report event, 'trade' is None for order status changes without execution.
+        with self._execReportQueuesMutex:
+            consumed = order.symbol() in self._execReportSymbols
+        if consumed:
+            task = Task({ 'trade': trade.toDict() if trade is not None else None, 'order': order.toDict() })
+            self._execReportQueue(order.symbol()).add(task.toDict())
+        else:
+            # E.g. manual trading on the account, nobody would ever take it off the queue.
+            self._l.info(f"No strategy for '{order.symbol()}', execution report of order '{order.id()}' not queued.")
+        with self._execReportSubscribersMutex:
+            subscribers = list(self._execReportSubscribers)
+        for callback in subscribers:
+            try:
+                callback(trade, order)
+            except Exception:
+                self._l.exception("ERROR: Execution report subscriber failed.")
+
+    def _execReportQueue(self, symbol: str):
+        with self._execReportQueuesMutex:
+            queue = self._execReportQueues.get(symbol)
+            if queue is None:
+                queue = DurableTaskQueue(f"binance:execreports:{symbol}") if self._durableEvents else TaskQueue()
+                self._execReportQueues[symbol] = queue
+            return queue
+
+    @staticmethod
+    def _processStreamEvent(msg):
+        # Combined stream payload: {"stream": "btcusdt@trade", "data": {...}}, or a (un)subscribe response.
+        if 'data' in msg:
+            BinanceAPI._processEvent(msg['data'])
+        elif 'result' in msg:
+            if msg['result'] is not None:
+                logging.getLogger(__name__).warning(f"Unexpected trade stream response: {msg}")
+        else:
+            BinanceAPI._processEvent(msg)
 
     @staticmethod
     def _processEvent(msg):
@@ -248,16 +590,24 @@ class BinanceAPI:
         "m": true,
         "M": true
         '''
+        api = BinanceAPI._self
         symbol = msg['s']
+        with api._tradeSubscribersMutex:
+            subscribers = api._tradeSubscribers.get(symbol, None)
+            subscribers = list(subscribers) if subscribers else subscribers
+        if subscribers is None:
+            # Symbol has been removed, but events might be in flight until unsubscribe is confirmed.
+            return
         price = Decimal(msg['p'])
-        BinanceAPI._self._symbolCurrentPricesMutex.acquire()
         try:
-            BinanceAPI._self._symbolCurrentPrices[symbol] = price
+            api._priceBoard.update(symbol, price, msg['T'])
         except Exception:
-            _l = logging.getLogger(__name__)
-            _l.exception("ERROR: Initializing symbol price tracker.")
-        finally:
-            BinanceAPI._self._symbolCurrentPricesMutex.release()
+            api._l.exception("ERROR: Updating symbol price tracker.")
+        for callback in subscribers:
+            try:
+                callback(symbol, price, msg['T'])
+            except Exception:
+                api._l.exception(f"ERROR: Trade subscriber failed for '{symbol}'.")
 
     @staticmethod
     def _executionReportEvent(msg):
@@ -295,13 +645,17 @@ class BinanceAPI:
         "Y": "0.00000000"              // Last quote asset transacted quantity (i.e. lastPrice * lastQty),
         "Q": "0.00000000"              // Quote Order Qty
         '''
-        # Filter trade events only.
-        if not msg['x'] == "TRADE":
+        # Order snapshot from the report, so receivers don't have to fetch the order again.
+        if msg['x'] not in [ "NEW", "CANCELED", "REJECTED", "EXPIRED", "TRADE" ]:
+            logging.getLogger(__name__).warning(f"Unhandled execution type '{msg['x']}' for order '{msg['i']}'.")
             return
-        assert msg['t'] > 0, f"ERROR: Trade ID '{msg['t']}' is invalid."
-        # Assemble trade object.
-        trade = BinanceAPI._self._assembleTrade(msg)
-        BinanceAPI._self._notifyERqueue(trade)
+        order = BinanceAPI._self._assembleOrder(msg, filterRejectedExpired=False)
+        trade = None
+        if msg['x'] == "TRADE":
+            assert msg['t'] > 0, f"ERROR: Trade ID '{msg['t']}' is invalid."
+            # Assemble trade object.
+            trade = BinanceAPI._self._assembleTrade(msg)
+        BinanceAPI._self._notifyERqueue(trade, order)
 
 '''
   These are execution report examples.
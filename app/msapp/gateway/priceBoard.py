@@ -0,0 +1,152 @@
+import fcntl
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from multiprocessing import shared_memory
+from multiprocessing import resource_tracker
+
+class PriceBoard:
+    '''
+      Lock-free symbol price table in shared memory.
+
+      Every symbol owns a fixed slot (sequence, symbol, scaled price, timestamp). A single writer
+      per slot (the trade stream) bumps the sequence to an odd value, writes the slot and bumps it
+      to an even value again (seqlock). Readers in any process retry as long as the sequence is odd
+      or changed while reading, so neither side ever takes a lock or talks to a manager process.
+      Only slot registration is serialized across processes, by a lock file next to the segment.
+    '''
+    MAGIC = b'MKPB'
+    VERSION = 1
+    MAX_SYMBOLS = 64
+    # Binance delivers prices with 8 decimals, store them as scaled int64 to keep Decimal precision.
+    PRICE_EXPONENT = 8
+    READ_RETRIES = 1000
+
+    _HEADER = struct.Struct('<4sII')   # magic, version, number of slots
+    _SLOT = struct.Struct('<Q16sqq')   # sequence, symbol, scaled price, timestamp (ms)
+    _SEQ = struct.Struct('<Q')
+
+    @staticmethod
+    def attach(name: str):
+        # Attach to a price board created by another process.
+        return PriceBoard(name=name, create=False)
+
+    def __init__(self, name: str = None, create: bool = True, slots: int = MAX_SYMBOLS):
+        self._l = logging.getLogger(__name__)
+        self._owner = create
+        if create:
+            name = name if name is not None else f"msapp_prices_{os.getpid()}"
+            size = PriceBoard._HEADER.size + slots * PriceBoard._SLOT.size
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Left behind by a crashed process (e.g. same pid after a container restart).
+                self._l.warning(f"Removing stale price board '{name}'.")
+                stale = shared_memory.SharedMemory(name=name, create=False)
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            PriceBoard._HEADER.pack_into(self._shm.buf, 0, PriceBoard.MAGIC, PriceBoard.VERSION, slots)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name, create=False)
+            # Only the creator is allowed to unlink the segment, keep the resource tracker of this process out of it.
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+            magic, version, slots = PriceBoard._HEADER.unpack_from(self._shm.buf, 0)
+            assert magic == PriceBoard.MAGIC and version == PriceBoard.VERSION, f"ERROR: Shared memory '{name}' is not a price board."
+        self._slots = slots
+        self._index = {}
+        self._registerMutex = threading.Lock()
+        self._lockPath = os.path.join(tempfile.gettempdir(), f"{self._shm.name.lstrip('/')}.lock")
+
+    def name(self):
+        return self._shm.name
+
+    def register(self, symbol: str):
+        # Reserve a slot for symbol, if not done yet. Returns the slot number.
+        encoded = symbol.encode('ascii')
+        assert 0 < len(encoded) <= 16, f"ERROR: Symbol name '{symbol}' does not fit into price board slot."
+        with self._registerMutex, open(self._lockPath, 'a') as lock:
+            # Slots are claimed by any process attached to the board, serialize claims across processes.
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            slot = self._findSlot(symbol)
+            if slot is not None:
+                return slot
+            for slot in range(self._slots):
+                offset = self._offset(slot)
+                if self._shm.buf[offset + 8] == 0:
+                    PriceBoard._SLOT.pack_into(self._shm.buf, offset, 0, encoded, 0, 0)
+                    self._index[symbol] = slot
+                    return slot
+        raise Exception(f"ERROR: Price board is full, no slot left for '{symbol}'.")
+
+    def symbols(self):
+        self._rebuildIndex()
+        return list(self._index.keys())
+
+    def update(self, symbol: str, price: Decimal, timestamp: int = None):
+        slot = self._index.get(symbol)
+        if slot is None:
+            slot = self.register(symbol)
+        offset = self._offset(slot)
+        buf = self._shm.buf
+        seq = PriceBoard._SEQ.unpack_from(buf, offset)[0]
+        timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+        PriceBoard._SEQ.pack_into(buf, offset, seq + 1)
+        PriceBoard._SLOT.pack_into(buf, offset, seq + 1, symbol.encode('ascii'), int(price.scaleb(PriceBoard.PRICE_EXPONENT)), timestamp)
+        PriceBoard._SEQ.pack_into(buf, offset, seq + 2)
+
+    def read(self, symbol: str):
+        # Returns tuple (price, timestamp), or (None, None) if no price has been published yet.
+        slot = self._findSlot(symbol)
+        if slot is None:
+            self._l.error(f"ERROR: Symbol not found {symbol}.")
+            return None, None
+        offset = self._offset(slot)
+        buf = self._shm.buf
+        for _ in range(PriceBoard.READ_RETRIES):
+            seq1, _, scaledPrice, timestamp = PriceBoard._SLOT.unpack_from(buf, offset)
+            if seq1 & 1:
+                # Writer is in the middle of an update.
+                continue
+            seq2 = PriceBoard._SEQ.unpack_from(buf, offset)[0]
+            if seq1 != seq2:
+                continue
+            if seq1 == 0:
+                return None, None
+            return Decimal(scaledPrice).scaleb(-PriceBoard.PRICE_EXPONENT), timestamp
+        self._l.error(f"ERROR: Reading price for '{symbol}' did not settle after {PriceBoard.READ_RETRIES} retries.")
+        return None, None
+
+    def price(self, symbol: str):
+        return self.read(symbol)[0]
+
+    def close(self):
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            try:
+                os.remove(self._lockPath)
+            except FileNotFoundError:
+                pass
+
+    def _offset(self, slot: int):
+        return PriceBoard._HEADER.size + slot * PriceBoard._SLOT.size
+
+    def _findSlot(self, symbol: str):
+        slot = self._index.get(symbol)
+        if slot is None:
+            # Slot might have been registered by another process meanwhile.
+            self._rebuildIndex()
+            slot = self._index.get(symbol)
+        return slot
+
+    def _rebuildIndex(self):
+        for slot in range(self._slots):
+            offset = self._offset(slot)
+            raw = bytes(self._shm.buf[offset + 8:offset + 24]).rstrip(b'\x00')
+            if raw:
+                self._index[raw.decode('ascii')] = slot
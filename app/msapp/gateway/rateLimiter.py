@@ -0,0 +1,144 @@
+import logging
+import heapq
+import itertools
+import threading
+import time
+
+class _TokenBucket:
+    def __init__(self, limit: int, interval: float):
+        self.limit = limit
+        self.interval = interval
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.interval)
+        self.updated = now
+
+    def used(self):
+        return self.limit - self.tokens
+
+    def delay(self, amount: float, reserve: float):
+        # Seconds until 'amount' tokens are available, while keeping 'reserve' tokens untouched.
+        missing = amount + reserve - self.tokens
+        return 0 if missing <= 0 else missing * self.interval / self.limit
+
+class RateLimiter:
+    '''
+      Client side request weight and order rate limiter (token buckets).
+
+      Callers wait in priority order: a request only takes tokens if no request of higher priority
+      (or same priority, queued earlier) is waiting. Lower priorities also leave a share of the
+      weight budget to higher priorities. The buckets are corrected with the used weight and order
+      count reported by the exchange, and all requests are held back after a 429/418 response.
+
+      Processes sharing the exchange limits (strategy shards) get an equal share of the budget each,
+      the usage reported by the exchange is always checked against the full limits.
+    '''
+    PRIORITY_ORDER = 0   # Order placement and cancels.
+    PRIORITY_QUERY = 1   # Lookups on the trading path.
+    PRIORITY_SYNC = 2    # History synchronization.
+
+    # Share of the weight budget a priority class has to leave to higher priorities.
+    RESERVE = {
+        PRIORITY_ORDER: 0.0,
+        PRIORITY_QUERY: 0.1,
+        PRIORITY_SYNC: 0.3
+    }
+    # Default back-off, if a 429/418 response does not carry a Retry-After header.
+    DEFAULT_RETRY_AFTER = 60
+
+    def __init__(self, weightPerMinute: int = 1200, ordersPer10s: int = 100, ordersPerDay: int = 200000, processes: int = 1):
+        self._l = logging.getLogger(__name__)
+        self._cond = threading.Condition()
+        self._limits = (weightPerMinute, ordersPer10s, ordersPerDay)
+        self._processes = 1
+        self._weight = _TokenBucket(weightPerMinute, 60)
+        self._orders = _TokenBucket(ordersPer10s, 10)
+        self._ordersDaily = _TokenBucket(ordersPerDay, 86400)
+        self.share(processes)
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._blockedUntil = 0
+
+    def acquire(self, weight: int, priority: int = PRIORITY_QUERY, orders: int = 0):
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    delay = None
+                    if self._waiters[0] == ticket:
+                        delay = self._reserve(weight, priority, orders)
+                        if delay == 0:
+                            return
+                    self._cond.wait(delay)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def share(self, processes: int):
+        # Limit this process to its share of the budget, if 'processes' processes use the same exchange limits.
+        assert processes > 0, "ERROR: Number of processes sharing the rate limits must be positive."
+        with self._cond:
+            now = time.monotonic()
+            self._processes = processes
+            for bucket, limit in zip([ self._weight, self._orders, self._ordersDaily ], self._limits):
+                bucket.refill(now)
+                bucket.limit = limit / processes
+                bucket.tokens = min(bucket.tokens, bucket.limit)
+            self._cond.notify_all()
+
+    def onResponse(self, response, *args, **kwargs):
+        # Hook for 'requests' responses, syncs the buckets with the usage reported by the exchange.
+        headers = response.headers
+        with self._cond:
+            now = time.monotonic()
+            usedWeight = headers.get('X-MBX-USED-WEIGHT-1M', headers.get('X-MBX-USED-WEIGHT'))
+            if usedWeight is not None:
+                self._weight.refill(now)
+                self._weight.tokens = min(self._weight.tokens, self._limits[0] - int(usedWeight))
+            orderCount = headers.get('X-MBX-ORDER-COUNT-10S')
+            if orderCount is not None:
+                self._orders.refill(now)
+                self._orders.tokens = min(self._orders.tokens, self._limits[1] - int(orderCount))
+            if response.status_code in [ 418, 429 ]:
+                retryAfter = int(headers.get('Retry-After', RateLimiter.DEFAULT_RETRY_AFTER))
+                self._blockedUntil = max(self._blockedUntil, now + retryAfter)
+                self._l.error(f"Exchange rate limit hit (HTTP {response.status_code}), holding back requests for {retryAfter} seconds.")
+            self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            now = time.monotonic()
+            for bucket in [ self._weight, self._orders, self._ordersDaily ]:
+                bucket.refill(now)
+            return {
+                'WeightUsed': round(self._weight.used()),
+                'WeightLimit': round(self._weight.limit),
+                'WeightUtilisation': round(self._weight.used() / self._weight.limit, 3),
+                'Orders10sUsed': round(self._orders.used()),
+                'Orders10sLimit': round(self._orders.limit),
+                'OrdersDailyUsed': round(self._ordersDaily.used()),
+                'Waiting': len(self._waiters),
+                'Processes': self._processes,
+                'BlockedFor': round(max(0, self._blockedUntil - now), 1)
+            }
+
+    def _reserve(self, weight: int, priority: int, orders: int):
+        # Take tokens, if available. Otherwise return the seconds to wait.
+        now = time.monotonic()
+        if self._blockedUntil > now:
+            return self._blockedUntil - now
+        for bucket in [ self._weight, self._orders, self._ordersDaily ]:
+            bucket.refill(now)
+        delay = self._weight.delay(weight, RateLimiter.RESERVE.get(priority, 0) * self._weight.limit)
+        if orders:
+            delay = max(delay, self._orders.delay(orders, 0), self._ordersDaily.delay(orders, 0))
+        if delay > 0:
+            return delay
+        self._weight.tokens -= weight
+        self._orders.tokens -= orders
+        self._ordersDaily.tokens -= orders
+        return 0
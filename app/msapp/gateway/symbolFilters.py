@@ -0,0 +1,73 @@
+import logging
+from decimal import Decimal
+from decimal import ROUND_DOWN
+
+class SymbolFilters:
+    '''
+      Local pre-trade validation, built from the exchange symbol info.
+
+      Supported filters: PRICE_FILTER, LOT_SIZE, MIN_NOTIONAL, PERCENT_PRICE and MAX_NUM_ORDERS.
+      Limits that are not defined for a symbol (or set to zero by the exchange) are not checked.
+    '''
+    def __init__(self, symbolInfo: dict):
+        self._l = logging.getLogger(__name__)
+        self._symbol = symbolInfo['symbol']
+        filters = { f['filterType']: f for f in symbolInfo['filters'] }
+        priceFilter = filters.get('PRICE_FILTER', {})
+        self._minPrice = self._decimal(priceFilter.get('minPrice'))
+        self._maxPrice = self._decimal(priceFilter.get('maxPrice'))
+        self._tickSize = self._decimal(priceFilter.get('tickSize'))
+        lotSize = filters.get('LOT_SIZE', {})
+        self._minQty = self._decimal(lotSize.get('minQty'))
+        self._maxQty = self._decimal(lotSize.get('maxQty'))
+        self._stepSize = self._decimal(lotSize.get('stepSize'))
+        minNotional = filters.get('MIN_NOTIONAL', {})
+        self._minNotional = self._decimal(minNotional.get('minNotional'))
+        percentPrice = filters.get('PERCENT_PRICE', {})
+        self._multiplierUp = self._decimal(percentPrice.get('multiplierUp'))
+        self._multiplierDown = self._decimal(percentPrice.get('multiplierDown'))
+        maxNumOrders = filters.get('MAX_NUM_ORDERS', {})
+        self._maxNumOrders = int(maxNumOrders.get('maxNumOrders', 0))
+
+    def symbol(self):
+        return self._symbol
+
+    def quantizePrice(self, price: Decimal):
+        return self._quantize(price, self._tickSize)
+
+    def quantizeQuantity(self, quantity: Decimal):
+        return self._quantize(quantity, self._stepSize)
+
+    def validate(self, price: Decimal, quantity: Decimal, currentPrice: Decimal = None, openOrders: int = None):
+        # Returns the reason why the order would be rejected by the exchange, or None if it passes all filters.
+        if self._minPrice and price < self._minPrice:
+            return f"PRICE_FILTER: Price {price} below minimum {self._minPrice}."
+        if self._maxPrice and price > self._maxPrice:
+            return f"PRICE_FILTER: Price {price} above maximum {self._maxPrice}."
+        if self._tickSize and self.quantizePrice(price) != price:
+            return f"PRICE_FILTER: Price {price} does not match tick size {self._tickSize}."
+        if self._minQty and quantity < self._minQty:
+            return f"LOT_SIZE: Quantity {quantity} below minimum {self._minQty}."
+        if self._maxQty and quantity > self._maxQty:
+            return f"LOT_SIZE: Quantity {quantity} above maximum {self._maxQty}."
+        if self._stepSize and self.quantizeQuantity(quantity) != quantity:
+            return f"LOT_SIZE: Quantity {quantity} does not match step size {self._stepSize}."
+        if self._minNotional and price * quantity < self._minNotional:
+            return f"MIN_NOTIONAL: Quote volume too small: {price * quantity} < {self._minNotional}."
+        if currentPrice is not None and self._multiplierUp and price > currentPrice * self._multiplierUp:
+            return f"PERCENT_PRICE: Price {price} too far above current price {currentPrice}."
+        if currentPrice is not None and self._multiplierDown and price < currentPrice * self._multiplierDown:
+            return f"PERCENT_PRICE: Price {price} too far below current price {currentPrice}."
+        if openOrders is not None and self._maxNumOrders and openOrders >= self._maxNumOrders:
+            return f"MAX_NUM_ORDERS: {openOrders} open orders, maximum is {self._maxNumOrders}."
+        return None
+
+    def _quantize(self, value: Decimal, step: Decimal):
+        if not step:
+            return value
+        # Quantize to the precision of the step, but never into exponent notation (e.g. step 10 -> '1E+1').
+        exponent = step.normalize() if step.normalize().as_tuple().exponent < 0 else Decimal('1')
+        return ((value / step).to_integral_value(rounding=ROUND_DOWN) * step).quantize(exponent)
+
+    def _decimal(self, value):
+        return Decimal(value) if value is not None else Decimal('0')
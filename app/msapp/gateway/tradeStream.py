@@ -0,0 +1,113 @@
+import logging
+import threading
+import simplejson as json
+from binance.websockets import BinanceClientFactory
+from binance.websockets import BinanceClientProtocol
+from autobahn.twisted.websocket import connectWS
+from twisted.internet import reactor
+from twisted.internet import ssl
+
+class _CombinedStreamProtocol(BinanceClientProtocol):
+    def onOpen(self):
+        self.factory.combinedStream._opened(self)
+
+    def onClose(self, wasClean, code, reason):
+        self.factory.combinedStream._closed(self)
+        super().onClose(wasClean, code, reason)
+
+class CombinedTradeStream:
+    '''
+      One multiplexed websocket connection for the trade streams of many symbols.
+
+      Symbols are (un)subscribed at runtime with SUBSCRIBE/UNSUBSCRIBE requests on the live
+      connection, so other symbols are not reconnected. After a reconnect, the current symbol set
+      is subscribed again.
+    '''
+    STREAM_SUFFIX = '@trade'
+
+    def __init__(self, socketManager, callback):
+        self._l = logging.getLogger(__name__)
+        self._bm = socketManager
+        self._callback = callback
+        self._mutex = threading.Lock()
+        self._symbols = set()
+        self._connectedStreams = set()
+        self._protocol = None
+        self._connKey = None
+        self._requestId = 0
+
+    def connKey(self):
+        return self._connKey
+
+    def symbols(self):
+        with self._mutex:
+            return set(self._symbols)
+
+    def add(self, symbol: str):
+        with self._mutex:
+            if symbol in self._symbols:
+                return False
+            self._symbols.add(symbol)
+            if self._connKey is None:
+                self._connect()
+                return True
+        self._send('SUBSCRIBE', [ symbol ])
+        return True
+
+    def remove(self, symbol: str):
+        with self._mutex:
+            if symbol not in self._symbols:
+                return False
+            self._symbols.discard(symbol)
+        self._send('UNSUBSCRIBE', [ symbol ])
+        return True
+
+    def stop(self):
+        with self._mutex:
+            if self._connKey is not None:
+                self._bm.stop_socket(self._connKey)
+            self._connKey = None
+            self._protocol = None
+
+    def _connect(self):
+        # Mirrors BinanceSocketManager._start_socket, but with a protocol that tracks the live connection.
+        self._connectedStreams = set(self._symbols)
+        path = 'streams=' + '/'.join(sorted(self._stream(s) for s in self._symbols))
+        factory = BinanceClientFactory(self._bm.STREAM_URL + 'stream?' + path)
+        factory.protocol = _CombinedStreamProtocol
+        factory.callback = self._callback
+        factory.reconnect = True
+        factory.combinedStream = self
+        self._bm._conns[path] = connectWS(factory, ssl.ClientContextFactory())
+        self._connKey = path
+
+    def _opened(self, protocol):
+        with self._mutex:
+            self._protocol = protocol
+            # Streams from the connect URL are subscribed implicitly, re-sync the current symbol set.
+            subscribe = [ s for s in self._symbols ]
+            unsubscribe = [ s for s in self._connectedStreams if s not in self._symbols ]
+        self._l.info(f"Combined trade stream connected for {len(subscribe)} symbols.")
+        if subscribe:
+            self._send('SUBSCRIBE', subscribe)
+        if unsubscribe:
+            self._send('UNSUBSCRIBE', unsubscribe)
+
+    def _closed(self, protocol):
+        with self._mutex:
+            if self._protocol is protocol:
+                self._protocol = None
+
+    def _send(self, method: str, symbols: list):
+        with self._mutex:
+            protocol = self._protocol
+            self._requestId += 1
+            requestId = self._requestId
+        if protocol is None:
+            # Not connected (yet), the symbol set is synced on connect.
+            return
+        payload = json.dumps({'method': method, 'params': [ self._stream(s) for s in symbols ], 'id': requestId})
+        reactor.callFromThread(protocol.sendMessage, payload.encode('utf-8'))
+
+    def _stream(self, symbol: str):
+        return symbol.lower() + CombinedTradeStream.STREAM_SUFFIX
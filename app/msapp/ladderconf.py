@@ -1,7 +1,6 @@
 from decimal import Decimal
-import simplejson as json
-import redis
 
+import msapp.datamapper
 from msapp.datamapper import initDatastores
 from msapp.domain.repository import Position
 
@@ -40,10 +39,9 @@ def createPositions():
 
 if __name__ == '__main__':
     posIds = createPositions()
-    r = redis.Redis('redis')
     cryptoconf = {
         'strategy': "LadderTradingStrategy",
         'symbol': "BTCUSDT",
         'positions': posIds
     }
-    r.set("binance_BTCUSDT_ladder", json.dumps(cryptoconf))
+    msapp.datamapper.tradingconfig.save("binance_BTCUSDT_ladder", cryptoconf)
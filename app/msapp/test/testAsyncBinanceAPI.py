@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+
+from msapp.domain import Order
+from msapp.gateway.asyncBinanceApi import AsyncBinanceAPI
+
+@attr('asyncbinance')
+class TestAsyncBinanceAPI(unittest.TestCase):
+    '''
+      AsyncBinanceAPI on a mocked BinanceAPI, REST calls run in a real thread pool.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        self._api = mock.Mock()
+        self._api.restPool.return_value = self._pool
+
+    def tearDown(self):
+        self._pool.shutdown(wait=True)
+
+    @attr('asyncbinance_getorders')
+    def test_getorders(self):
+        # All requests have to be in flight at the same time to pass the barrier.
+        barrier = threading.Barrier(3, timeout=5)
+        def _getOrder(symbol, orderId):
+            barrier.wait()
+            # Later orders complete first.
+            time.sleep(0.01 * (3 - orderId))
+            return (symbol, orderId)
+        self._api.getOrder.side_effect = _getOrder
+        orders = asyncio.run(AsyncBinanceAPI(self._api).getOrders("BTCUSDT", [ 0, 1, 2 ]))
+        self.assertEqual(orders, [ ("BTCUSDT", 0), ("BTCUSDT", 1), ("BTCUSDT", 2) ], "Results must be in order of the requested ids.")
+
+    @attr('asyncbinance_trades')
+    def test_trades(self):
+        callbacks = []
+        self._api.subscribeTrades.side_effect = lambda symbol, callback: callbacks.append(callback)
+        async def _consume():
+            trades = AsyncBinanceAPI(self._api).trades("BTCUSDT")
+            first = asyncio.ensure_future(trades.__anext__())
+            while not callbacks:
+                await asyncio.sleep(0.001)
+            # Stream thread delivers the tick.
+            threading.Thread(target=callbacks[0], args=("BTCUSDT", Decimal("6668.07"), 1585157254418)).start()
+            tick = await asyncio.wait_for(first, 5)
+            await trades.aclose()
+            return tick
+        self.assertEqual(asyncio.run(_consume()), ("BTCUSDT", Decimal("6668.07"), 1585157254418))
+        self._api.unsubscribeTrades.assert_called_once_with("BTCUSDT", callbacks[0])
+
+    @attr('asyncbinance_placeorders')
+    def test_placeorders(self):
+        self._api.placeLimitBuyOrder.side_effect = lambda symbol, quantity, price: (symbol, Order.SIDE_BUY, price)
+        self._api.placeLimitSellOrder.side_effect = Exception("Mocked API error.")
+        self._api.cancelOrder.side_effect = lambda symbol, orderId: (symbol, orderId)
+        api = AsyncBinanceAPI(self._api)
+        placed = asyncio.run(api.placeLimitOrders([ ("BTCUSDT", Order.SIDE_BUY, Decimal("0.001"), Decimal("9000")),
+                                                    ("BTCUSDT", Order.SIDE_SELL, Decimal("0.001"), Decimal("9500")) ]))
+        # A failing item does not fail the batch.
+        self.assertEqual(placed, [ ("BTCUSDT", Order.SIDE_BUY, Decimal("9000")), None ])
+        self.assertEqual(asyncio.run(api.cancelOrders([ ("BTCUSDT", 1), ("BTCUSDT", 2) ])), [ ("BTCUSDT", 1), ("BTCUSDT", 2) ])
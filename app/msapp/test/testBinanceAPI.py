@@ -3,8 +3,10 @@ import unittest
 from nose.plugins.attrib import attr
 from decimal import Decimal
 import simplejson as json
+from unittest import mock
 
 import msapp.gateway
+import msapp.gateway.binanceApi
 from msapp.domain import Order
 
 @attr('binance')
@@ -83,6 +85,30 @@ class TestBinanceAPI(unittest.TestCase):
         self.assertTrue(msapp.gateway.binanceAPI.isOrderPlaceable(symbol="BTCUSDT", tradeType="LIMIT_SELL", quantity=Decimal('0.003334'), price=Decimal('3000.0')))
         self.assertFalse(msapp.gateway.binanceAPI.isOrderPlaceable(symbol="BTCUSDT", tradeType="LIMIT_SELL", quantity=Decimal('0.003333'), price=Decimal('3000.0')))
 
+    @attr('binance_placeorders')
+    @mock.patch.object(msapp.gateway.binanceApi.BinanceAPI, 'placeLimitSellOrder')
+    @mock.patch.object(msapp.gateway.binanceApi.BinanceAPI, 'placeLimitBuyOrder')
+    def test_placeorders(self, mock_placeLimitBuyOrder, mock_placeLimitSellOrder):
+        def plo(side):
+            def _plo(symbol, quantity, price):
+                if price < Decimal('1000'):
+                    raise Exception("Mocked API error.")
+                return Order(int(price), symbol=symbol, status=Order.STATUS_NEW, side=side, price=price, origQuantity=quantity)
+            return _plo
+        mock_placeLimitBuyOrder.side_effect = plo(Order.SIDE_BUY)
+        mock_placeLimitSellOrder.side_effect = plo(Order.SIDE_SELL)
+        orders = msapp.gateway.binanceAPI.placeLimitOrders([
+            ("BTCUSDT", Order.SIDE_BUY, Decimal('0.004'), Decimal('3000')),
+            ("BTCUSDT", Order.SIDE_BUY, Decimal('0.004'), Decimal('500')),
+            ("BTCUSDT", Order.SIDE_SELL, Decimal('0.004'), Decimal('4000'))
+        ])
+        self.assertEqual(len(orders), 3)
+        self.assertEqual(orders[0].toDict()['orderId'], 3000)
+        self.assertEqual(orders[0].toDict()['side'], Order.SIDE_BUY)
+        self.assertIsNone(orders[1], "Failed item should not fail the batch.")
+        self.assertEqual(orders[2].toDict()['orderId'], 4000)
+        self.assertEqual(orders[2].toDict()['side'], Order.SIDE_SELL)
+
     @attr('binance_placeorder')
     def test_placeorder(self):
         assert False, "Place real orders on the exchange! Disable this line to apply the test."
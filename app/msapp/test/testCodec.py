@@ -0,0 +1,61 @@
+import logging
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from nose.plugins.attrib import attr
+from decimal import Decimal
+
+from msapp.datamapper.codec import JsonCodec
+from msapp.datamapper.codec import MsgpackCodec
+
+@attr('codec')
+class TestCodec(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def _trade(self):
+        return {
+            'tradeId': 241853011,
+            'orderId': 1771433210,
+            'symbol': "BTCUSDT",
+            'timestamp': 1585855462553,
+            'side': "BUY",
+            'price': Decimal("6668.07000000"),
+            'quantity': Decimal("0.00300000"),
+            'quoteQuantity': Decimal("20.00421000"),
+            'commissionAmount': Decimal("0E-8"),
+            'commissionAsset': "BNB",
+            'position': { 'high': { 'sellLimit': Decimal("-1.5") } },
+            'orders': [ -2, -3 ]
+        }
+
+    @attr('codec_msgpack')
+    def test_msgpack(self):
+        codec = MsgpackCodec()
+        raw = codec.encode(self._trade())
+        self.assertTrue(raw.startswith(MsgpackCodec.HEADER))
+        data = codec.decode(raw)
+        self.assertDictEqual(data, self._trade())
+        # Decimal representation (precision) is kept exactly.
+        self.assertEqual(str(data['quantity']), "0.00300000")
+        self.assertEqual(str(data['commissionAmount']), "0E-8")
+        for value in [ Decimal("-0"), Decimal("NaN"), Decimal("1234567890.1234567890123"), Decimal("1E+3") ]:
+            self.assertEqual(str(codec.decode(codec.encode({ 'v': value }))['v']), str(value))
+
+    @attr('codec_legacy')
+    def test_legacy(self):
+        # JSON records written before still load.
+        raw = JsonCodec().encode(self._trade())
+        data = MsgpackCodec().decode(raw.encode('utf-8'))
+        self.assertDictEqual(data, self._trade())
+        self.assertEqual(str(data['price']), "6668.07000000")
+        self.assertDictEqual(MsgpackCodec().decode(raw), self._trade())
+
+    @attr('codec_threads')
+    def test_threads(self):
+        # One codec is shared by the stores and used from several threads.
+        codec = MsgpackCodec()
+        records = [ dict(self._trade(), tradeId=i, orders=list(range(i % 50))) for i in range(2000) ]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            encoded = list(pool.map(codec.encode, records))
+        self.assertEqual([ codec.decode(raw) for raw in encoded ], records)
@@ -1,5 +1,6 @@
 import logging
 import unittest
+from unittest import mock
 from nose.plugins.attrib import attr
 
 from msapp.domain.repository import Position
@@ -19,14 +20,14 @@ class TestDatastore(unittest.TestCase):
     def test_orderstore(self):
         o = Order("_testDatastore_1")
         msapp.datamapper.orderstore.save(o)
-        on = msapp.datamapper.orderstore.load(o.id())
+        on = msapp.datamapper.orderstore.load(o.symbol(), o.id())
         self.assertDictEqual(o.toDict(), on.toDict(), "Orderstore data corrupted.")
 
     @attr('datastore_tradestore')
     def test_tradestore(self):
         o = Trade("_testDatastore_1")
         msapp.datamapper.tradestore.save(o)
-        on = msapp.datamapper.tradestore.load(o.id())
+        on = msapp.datamapper.tradestore.load(o.symbol(), o.id())
         self.assertDictEqual(o.toDict(), on.toDict(), "Tradestore data corrupted.")
 
     @attr('datastore_position')
@@ -35,3 +36,123 @@ class TestDatastore(unittest.TestCase):
         msapp.datamapper.positionstore.save(o)
         on = msapp.datamapper.positionstore.load(o.id())
         self.assertDictEqual(o.toDict(), on.toDict(), "Positionstore data corrupted.")
+
+    @attr('datastore_unitofwork')
+    def test_unitofwork(self):
+        o = Order("_testDatastore_uow_1", status=Order.STATUS_NEW)
+        t = Trade("_testDatastore_uow_1", orderId=o.id())
+        with msapp.datamapper.session() as uow:
+            uow.add(o, t)
+            o.setStatus(Order.STATUS_FILLED)
+            # Added twice, written once with the state at flush time.
+            uow.add(o)
+            self.assertEqual(len(uow), 2)
+        self.assertEqual(msapp.datamapper.orderstore.load(o.symbol(), o.id()).status(), Order.STATUS_FILLED)
+        self.assertDictEqual(t.toDict(), msapp.datamapper.tradestore.load(t.symbol(), t.id()).toDict(), "Tradestore data corrupted.")
+        # Nothing is written, if the unit of work fails.
+        o2 = Order("_testDatastore_uow_2")
+        try:
+            with msapp.datamapper.session() as uow:
+                uow.add(o2)
+                raise Exception("Abort unit of work.")
+        except Exception:
+            pass
+        self.assertIsNone(msapp.datamapper.orderstore.load(o2.symbol(), o2.id()))
+
+    @attr('datastore_loadmany')
+    def test_loadmany(self):
+        o1 = Order("_testDatastore_many_1", status=Order.STATUS_FILLED)
+        o2 = Order("_testDatastore_many_2", status=Order.STATUS_NEW)
+        p = Position("_testDatastore_many_1")
+        p.assignOrder(o1)
+        p.assignOrder(o2)
+        msapp.datamapper.saveAll([ o1, o2, p ])
+        orders = msapp.datamapper.orderstore.loadMany(None, [ o1.id(), "_testDatastore_unknown", o2.id() ])
+        self.assertDictEqual(orders[0].toDict(), o1.toDict())
+        self.assertIsNone(orders[1])
+        self.assertDictEqual(orders[2].toDict(), o2.toDict())
+        pn = msapp.datamapper.positionstore.loadMany([ p.id() ])[0]
+        self.assertDictEqual(p.toDictWithFullOrders(), pn.toDictWithFullOrders(), "Position orders not hydrated.")
+        self.assertEqual([ o.id() for o in pn.openOrders() ], [ o2.id() ])
+
+    @attr('datastore_closedorders')
+    def test_closedorders(self):
+        orders = [ Order(f"_testDatastore_closed_{i}", status=Order.STATUS_FILLED, timestamp=1000 + i) for i in range(3) ]
+        p1 = Position("_testDatastore_closed_1")
+        p2 = Position("_testDatastore_closed_2")
+        for o in orders:
+            p1.assignOrder(o)
+        msapp.datamapper.saveAll(orders + [ p1, p2 ])
+        self.assertEqual(len(p1.archiveClosedOrders()), 3)
+        # Archived orders stay pending, if the unit of work fails to execute.
+        with mock.patch.object(msapp.datamapper.kvstore, 'batch') as batch:
+            batch.return_value.execute.side_effect = Exception("Datastore unavailable.")
+            with self.assertRaises(Exception):
+                msapp.datamapper.saveAll([ p1 ])
+        self.assertEqual(len(p1.archivedOrders()), 3)
+        self.assertEqual(msapp.datamapper.positionstore.countClosedOrders(p1.id()), 0)
+        msapp.datamapper.saveAll([ p1 ])
+        self.assertEqual(p1.archivedOrders(), [])
+        self.assertEqual(msapp.datamapper.positionstore.countClosedOrders(p1.id()), 3)
+        # Latest closed orders of all positions, oldest first.
+        closed = msapp.datamapper.positionstore.loadLatestClosedOrders([ p1, p2 ], 2)
+        self.assertEqual([ [ o.id() for o in c ] for c in closed ], [ [ orders[1].id(), orders[2].id() ], [] ])
+        self.assertEqual(msapp.datamapper.positionstore.loadLatestClosedOrders([ p1 ], 0), [ [] ])
+        self.assertEqual(p1.toDictWithFullOrders(closed[0])['closedOrders'], [ orders[1].toDict(), orders[2].toDict() ])
+
+    @attr('datastore_tradeindex')
+    def test_tradeindex(self):
+        symbol = "_TESTDATASTORE"
+        trades = [ Trade(tid, orderId=1, symbol=symbol, timestamp=1000 + tid) for tid in [ 5, 3, 9, 7 ] ]
+        msapp.datamapper.saveAll(trades)
+        self.assertEqual(msapp.datamapper.tradestore.maxTradeId(symbol), 9)
+        self.assertIsNone(msapp.datamapper.tradestore.maxTradeId("_TESTDATASTORE_UNKNOWN"))
+        self.assertTrue(msapp.datamapper.tradestore.exists(symbol, 7))
+        self.assertEqual([ t.id() for t in msapp.datamapper.tradestore.loadRange(symbol, fromId=4, toId=8) ], [ 5, 7 ])
+        self.assertEqual([ t.id() for t in msapp.datamapper.tradestore.loadByTime(symbol, since=1004) ], [ 5, 7, 9 ])
+        self.assertEqual([ t.id() for t in msapp.datamapper.tradestore.loadLatest(symbol, 2) ], [ 7, 9 ])
+        self.assertEqual([ t.id() for t in msapp.datamapper.tradestore.iterTrades(symbol, pageSize=3) ], [ 3, 5, 7, 9 ])
+
+    @attr('datastore_hashscan')
+    def test_hashscan(self):
+        kvstore = msapp.datamapper.kvstore
+        for i in range(25):
+            kvstore.hashSet('_testDatastore_scan', f"{i:03d}", f"v{i}")
+        data = kvstore.hashGetAll('_testDatastore_scan')
+        self.assertEqual(len(data), 25)
+        self.assertIn((b"007", b"v7"), data)
+        self.assertEqual(sorted(kvstore.hashScan('_testDatastore_scan', count=5)), sorted(data))
+        self.assertEqual(sorted(k for k, _ in kvstore.hashScan('_testDatastore_scan', match="02*")), [ b"020", b"021", b"022", b"023", b"024" ])
+
+    @attr('datastore_remove')
+    def test_remove(self):
+        kvstore = msapp.datamapper.kvstore
+        kvstore.sortedSetAdd('_testDatastore_remove', { "1": 1, "2": 2 })
+        kvstore.hashSet('_testDatastore_removeh', "1", "v1")
+        batch = kvstore.batch()
+        batch.sortedSetRemove('_testDatastore_remove', [ "1", "3" ])
+        batch.hashDelete('_testDatastore_removeh', [ "1" ])
+        self.assertEqual(batch.execute(), [ 1, 1 ])
+        self.assertEqual(kvstore.sortedSetRemove('_testDatastore_remove', [ "2" ]), 1)
+        self.assertEqual(kvstore.sortedSetRemove('_testDatastore_remove', []), 0)
+        self.assertEqual(kvstore.sortedSetCount('_testDatastore_remove'), 0)
+        self.assertEqual(kvstore.hashDelete('_testDatastore_removeh', [ "1" ]), 0)
+
+    @attr('datastore_pool')
+    def test_pool(self):
+        from msapp.datamapper.redisDB import RedisDB
+        kvstore = msapp.datamapper.kvstore
+        # All instances with the same settings share one connection pool.
+        self.assertIs(RedisDB()._pool, RedisDB()._pool)
+        kvstore.set('_testDatastore_pool', "1", expire=10)
+        status = kvstore.status()
+        self.assertEqual(status['Backend'], "redis")
+        self.assertGreaterEqual(status['PoolCreated'], 1)
+        self.assertEqual(status['PoolInUse'], 0, "Connections must be returned to the pool.")
+
+    @attr('datastore_poolstatus')
+    def test_poolstatus(self):
+        kvstore = msapp.datamapper.kvstore
+        # Pool internals of another redis-py version degrade the status, not the service.
+        with mock.patch.object(kvstore, '_pool', mock.Mock(spec=[ 'max_connections' ])):
+            self.assertEqual(kvstore.status(), {})
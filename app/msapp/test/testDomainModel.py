@@ -0,0 +1,49 @@
+import logging
+import unittest
+from nose.plugins.attrib import attr
+from decimal import Decimal
+
+from msapp.domain import Order
+from msapp.domain import Trade
+from msapp.domain import TradeColumns
+
+@attr('domainmodel')
+class TestDomainModel(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def _trade(self, tradeId, side, price, quantity):
+        return Trade(tradeId, orderId=tradeId // 10, symbol="BTCUSDT", timestamp=1585855462553 + tradeId, side=side,
+                     price=Decimal(price), quantity=Decimal(quantity), quoteQuantity=Decimal(price) * Decimal(quantity),
+                     commissionAmount=Decimal("0.00001520"), commissionAsset="BNB")
+
+    @attr('domainmodel_rows')
+    def test_rows(self):
+        t = self._trade(11, Trade.SIDE_BUY, "6668.07", "0.003")
+        self.assertFalse(hasattr(t, '__dict__'), "Trade should not carry a per-instance dict.")
+        self.assertDictEqual(Trade.fromRow(t.toRow()).toDict(), t.toDict())
+        self.assertDictEqual(Trade.fromDict(t.toDict()).toDict(), t.toDict())
+        self.assertEqual(tuple(t.toDict().keys()), Trade.FIELDS)
+        o = Order(12, symbol="BTCUSDT", status=Order.STATUS_NEW, side=Order.SIDE_SELL, price=Decimal("7000"), origQuantity=Decimal("0.003"))
+        self.assertFalse(hasattr(o, '__dict__'), "Order should not carry a per-instance dict.")
+        self.assertDictEqual(Order.fromRow(o.toRow()).toDict(), o.toDict())
+        self.assertEqual(tuple(o.toDict().keys()), Order.FIELDS)
+
+    @attr('domainmodel_columns')
+    def test_columns(self):
+        trades = [
+            self._trade(11, Trade.SIDE_BUY, "6000", "0.002"),
+            self._trade(12, Trade.SIDE_BUY, "7000", "0.002"),
+            self._trade(21, Trade.SIDE_SELL, "8000", "0.001")
+        ]
+        columns = TradeColumns.fromTrades(trades)
+        self.assertEqual(len(columns), 3)
+        self.assertEqual(list(columns.ids), [ 11, 12, 21 ])
+        self.assertEqual(columns.volume(), (Decimal("0.005"), Decimal("34")))
+        self.assertEqual(columns.volume(Trade.SIDE_BUY), (Decimal("0.004"), Decimal("26")))
+        self.assertEqual(columns.averagePrice(Trade.SIDE_BUY), Decimal("6500"))
+        self.assertIsNone(TradeColumns().averagePrice())
+        # Rows convert back into equal trades.
+        for t, c in zip(trades, columns):
+            self.assertDictEqual(c.toDict(), t.toDict())
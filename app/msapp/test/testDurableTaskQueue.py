@@ -0,0 +1,86 @@
+import logging
+import time
+import unittest
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+
+from msapp.datamapper.sqliteDB import SqliteDB
+from msapp.domain.mscore import TaskQueue
+from msapp.domain.mscore import DurableTaskQueue
+
+@attr('durabletaskqueue')
+class TestDurableTaskQueue(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._db = SqliteDB(':memory:')
+
+    def tearDown(self):
+        self._db.close()
+
+    @attr('durabletaskqueue_ack')
+    def test_ack(self):
+        queue = DurableTaskQueue("test", self._db)
+        queue.add({ 'id': "t1", 'data': { 'price': Decimal("6668.07000000") } })
+        queue.add({ 'id': "t2", 'data': {} })
+        queue.add({ 'id': "later", 'JQ_not_before': time.time() + 3600, 'data': {} })
+        task = queue.startNext()
+        self.assertEqual(task, { 'id': "t1", 'data': { 'price': Decimal("6668.07000000") } })
+        self.assertEqual(queue.list(), [
+            { 'Job': "t1", 'Status': TaskQueue.TASK_STATUS_IN_PROGRESS },
+            { 'Job': "t2", 'Status': TaskQueue.TASK_STATUS_QUEUED },
+            { 'Job': "later", 'Status': TaskQueue.TASK_STATUS_QUEUED }
+        ])
+        queue.finalize("t1")
+        self.assertFalse(queue.inList("t1"))
+        with self.assertRaises(Exception):
+            queue.finalize("t1")
+        self.assertEqual(queue.startNext()['id'], "t2")
+        self.assertIsNone(queue.startNext(), "Deferred tasks must not start early.")
+        queue.finalize("t2", 3600)
+        self.assertTrue(queue.inList("t2"))
+        self.assertEqual(queue.flushQueued(), 2)
+        self.assertEqual(len(queue), 0)
+
+    @attr('durabletaskqueue_redelivery')
+    def test_redelivery(self):
+        queue = DurableTaskQueue("test", self._db, visibilityTimeout=0.05)
+        queue.add({ 'id': "t1", 'data': {} })
+        queue.add({ 'id': "t2", 'data': {} })
+        self.assertEqual(queue.startNext()['id'], "t1")
+        # Not acknowledged within the visibility timeout, delivered again ahead of queued tasks.
+        time.sleep(0.06)
+        queue._lastRedelivery = 0
+        self.assertEqual(queue.startNext()['id'], "t1")
+        queue.finalize("t1")
+        # A restarted process recovers the tasks started by its predecessor.
+        self.assertEqual(queue.startNext()['id'], "t2")
+        restarted = DurableTaskQueue("test", self._db)
+        self.assertEqual(restarted.recover(), 1)
+        self.assertEqual(restarted.startNext()['id'], "t2")
+        restarted.finalize("t2")
+        self.assertIsNone(restarted.startNext())
+        self.assertEqual(restarted.recover(), 0)
+
+    @attr('durabletaskqueue_reschedule')
+    def test_reschedule(self):
+        queue = DurableTaskQueue("test", self._db)
+        queue.add({ 'id': "t1", 'data': {} })
+        self.assertEqual(queue.startNext()['id'], "t1")
+        # Moved from in-flight to queued in one transaction, nothing changes if it fails.
+        with mock.patch.object(self._db, 'batch') as batch:
+            batch.return_value.execute.side_effect = Exception("Datastore unavailable.")
+            with self.assertRaises(Exception):
+                queue.finalize("t1", 3600)
+        self.assertEqual(queue.list(), [ { 'Job': "t1", 'Status': TaskQueue.TASK_STATUS_IN_PROGRESS } ])
+        queue.finalize("t1", 3600)
+        self.assertEqual(queue.list(), [ { 'Job': "t1", 'Status': TaskQueue.TASK_STATUS_QUEUED } ])
+        self.assertIsNone(queue.startNext(), "Rescheduled task must be deferred.")
+        # Unknown tasks are not rescheduled.
+        with self.assertRaises(Exception):
+            queue.finalize("unknown", 3600)
+        self.assertFalse(queue.inList("unknown"))
+        self.assertEqual(len(queue), 1)
@@ -0,0 +1,57 @@
+import logging
+import time
+import unittest
+from unittest import mock
+from nose.plugins.attrib import attr
+
+import msapp.datamapper
+from msapp.datamapper import sqliteDB
+from msapp.datamapper.sqliteDB import SqliteDB
+from msapp.datamapper.codec import MsgpackCodec
+from msapp.gateway.binanceApi import BinanceAPI
+from msapp.test.utils import offlineBinanceAPI
+
+def _symbols(tickSize):
+    return { 'BTCUSDT': { 'symbol': "BTCUSDT", 'filters': [ { 'filterType': "PRICE_FILTER", 'minPrice': "0.01", 'maxPrice': "1000000", 'tickSize': tickSize } ] } }
+
+@attr('exchangeinfo')
+class TestExchangeInfo(unittest.TestCase):
+    '''
+      Exchange info shared through the datastore, with TTL and version checks.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._db = SqliteDB(':memory:')
+        msapp.datamapper.initDatastores(self._db, MsgpackCodec())
+
+    def tearDown(self):
+        self._db.close()
+
+    @attr('exchangeinfo_sync')
+    def test_sync(self):
+        store = msapp.datamapper.exchangeinfostore
+        with offlineBinanceAPI() as api:
+            api._client.get_exchange_info.return_value = { 'symbols': list(_symbols("0.10").values()) }
+            # Published by another process, no request needed.
+            v1 = store.save('binance', _symbols("0.01"), ttl=BinanceAPI.EXCHANGE_INFO_TTL)
+            self.assertEqual(api._getSymbolInfo("BTCUSDT")['filters'][0]['tickSize'], "0.01")
+            self.assertEqual(api._exchangeInfoVersion, v1)
+            # New version is picked up after the check interval only.
+            v2 = store.save('binance', _symbols("0.05"), ttl=BinanceAPI.EXCHANGE_INFO_TTL)
+            self.assertNotEqual(v1, v2)
+            self.assertEqual(api._getSymbolInfo("BTCUSDT")['filters'][0]['tickSize'], "0.01")
+            api._exchangeInfoChecked -= BinanceAPI.EXCHANGE_INFO_CHECK_INTERVAL + 1
+            self.assertEqual(api._getSymbolInfo("BTCUSDT")['filters'][0]['tickSize'], "0.05")
+            self.assertEqual(store.meta('binance')['version'], v2)
+            api._client.get_exchange_info.assert_not_called()
+            # Expired exchange info is fetched again and published.
+            api._exchangeInfoChecked -= BinanceAPI.EXCHANGE_INFO_CHECK_INTERVAL + 1
+            with mock.patch.object(sqliteDB, 'time') as mock_time:
+                mock_time.time.return_value = time.time() + BinanceAPI.EXCHANGE_INFO_TTL + 1
+                self.assertIsNone(store.meta('binance'))
+                self.assertEqual(api._getSymbolInfo("BTCUSDT")['filters'][0]['tickSize'], "0.10")
+            api._client.get_exchange_info.assert_called_once()
+            self.assertEqual(store.load('binance'), _symbols("0.10"))
@@ -0,0 +1,81 @@
+import logging
+import unittest
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+
+from msapp.domain import Order
+from msapp.domain import Trade
+from msapp.domain.mscore import Task
+from msapp.gateway.binanceApi import BinanceAPI
+from msapp.test.utils import offlineBinanceAPI
+
+def _report(executionType, status, tradeId=-1, lastQty="0.00000000", cumQty="0.00000000"):
+    return {
+        'e': "executionReport", 'E': 1499405658658, 's': "ETHBTC", 'c': "mUvoqJxFIILMdfAW5iGSOW", 'S': "BUY", 'o': "LIMIT", 'f': "GTC",
+        'q': "1.00000000", 'p': "0.10264410", 'P': "0.00000000", 'F': "0.00000000", 'g': -1, 'C': None, 'x': executionType, 'X': status,
+        'r': "NONE", 'i': 4293153, 'l': lastQty, 'z': cumQty, 'L': "0.10264410" if tradeId > 0 else "0.00000000", 'n': "0.00010000",
+        'N': "BNB" if tradeId > 0 else None, 'T': 1499405658657, 't': tradeId, 'I': 8641984, 'w': True, 'm': False, 'M': False,
+        'O': 1499405658657, 'Z': "0.00000000", 'Y': "0.05132205" if tradeId > 0 else "0.00000000", 'Q': "0.00000000"
+    }
+
+@attr('executionreports')
+class TestExecutionReports(unittest.TestCase):
+    '''
+      Raw user data stream execution reports, mapped to (trade, order) events on the symbol queue.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def _next(self, queue):
+        data = Task.createFromJson(queue.startNext()).data()
+        return Trade.fromDict(data['trade']) if data['trade'] is not None else None, Order.fromDict(data['order'])
+
+    @attr('executionreports_mapping')
+    def test_mapping(self):
+        with offlineBinanceAPI() as api:
+            api._durableEvents = False
+            queue = api.registerERqueue("ETHBTC")
+            subscriber = mock.Mock()
+            api.subscribeExecutionReports(subscriber)
+            BinanceAPI._processEvent(_report("NEW", "NEW"))
+            BinanceAPI._processEvent(_report("TRADE", "PARTIALLY_FILLED", tradeId=77, lastQty="0.50000000", cumQty="0.50000000"))
+            BinanceAPI._processEvent(_report("CANCELED", "CANCELED", cumQty="0.50000000"))
+            BinanceAPI._processEvent(_report("REJECTED", "REJECTED"))
+            BinanceAPI._processEvent(_report("EXPIRED", "EXPIRED"))
+            # Unhandled execution types are not queued.
+            BinanceAPI._processEvent(_report("REPLACED", "NEW"))
+            self.assertEqual(len(queue), 5)
+            self.assertEqual(subscriber.call_count, 5)
+            trade, order = self._next(queue)
+            self.assertIsNone(trade, "Order status change without execution carries no trade.")
+            self.assertEqual(order.toDict(), { 'orderId': 4293153, 'symbol': "ETHBTC", 'status': Order.STATUS_NEW, 'timestamp': 1499405658657,
+                                               'side': Order.SIDE_BUY, 'price': Decimal("0.10264410"), 'origQuantity': Decimal("1.00000000") })
+            trade, order = self._next(queue)
+            self.assertEqual(order.status(), Order.STATUS_PARTIALLY_FILLED)
+            self.assertEqual(trade.toDict(), { 'tradeId': 77, 'orderId': 4293153, 'symbol': "ETHBTC", 'timestamp': 1499405658657, 'side': Trade.SIDE_BUY,
+                                               'price': Decimal("0.10264410"), 'quantity': Decimal("0.50000000"), 'quoteQuantity': Decimal("0.05132205"),
+                                               'commissionAmount': Decimal("0.00010000"), 'commissionAsset': "BNB" })
+            for status in [ Order.STATUS_CANCELED, Order.STATUS_REJECTED, Order.STATUS_EXPIRED ]:
+                trade, order = self._next(queue)
+                self.assertIsNone(trade)
+                self.assertEqual(order.status(), status)
+
+    @attr('executionreports_unregistered')
+    def test_unregistered(self):
+        with offlineBinanceAPI() as api:
+            api._durableEvents = False
+            queue = api.registerERqueue("ETHBTC")
+            subscriber = mock.Mock()
+            api.subscribeExecutionReports(subscriber)
+            report = _report("NEW", "NEW")
+            report['s'] = "BNBBTC"
+            BinanceAPI._processEvent(report)
+            # Without a consuming strategy, nothing is queued for the symbol. Subscribers are notified anyway.
+            self.assertEqual(len(queue), 0)
+            self.assertNotIn("BNBBTC", api._execReportQueues)
+            subscriber.assert_called_once()
+            api.registerERsymbol("BNBBTC")
+            BinanceAPI._processEvent(report)
+            self.assertEqual(len(api._execReportQueue("BNBBTC")), 1)
@@ -0,0 +1,78 @@
+import logging
+import unittest
+from unittest import mock
+from nose.plugins.attrib import attr
+
+import msapp.datamapper
+from msapp.datamapper.sqliteDB import SqliteDB
+from msapp.datamapper.codec import MsgpackCodec
+from msapp.test.utils import offlineBinanceAPI
+
+def _order(orderId, status="FILLED"):
+    return { 'orderId': orderId, 'symbol': "BTCUSDT", 'status': status, 'time': 1585855462553, 'side': "BUY", 'price': "10000", 'origQty': "0.003", 'executedQty': "0.003" }
+
+def _trade(tradeId):
+    return { 'id': tradeId, 'orderId': 1, 'symbol': "BTCUSDT", 'time': 1585855462553, 'isBuyer': True, 'price': "10000", 'qty': "0.001",
+             'quoteQty': "10", 'commission': "0.00001", 'commissionAsset': "BNB" }
+
+def _pages(items, key):
+    # Exchange stand-in, serves items with id >= key parameter.
+    def _serve(symbol, limit, **params):
+        return [ i for i in items if list(i.values())[0] >= params[key] ][:limit]
+    return _serve
+
+@attr('historywalk')
+class TestHistoryWalk(unittest.TestCase):
+    '''
+      Paginated trade and order history walks with sync checkpoints, on a mocked exchange client.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._db = SqliteDB(':memory:')
+        msapp.datamapper.initDatastores(self._db, MsgpackCodec())
+
+    def tearDown(self):
+        self._db.close()
+
+    @attr('historywalk_trades')
+    def test_trades(self):
+        with offlineBinanceAPI() as api:
+            api._client.get_my_trades.side_effect = _pages([ _trade(i) for i in range(1, 8) ], 'fromId')
+            # Complete history from the start, two full pages and a short last page.
+            trades = list(api.iterTrades("BTCUSDT", limit=3, cursorKey="test:trades"))
+            self.assertEqual([ t.id() for t in trades ], list(range(1, 8)))
+            self.assertEqual([ c[1]['fromId'] for c in api._client.get_my_trades.call_args_list ], [ 0, 4, 7 ])
+            self.assertEqual(msapp.datamapper.synccursorstore.load("test:trades"), 8)
+            # Resume from the checkpoint, it is ahead of the requested start.
+            api._client.get_my_trades.reset_mock()
+            api._client.get_my_trades.side_effect = _pages([ _trade(i) for i in range(1, 10) ], 'fromId')
+            self.assertEqual([ t.id() for t in api.iterTrades("BTCUSDT", fromId=2, limit=3, cursorKey="test:trades") ], [ 8, 9 ])
+            self.assertEqual(api._client.get_my_trades.call_args_list[0][1]['fromId'], 8)
+            self.assertEqual(msapp.datamapper.synccursorstore.load("test:trades"), 10)
+
+    @attr('historywalk_orders')
+    def test_orders(self):
+        with offlineBinanceAPI() as api:
+            orders = [ _order(1), _order(2), _order(3, "NEW"), _order(4), _order(5, "CANCELED"), _order(6) ]
+            api._client.get_all_orders.side_effect = _pages(orders, 'orderId')
+            pages = api.iterAllOrderPages("BTCUSDT", limit=2, cursorKey="test:orders")
+            self.assertEqual([ o.id() for o in next(pages) ], [ 1, 2 ])
+            # Checkpoint is stored once the caller requests the next page.
+            self.assertIsNone(msapp.datamapper.synccursorstore.load("test:orders"))
+            self.assertEqual([ o.id() for o in next(pages) ], [ 3, 4 ])
+            self.assertEqual(msapp.datamapper.synccursorstore.load("test:orders"), 3)
+            self.assertEqual([ o.id() for o in next(pages) ], [ 5, 6 ])
+            self.assertEqual(list(pages), [])
+            self.assertEqual([ c[1]['orderId'] for c in api._client.get_all_orders.call_args_list ], [ 0, 3, 5, 7 ])
+            # Checkpoint never passes an order that was open during the walk.
+            self.assertEqual(msapp.datamapper.synccursorstore.load("test:orders"), 3)
+            # Explicit start (lowest local open order) wins over the checkpoint.
+            api._client.get_all_orders.reset_mock()
+            self.assertEqual([ o.id() for o in api.iterAllOrders("BTCUSDT", fromId=2, limit=10, cursorKey="test:orders") ], [ 2, 3, 4, 5, 6 ])
+            self.assertEqual(api._client.get_all_orders.call_args_list[0][1]['orderId'], 2)
+            # Without start, the walk resumes from the checkpoint.
+            api._client.get_all_orders.reset_mock()
+            self.assertEqual([ o.id() for o in api.iterAllOrders("BTCUSDT", limit=10, cursorKey="test:orders") ], [ 3, 4, 5, 6 ])
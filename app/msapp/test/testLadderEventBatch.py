@@ -0,0 +1,84 @@
+import logging
+import unittest
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+
+import msapp.datamapper
+import msapp.gateway
+from msapp.datamapper.sqliteDB import SqliteDB
+from msapp.datamapper.codec import MsgpackCodec
+from msapp.domain import Order
+from msapp.domain import Trade
+from msapp.domain.repository import Position
+from msapp.domain.mscore import Task
+from msapp.domain.mscore import TaskQueue
+from msapp.domain.service.tradingstrategy import LadderTradingStrategy
+
+@attr('ladderbatch')
+class TestLadderEventBatch(unittest.TestCase):
+    '''
+      Batched execution report processing of LadderTradingStrategy.step(), on the embedded
+      datastore without exchange connection.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._db = SqliteDB(':memory:')
+        msapp.datamapper.initDatastores(self._db, MsgpackCodec())
+
+    def tearDown(self):
+        self._db.close()
+
+    def _order(self, status):
+        return Order(-2, symbol="BTCUSDT", status=status, timestamp=1585855462553, side=Order.SIDE_BUY, price=Decimal("10000"), origQuantity=Decimal("0.003"))
+
+    def _report(self, tradeId, quantity, status):
+        trade = Trade(tradeId, orderId=-2, symbol="BTCUSDT", timestamp=1585855462553 + tradeId, side=Trade.SIDE_BUY, price=Decimal("10000"),
+                      quantity=quantity, quoteQuantity=quantity * 10000, commissionAmount=Decimal("0.00001"), commissionAsset="BNB")
+        return Task({ 'trade': trade.toDict(), 'order': self._order(status).toDict() }).toDict()
+
+    @attr('ladderbatch_step')
+    @mock.patch.object(msapp.gateway, 'telegramAPI')
+    def test_step(self, mock_telegramAPI):
+        order = self._order(Order.STATUS_NEW)
+        position = Position.fromDict({
+            'id': "_laddertest_t1",
+            'position': { 'type': "LONG_LADDER", 'high': { 'sellLimit': Decimal('11000') }, 'low': { 'buyLimit': Decimal('10000') }},
+            'symbol': "BTCUSDT",
+            'volume': Decimal("0"),
+            'quoteVolume': Decimal("40"),
+            'orders': [ -2 ]
+        })
+        msapp.datamapper.saveAll([ order, position ])
+        lts = LadderTradingStrategy("BTCUSDT", [ Position.fromDict(position.toDict()) ])
+        lts._tradeEvents = TaskQueue()
+        lts._placeTriggeredOrders = mock.Mock(return_value=True)
+        # Burst of partial fills, one of them delivered twice.
+        lts._tradeEvents.add(self._report(-10, Decimal("0.001"), Order.STATUS_PARTIALLY_FILLED))
+        lts._tradeEvents.add(self._report(-11, Decimal("0.001"), Order.STATUS_PARTIALLY_FILLED))
+        lts._tradeEvents.add(self._report(-10, Decimal("0.001"), Order.STATUS_PARTIALLY_FILLED))
+        lts._tradeEvents.add(self._report(-12, Decimal("0.001"), Order.STATUS_FILLED))
+        self.assertTrue(lts.step())
+        self.assertEqual(len(lts._tradeEvents), 0, "All reports must be acknowledged.")
+        self.assertFalse(lts.backlog())
+        lts._placeTriggeredOrders.assert_called_once()
+        # Fills are applied once each, the order takes the last snapshot, all persisted.
+        stored = msapp.datamapper.positionstore.load("_laddertest_t1")
+        self.assertEqual(stored.toDict()['volume'], Decimal("0.003"))
+        self.assertEqual(msapp.datamapper.orderstore.load("BTCUSDT", -2).status(), Order.STATUS_FILLED)
+        self.assertEqual(sorted(t.id() for t in msapp.datamapper.tradestore.loadMany("BTCUSDT", [ -10, -11, -12 ])), [ -12, -11, -10 ])
+        mock_telegramAPI.notify.assert_called_once()
+        status = lts.status()
+        self.assertEqual(status['EventBatchSize']['Count'], 1)
+        self.assertEqual(status['EventBatchSize']['Buckets']['<=5'], 1)
+        # Redelivered reports are skipped, batches are limited to maxEvents.
+        lts._tradeEvents.add(self._report(-11, Decimal("0.001"), Order.STATUS_PARTIALLY_FILLED))
+        lts._tradeEvents.add(self._report(-12, Decimal("0.001"), Order.STATUS_FILLED))
+        self.assertTrue(lts.step(maxEvents=1))
+        self.assertTrue(lts.backlog())
+        self.assertTrue(lts.step(maxEvents=1))
+        self.assertEqual(msapp.datamapper.positionstore.load("_laddertest_t1").toDict()['volume'], Decimal("0.003"))
+        self.assertEqual(lts.status()['EventBatchSize']['Count'], 3)
@@ -0,0 +1,149 @@
+import logging
+import unittest
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+
+import msapp.datamapper
+import msapp.gateway
+from msapp.datamapper.sqliteDB import SqliteDB
+from msapp.datamapper.codec import MsgpackCodec
+from msapp.domain import Order
+from msapp.domain.repository import Position
+from msapp.domain.service.tradingstrategy import LadderTradingStrategy
+from msapp.domain.service.tradingstrategy.ladderTradingStrategy import _LimitIndex
+
+@attr('ladderplacement')
+class TestLadderPlacement(unittest.TestCase):
+    '''
+      Order placement decisions of LadderTradingStrategy, on the embedded datastore with a mocked
+      exchange gateway.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._db = SqliteDB(':memory:')
+        msapp.datamapper.initDatastores(self._db, MsgpackCodec())
+
+    def tearDown(self):
+        self._db.close()
+
+    def _position(self, positionId, buyLimit, sellLimit, volume="0", orders=[]):
+        return Position.fromDict({
+            'id': positionId,
+            'position': { 'type': Position.TYPE_LONG_LADDER, 'high': { 'sellLimit': Decimal(sellLimit) }, 'low': { 'buyLimit': Decimal(buyLimit) }},
+            'symbol': "BTCUSDT",
+            'volume': Decimal(volume),
+            'quoteVolume': Decimal("40"),
+            'orders': orders
+        })
+
+    @attr('ladderplacement_maxnumorders')
+    @mock.patch.object(msapp.gateway, 'binanceAPI')
+    def test_maxnumorders(self, mock_binanceAPI):
+        order = Order(-1, symbol="BTCUSDT", status=Order.STATUS_NEW, timestamp=1585855462553, side=Order.SIDE_BUY, price=Decimal("9000"), origQuantity=Decimal("0.004"))
+        msapp.datamapper.saveAll([ order ])
+        positions = [ self._position("_p1", "9000", "9500", orders=[ -1 ]), self._position("_p2", "10000", "10500"), self._position("_p3", "11000", "11500") ]
+        lts = LadderTradingStrategy("BTCUSDT", positions)
+        mock_binanceAPI.isOrderPlaceable.return_value = True
+        planned = lts._positionOrders(positions, Decimal("12000"))
+        self.assertEqual([ (p.id(), side) for p, side, _, _ in planned ], [ ("_p2", Order.SIDE_BUY), ("_p3", Order.SIDE_BUY) ])
+        # Open orders of the symbol and orders planned before in the batch count towards MAX_NUM_ORDERS.
+        self.assertEqual([ c[1]['openOrders'] for c in mock_binanceAPI.isOrderPlaceable.call_args_list ], [ 1, 2 ])
+
+    @attr('ladderplacement_orderindex')
+    def test_orderindex(self):
+        closed = Order(-1, symbol="BTCUSDT", status=Order.STATUS_FILLED, timestamp=1585855462553, side=Order.SIDE_BUY, price=Decimal("9000"), origQuantity=Decimal("0.004"))
+        msapp.datamapper.saveAll([ closed ])
+        positions = [ self._position("_p1", "9000", "9500", volume="0.004", orders=[ -1 ]), self._position("_p2", "10000", "10500") ]
+        lts = LadderTradingStrategy("BTCUSDT", positions)
+        self.assertEqual(set(lts._orderIndex.keys()), { -1 })
+        self.assertIs(lts._orderIndex[-1][0], positions[0])
+        # Assigned orders are indexed in strategy and position, twice assigned ones are rejected.
+        order = Order(-2, symbol="BTCUSDT", status=Order.STATUS_NEW, timestamp=1585855462553, side=Order.SIDE_SELL, price=Decimal("9500"), origQuantity=Decimal("0.004"))
+        self.assertTrue(lts._assignOrder(positions[0], order))
+        self.assertFalse(lts._assignOrder(positions[1], order))
+        self.assertIs(lts._orderIndex[-2][0], positions[0])
+        self.assertIs(positions[0].getOrder(-2), order)
+        self.assertIsNone(positions[1].getOrder(-2))
+        self.assertEqual(set(lts._openOrders().keys()), { -2 })
+        # Archived orders leave both indexes, the rebuilt index matches the maintained one.
+        lts._archiveClosedOrders(positions)
+        self.assertEqual(set(lts._orderIndex.keys()), { -2 })
+        self.assertIsNone(positions[0].getOrder(-1))
+        self.assertEqual([ o.id() for o in positions[0].orders() ], [ -2 ])
+        index = dict(lts._orderIndex)
+        lts._rebuildOrderIndex()
+        self.assertEqual(lts._orderIndex, index)
+
+    @attr('ladderplacement_limitindex')
+    def test_limitindex(self):
+        index = _LimitIndex()
+        index.add("a", Decimal("10"))
+        index.add("b", Decimal("20"))
+        index.add("c", Decimal("20"))
+        index.add("d", Decimal("30"))
+        # Re-adding moves the position to its new limit.
+        index.add("a", Decimal("25"))
+        self.assertEqual(len(index), 4)
+        # Removing one of several positions with the same limit keeps the others.
+        index.remove("b")
+        index.remove("x")
+        self.assertEqual(len(index), 3)
+        # Boundaries are inclusive.
+        self.assertEqual(index.popAtOrAbove(Decimal("25")), [ "a", "d" ])
+        self.assertEqual(index.popAtOrAbove(Decimal("25")), [])
+        index.add("b", Decimal("20"))
+        self.assertEqual(index.popAtOrBelow(Decimal("19.99")), [])
+        self.assertEqual(sorted(index.popAtOrBelow(Decimal("20"))), [ "b", "c" ])
+        self.assertEqual(len(index), 0)
+
+    @attr('ladderplacement_triggered')
+    @mock.patch.object(msapp.gateway, 'binanceAPI')
+    def test_triggered(self, mock_binanceAPI):
+        ids = iter(range(-10, -100, -1))
+        mock_binanceAPI.isOrderPlaceable.return_value = True
+        mock_binanceAPI.placeLimitOrders.side_effect = lambda orders: [ Order(next(ids), symbol=symbol, status=Order.STATUS_NEW, timestamp=1585855462553, side=side,
+                                                                              price=price, origQuantity=quantity) for symbol, side, quantity, price in orders ]
+        positions = [ self._position("_p1", "10000", "10500"), self._position("_p2", "11000", "11500") ]
+        lts = LadderTradingStrategy("BTCUSDT", positions)
+        # Full scan: price below both buy limits, nothing placed, both wait for the price.
+        mock_binanceAPI.getCurrentPrice.return_value = Decimal("9500")
+        lts._placeMissingOrders()
+        mock_binanceAPI.placeLimitOrders.assert_not_called()
+        self.assertEqual(len(lts._waitingBuy), 2)
+        with mock.patch.object(lts, '_placeMissingOrders', wraps=lts._placeMissingOrders) as fullScan:
+            # Price crosses the first buy limit only.
+            mock_binanceAPI.getCurrentPrice.return_value = Decimal("10500")
+            lts._placeTriggeredOrders()
+            self.assertEqual(mock_binanceAPI.placeLimitOrders.call_args[0][0], [ ("BTCUSDT", Order.SIDE_BUY, Decimal("0.004000"), Decimal("10000")) ])
+            self.assertEqual([ o.id() for o in positions[0].openOrders() ], [ -10 ])
+            # Unchanged price re-evaluates nothing.
+            lts._placeTriggeredOrders()
+            self.assertEqual(mock_binanceAPI.placeLimitOrders.call_count, 1)
+            fullScan.assert_not_called()
+            # Full scan as safety net once the interval elapsed.
+            lts._lastFullScan -= LadderTradingStrategy.FULL_SCAN_INTERVAL + 1
+            lts._placeTriggeredOrders()
+            fullScan.assert_called_once()
+        self.assertEqual(len(lts._waitingBuy), 1)
+
+    @attr('ladderplacement_invalidate')
+    @mock.patch.object(msapp.gateway, 'binanceAPI')
+    def test_invalidate(self, mock_binanceAPI):
+        orders = [ Order(oid, symbol="BTCUSDT", status=Order.STATUS_NEW, timestamp=1585855462553, side=Order.SIDE_BUY, price=Decimal("9000"), origQuantity=Decimal("0.004")) for oid in [ -2, -1 ] ]
+        msapp.datamapper.saveAll(orders)
+        lts = LadderTradingStrategy("BTCUSDT", [ self._position("_p1", "9000", "9500", orders=[ -2 ]), self._position("_p2", "10000", "10500", orders=[ -1 ]) ])
+        persisted = []
+        def _pages(symbol, fromId, cursorKey):
+            self.assertEqual(fromId, -2, "Walk must start at the lowest open order.")
+            yield [ Order.fromDict(dict(orders[0].toDict(), status=Order.STATUS_CANCELED)) ]
+            # Checkpoint advances from here on, the closed order of the previous page must be stored.
+            persisted.append(msapp.datamapper.orderstore.load("BTCUSDT", -2).status())
+            yield [ Order.fromDict(dict(orders[1].toDict(), status=Order.STATUS_FILLED)) ]
+        mock_binanceAPI.iterAllOrderPages.side_effect = _pages
+        self.assertTrue(lts._invalidateClosedOrders())
+        self.assertEqual(persisted, [ Order.STATUS_CANCELED ])
+        self.assertEqual(msapp.datamapper.orderstore.load("BTCUSDT", -1).status(), Order.STATUS_FILLED)
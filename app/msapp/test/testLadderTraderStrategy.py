@@ -37,6 +37,8 @@ class TestLadderTraderStrategy(unittest.TestCase):
             gc = [ k.decode('utf-8') for k in gc if re.match(_stores[store], k.decode('utf-8')) is not None ]
             for k in gc:
                 kvstore._db.hdel(store, k)
+        for k in kvstore._db.keys("position:_laddertest*:closedorders"):
+            kvstore._db.delete(k)
         TestLadderTraderStrategy.lastOrderId = -1
         TestLadderTraderStrategy.lastTradeId = -1
 
@@ -134,14 +136,14 @@ class TestLadderTraderStrategy(unittest.TestCase):
             mock_getCurrentPrice.assert_called_with(symbol)
             for p in positions:
                 p._loadOrders()
-            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -3, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('10000'), 'origQuantity': Decimal('20')}, "Order content mismatch.")
+            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -2, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('10000'), 'origQuantity': Decimal('20')}, "Order content mismatch.")
             # Now set price between the two positions.
             mock_getCurrentPrice.return_value = Decimal("11500")
             lts._placeMissingOrders()
             for p in positions:
                 p._loadOrders()
-            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -3, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('10000'), 'origQuantity': Decimal('20')}, "Order content mismatch.")
-            self.assertDictEqual(positions[1]._orders[0].toDict(), {'orderId': -5, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('11000'), 'origQuantity': Decimal('20')}, "Order content mismatch.")
+            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -2, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('10000'), 'origQuantity': Decimal('20')}, "Order content mismatch.")
+            self.assertDictEqual(positions[1]._orders[0].toDict(), {'orderId': -3, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('11000'), 'origQuantity': Decimal('20')}, "Order content mismatch.")
             # Update position volume to force creating sell orders.
             positions[0]._orders[0]._status = "FILLED"
             positions[0]._orders[0].save()
@@ -151,7 +153,9 @@ class TestLadderTraderStrategy(unittest.TestCase):
             lts._placeMissingOrders()
             for p in positions:
                 p._loadOrders()
-            self.assertDictEqual(positions[0]._orders[1].toDict(), {'orderId': -7, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('11000'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
+            # Filled buy order has been moved to the closed order archive.
+            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -4, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('11000'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
+            self.assertEqual([ o.id() for o in positions[0].closedOrders() ], [ -2 ], "Closed order not archived.")
         except Exception:
             raise
         finally:
@@ -203,14 +207,14 @@ class TestLadderTraderStrategy(unittest.TestCase):
             self.assertDictEqual(positions[0]._orders[1].toDict(), {'orderId': -6, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('11000'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
             # Validate updated position volumes.
             self.assertDictEqual(positions[0].toDict(), {'id': '_laddertest_t1', 'position': {'type': 'LONG_LADDER', 'high': {'sellLimit': Decimal('11000')}, 'low': {'buyLimit': Decimal('10000')}}, 'symbol': 'BTCUSDT', 'volume': Decimal('0.002'), 'quoteVolume': Decimal('0'), 'orders': [-3, -6]}, "Position volume incorrect.")
-            # 3. Simulate price drop, should have no effect.
+            # 3. Simulate price drop, should have no effect besides archiving the filled order.
             mock_getCurrentPrice.return_value = Decimal("9999")
             lts._placeMissingOrders()
-            # Validate first order closed (filled) and 2nd order in place.
-            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -3, 'symbol': 'BTCUSDT', 'status': 'FILLED', 'timestamp': 1585855462553, 'side': 'BUY', 'price': trade._price, 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
-            self.assertDictEqual(positions[0]._orders[1].toDict(), {'orderId': -6, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('11000'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
+            # Validate first order closed (filled) and archived, and 2nd order in place.
+            self.assertDictEqual(positions[0].closedOrders()[0].toDict(), {'orderId': -3, 'symbol': 'BTCUSDT', 'status': 'FILLED', 'timestamp': 1585855462553, 'side': 'BUY', 'price': trade._price, 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
+            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -6, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('11000'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
             # Validate updated position volumes.
-            self.assertDictEqual(positions[0].toDict(), {'id': '_laddertest_t1', 'position': {'type': 'LONG_LADDER', 'high': {'sellLimit': Decimal('11000')}, 'low': {'buyLimit': Decimal('10000')}}, 'symbol': 'BTCUSDT', 'volume': Decimal('0.002'), 'quoteVolume': Decimal('0'), 'orders': [-3, -6]}, "Position volume incorrect.")
+            self.assertDictEqual(positions[0].toDict(), {'id': '_laddertest_t1', 'position': {'type': 'LONG_LADDER', 'high': {'sellLimit': Decimal('11000')}, 'low': {'buyLimit': Decimal('10000')}}, 'symbol': 'BTCUSDT', 'volume': Decimal('0.002'), 'quoteVolume': Decimal('0'), 'orders': [-6]}, "Position volume incorrect.")
             # 4. Simulate price between 1st and 2nd ladder.
             mock_getCurrentPrice.return_value = Decimal("11001")
             trade = self._trade(-6, symbol, "SELL", Decimal('0.002'), Decimal(Decimal('0.002') * Decimal('11000')).quantize(Decimal('0.000001')))
@@ -220,10 +224,10 @@ class TestLadderTraderStrategy(unittest.TestCase):
             _status = "FILLED"
             lts._tradeEvent(trade)
             # Validate 2nd order SELL filled and 3rd order BUY placed.
-            self.assertDictEqual(positions[0]._orders[1].toDict(), {'orderId': -6, 'symbol': 'BTCUSDT', 'status': 'FILLED', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('0E-8'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
-            self.assertDictEqual(positions[0]._orders[2].toDict(), {'orderId': -9, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('10000'), 'origQuantity': Decimal('0.002200')}, "Order content mismatch.")
+            self.assertDictEqual(positions[0]._orders[0].toDict(), {'orderId': -6, 'symbol': 'BTCUSDT', 'status': 'FILLED', 'timestamp': 1585855462553, 'side': 'SELL', 'price': Decimal('0E-8'), 'origQuantity': Decimal('0.002')}, "Order content mismatch.")
+            self.assertDictEqual(positions[0]._orders[1].toDict(), {'orderId': -9, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('10000'), 'origQuantity': Decimal('0.002200')}, "Order content mismatch.")
             # Validate updated position volume.
-            self.assertDictEqual(positions[0].toDict(), {'id': '_laddertest_t1', 'position': {'type': 'LONG_LADDER', 'high': {'sellLimit': Decimal('11000')}, 'low': {'buyLimit': Decimal('10000')}}, 'symbol': 'BTCUSDT', 'volume': Decimal('0.000'), 'quoteVolume': Decimal('22.000000'), 'orders': [-3, -6, -9]}, "Position volume incorrect.")
+            self.assertDictEqual(positions[0].toDict(), {'id': '_laddertest_t1', 'position': {'type': 'LONG_LADDER', 'high': {'sellLimit': Decimal('11000')}, 'low': {'buyLimit': Decimal('10000')}}, 'symbol': 'BTCUSDT', 'volume': Decimal('0.000'), 'quoteVolume': Decimal('22.000000'), 'orders': [-6, -9]}, "Position volume incorrect.")
             # Validate 4th order BUY placed.
             self.assertDictEqual(positions[1]._orders[0].toDict(), {'orderId': -11, 'symbol': 'BTCUSDT', 'status': 'NEW', 'timestamp': 1585855462553, 'side': 'BUY', 'price': Decimal('11000'), 'origQuantity': Decimal('0.001818')}, "Order content mismatch.")
             # Validate 2nd position volume not updated.
@@ -0,0 +1,59 @@
+import logging
+import unittest
+import multiprocessing
+from nose.plugins.attrib import attr
+from decimal import Decimal
+from multiprocessing import shared_memory
+
+from msapp.gateway.priceBoard import PriceBoard
+
+def _publishPrice(name, symbol, price):
+    board = PriceBoard.attach(name)
+    board.update(symbol, Decimal(price), 1585157254418)
+    board.close()
+
+@attr('priceboard')
+class TestPriceBoard(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._board = PriceBoard(name="msapp_test_prices", slots=4)
+
+    def tearDown(self):
+        self._board.close()
+
+    @attr('priceboard_readwrite')
+    def test_readwrite(self):
+        self._board.register("BTCUSDT")
+        self.assertEqual(self._board.read("BTCUSDT"), (None, None), "Registered symbol must not have a price before first tick.")
+        self._board.update("BTCUSDT", Decimal("6668.07000000"), 1585157254418)
+        self.assertEqual(self._board.read("BTCUSDT"), (Decimal("6668.07000000"), 1585157254418), "Price board content mismatch.")
+        self.assertIsNone(self._board.price("ETHUSDT"), "Unknown symbol must not have a price.")
+
+    @attr('priceboard_crossprocess')
+    def test_crossprocess(self):
+        self._board.register("BTCUSDT")
+        p = multiprocessing.Process(target=_publishPrice, args=(self._board.name(), "ETHUSDT", "140.12000000"))
+        p.start()
+        p.join()
+        self.assertEqual(self._board.price("ETHUSDT"), Decimal("140.12000000"), "Price published by other process not visible.")
+        self.assertEqual(sorted(self._board.symbols()), ["BTCUSDT", "ETHUSDT"])
+
+    @attr('priceboard_full')
+    def test_full(self):
+        for s in ["A", "B", "C", "D"]:
+            self._board.register(s)
+        with self.assertRaises(Exception):
+            self._board.register("E")
+
+    @attr('priceboard_stale')
+    def test_stale(self):
+        # Segment of a crashed process with the same name is replaced.
+        stale = shared_memory.SharedMemory(name="msapp_test_stale", create=True, size=16)
+        stale.close()
+        board = PriceBoard(name="msapp_test_stale", slots=4)
+        board.update("BTCUSDT", Decimal("6668.07"), 1585157254418)
+        self.assertEqual(board.price("BTCUSDT"), Decimal("6668.07"))
+        board.close()
@@ -0,0 +1,65 @@
+import logging
+import unittest
+import threading
+import time
+from unittest import mock
+from nose.plugins.attrib import attr
+
+from msapp.gateway.rateLimiter import RateLimiter
+
+@attr('ratelimiter')
+class TestRateLimiter(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    @attr('ratelimiter_budget')
+    def test_budget(self):
+        limiter = RateLimiter(weightPerMinute=600)
+        limiter.acquire(100, priority=RateLimiter.PRIORITY_ORDER)
+        status = limiter.status()
+        self.assertEqual(status['WeightUsed'], 100)
+        self.assertAlmostEqual(status['WeightUtilisation'], 100 / 600, places=2)
+
+    @attr('ratelimiter_headers')
+    def test_headers(self):
+        limiter = RateLimiter(weightPerMinute=1200)
+        response = mock.Mock(status_code=200, headers={'X-MBX-USED-WEIGHT-1M': "1000", 'X-MBX-ORDER-COUNT-10S': "7"})
+        limiter.onResponse(response)
+        status = limiter.status()
+        self.assertEqual(status['WeightUsed'], 1000)
+        self.assertEqual(status['Orders10sUsed'], 7)
+        response = mock.Mock(status_code=429, headers={'Retry-After': "30"})
+        limiter.onResponse(response)
+        self.assertGreater(limiter.status()['BlockedFor'], 29)
+
+    @attr('ratelimiter_share')
+    def test_share(self):
+        # Three processes on one account, each gets a third of the budget.
+        limiter = RateLimiter(weightPerMinute=1200, ordersPer10s=90, processes=3)
+        status = limiter.status()
+        self.assertEqual((status['WeightLimit'], status['Orders10sLimit'], status['Processes']), (400, 30, 3))
+        # Usage reported by the exchange counts all processes, against the full limit.
+        limiter.onResponse(mock.Mock(status_code=200, headers={'X-MBX-USED-WEIGHT-1M': "1000"}))
+        self.assertEqual(limiter.status()['WeightUsed'], 200)
+        limiter.onResponse(mock.Mock(status_code=200, headers={'X-MBX-USED-WEIGHT-1M': "100"}))
+        self.assertEqual(limiter.status()['WeightUsed'], 200)
+        limiter.share(1)
+        self.assertEqual(limiter.status()['WeightLimit'], 1200)
+
+    @attr('ratelimiter_priority')
+    def test_priority(self):
+        # Budget is exhausted, waiting requests are served by priority once tokens refill.
+        limiter = RateLimiter(weightPerMinute=60)
+        limiter.acquire(60, priority=RateLimiter.PRIORITY_ORDER)
+        served = []
+        def request(name, priority):
+            limiter.acquire(1, priority=priority)
+            served.append(name)
+        sync = threading.Thread(target=request, args=("sync", RateLimiter.PRIORITY_SYNC), daemon=True)
+        sync.start()
+        time.sleep(0.1)
+        order = threading.Thread(target=request, args=("order", RateLimiter.PRIORITY_ORDER))
+        order.start()
+        order.join(5)
+        self.assertEqual(served, ["order"], "Order placement must overtake history sync.")
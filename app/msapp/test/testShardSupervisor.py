@@ -0,0 +1,105 @@
+import logging
+import unittest
+from unittest import mock
+from nose.plugins.attrib import attr
+
+import msapp.datamapper
+import msapp.gateway
+from msapp.datamapper.sqliteDB import SqliteDB
+from msapp.datamapper.codec import MsgpackCodec
+from msapp.domain.service.shardSupervisor import ShardSupervisor
+
+class _Process:
+    # Shard process stand-in, exit is triggered by the test.
+    def __init__(self, exitcode=None):
+        self.pid = 4711
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def terminate(self):
+        self.exitcode = -15
+
+    def join(self, timeout=None):
+        pass
+
+@attr('shards')
+class TestShardSupervisor(unittest.TestCase):
+    '''
+      Config registry, shard assignment and crash supervision, without starting shard processes.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def _configs(self):
+        return { f"binance_{s}_ladder": { 'strategy': "LadderTradingStrategy", 'symbol': s, 'positions': [] } for s in [ "BTCUSDT", "ETHUSDT", "BNBUSDT" ] }
+
+    @attr('shards_config')
+    def test_config(self):
+        db = SqliteDB(':memory:')
+        msapp.datamapper.initDatastores(db, MsgpackCodec())
+        for name, conf in self._configs().items():
+            msapp.datamapper.tradingconfig.save(name, conf)
+        configs = msapp.datamapper.tradingconfig.loadAll()
+        self.assertEqual(sorted(configs.keys()), [ "binance_BNBUSDT_ladder", "binance_BTCUSDT_ladder", "binance_ETHUSDT_ladder" ])
+        self.assertEqual(configs["binance_ETHUSDT_ladder"]['symbol'], "ETHUSDT")
+        db.close()
+
+    @attr('shards_assign')
+    def test_assign(self):
+        configs = self._configs()
+        self.assertEqual(ShardSupervisor.assign(configs, 2), [ [ "binance_BNBUSDT_ladder", "binance_ETHUSDT_ladder" ], [ "binance_BTCUSDT_ladder" ] ])
+        # Never more shards than strategies.
+        self.assertEqual(len(ShardSupervisor.assign(configs, 8)), 3)
+
+    @attr('shards_restart')
+    @mock.patch.object(msapp.gateway, 'telegramAPI')
+    @mock.patch.object(msapp.gateway, 'binanceAPI')
+    def test_restart(self, mock_binanceAPI, mock_telegramAPI):
+        mock_binanceAPI.durableEvents.return_value = True
+        mock_binanceAPI.priceBoardName.return_value = "test_priceboard"
+        supervisor = ShardSupervisor(self._configs(), 2)
+        supervisor._start = mock.Mock(side_effect=lambda shard: setattr(shard, 'process', _Process()))
+        shard = supervisor._shards[0]
+        # Execution reports are routed to the shard owning the symbol.
+        supervisor._onExecutionReport(None, mock.Mock(**{ 'symbol.return_value': "ETHUSDT" }))
+        self.assertTrue(shard.wakeup.is_set())
+        self.assertEqual(shard.reportsPending.value, 1)
+        self.assertFalse(supervisor._shards[1].wakeup.is_set())
+        # Crashes are restarted with growing backoff.
+        shard.process = _Process(exitcode=1)
+        supervisor._check(shard, 100)
+        self.assertEqual(shard.restarts, 1)
+        self.assertIsNone(shard.process, "Restart must wait for the backoff.")
+        supervisor._check(shard, 101)
+        supervisor._start.assert_called_once_with(shard)
+        shard.process.exitcode = -9
+        supervisor._check(shard, 102)
+        supervisor._check(shard, 103)
+        self.assertIsNone(shard.process, "Backoff must grow with repeated crashes.")
+        supervisor._check(shard, 104)
+        self.assertEqual(supervisor._start.call_count, 2)
+        self.assertEqual(mock_telegramAPI.notify.call_count, 2)
+        # A clean exit (all strategies stopped) is not restarted.
+        shard.process.exitcode = 0
+        supervisor._check(shard, 200)
+        supervisor._check(shard, 300)
+        self.assertTrue(shard.finished)
+        self.assertEqual(supervisor._start.call_count, 2)
+        self.assertEqual(supervisor.status()[0]['Restarts'], 2)
+
+    @attr('shards_start')
+    @mock.patch.object(msapp.gateway, 'binanceAPI')
+    def test_start(self, mock_binanceAPI):
+        mock_binanceAPI.durableEvents.return_value = True
+        mock_binanceAPI.priceBoardName.return_value = "test_priceboard"
+        supervisor = ShardSupervisor(self._configs(), 2)
+        supervisor._start = mock.Mock(side_effect=lambda shard: setattr(shard, 'process', _Process()))
+        supervisor.start()
+        supervisor.stop()
+        # Rate limits are split between both shards and the supervisor, reports of all shard symbols are queued.
+        mock_binanceAPI.shareRateLimits.assert_called_once_with(3)
+        self.assertEqual(sorted(c[0][0] for c in mock_binanceAPI.registerERsymbol.call_args_list), [ "BNBUSDT", "BTCUSDT", "ETHUSDT" ])
+        self.assertEqual(supervisor._start.call_count, 2)
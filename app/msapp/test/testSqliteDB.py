@@ -0,0 +1,147 @@
+import logging
+import unittest
+from nose.plugins.attrib import attr
+
+from msapp.datamapper.sqliteDB import SqliteDB
+
+@attr('sqlitedb')
+class TestSqliteDB(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def setUp(self):
+        self._db = SqliteDB(':memory:')
+
+    def tearDown(self):
+        self._db.close()
+
+    @attr('sqlitedb_keys')
+    def test_keys(self):
+        self._db.set('k1', "v1")
+        self.assertEqual(self._db.get('k1'), b"v1")
+        self.assertIsNone(self._db.get('k2'))
+        self._db.set('k3', "v3", expire=-1)
+        self.assertIsNone(self._db.get('k3'), "Expired key should not be returned.")
+
+    @attr('sqlitedb_hash')
+    def test_hash(self):
+        self._db.hashSet('order', "1", '{"orderId": 1}')
+        self._db.hashSet('order', 2, '{"orderId": 2}')
+        self._db.hashSet('order', "1", '{"orderId": 1, "status": "NEW"}')
+        self.assertEqual(self._db.hashGet('order', 1), b'{"orderId": 1, "status": "NEW"}')
+        self.assertIsNone(self._db.hashGet('order', 3))
+        self.assertEqual(self._db.hashGetMany('order', [ 2, 3, "1" ]), [ b'{"orderId": 2}', None, b'{"orderId": 1, "status": "NEW"}' ])
+        self.assertTrue(self._db.hashExists('order', "2"))
+        self.assertFalse(self._db.hashExists('trade', "2"))
+        self.assertEqual(sorted(self._db.hashKeys('order')), [ b"1", b"2" ])
+        self.assertEqual(len(self._db.hashValues('order')), 2)
+        self.assertEqual(sorted(self._db.hashGetAll('order')), [ (b"1", b'{"orderId": 1, "status": "NEW"}'), (b"2", b'{"orderId": 2}') ])
+        self.assertEqual(self._db.hashDelete('order', [ 1, "3" ]), 1)
+        self.assertEqual(self._db.hashKeys('order'), [ b"2" ])
+
+    @attr('sqlitedb_hashscan')
+    def test_hashscan(self):
+        for i in range(25):
+            self._db.hashSet('trade', f"{i:03d}", f"t{i}")
+        self._db.hashSet('order', "001", "o1")
+        scanned = list(self._db.hashScan('trade', count=10))
+        self.assertEqual(len(scanned), 25)
+        self.assertEqual(scanned[0], (b"000", b"t0"))
+        self.assertEqual(sorted(scanned), sorted(self._db.hashGetAll('trade')))
+        self.assertEqual([ k for k, _ in self._db.hashScan('trade', match="01*", count=3) ], [ b"010", b"011", b"012", b"013", b"014", b"015", b"016", b"017", b"018", b"019" ])
+
+    @attr('sqlitedb_sortedset')
+    def test_sortedset(self):
+        self._db.sortedSetAdd('z', { "5": 5, "3": 3, "9": 9 })
+        self._db.sortedSetAdd('z', { "7": 7 })
+        self.assertEqual(self._db.sortedSetCount('z'), 4)
+        self.assertEqual(self._db.sortedSetRange('z'), [ "3", "5", "7", "9" ])
+        self.assertEqual(self._db.sortedSetRange('z', 1, 2), [ "5", "7" ])
+        self.assertEqual(self._db.sortedSetRange('z', -2, -1), [ "7", "9" ])
+        self.assertEqual(self._db.sortedSetRangeByScore('z', 4, 8), [ "5", "7" ])
+        self.assertEqual(self._db.sortedSetRangeByScore('z', 4), [ "5", "7", "9" ])
+        self.assertEqual(self._db.sortedSetRangeByScore('z', count=1, reverse=True), [ "9" ])
+        self.assertEqual(self._db.sortedSetRangeByScore('z', offset=1, count=2), [ "5", "7" ])
+        self.assertEqual(self._db.sortedSetRemove('z', [ "5", "6" ]), 1)
+        self.assertEqual(self._db.sortedSetRemove('z', [ "5" ]), 0)
+        self.assertEqual(self._db.sortedSetRange('z'), [ "3", "7", "9" ])
+
+    @attr('sqlitedb_batch')
+    def test_batch(self):
+        batch = self._db.batch()
+        batch.set('k1', "v1")
+        batch.hashSet('order', "1", "o1")
+        batch.sortedSetAdd('z', { "1": 1 })
+        self.assertEqual(len(batch), 3)
+        self.assertIsNone(self._db.hashGet('order', "1"), "Batch must not write before execute.")
+        self.assertEqual(batch.execute(), [ True, True, True ])
+        self.assertEqual(self._db.get('k1'), b"v1")
+        self.assertEqual(self._db.hashGet('order', "1"), b"o1")
+        self.assertEqual(self._db.sortedSetRange('z'), [ "1" ])
+        # Removals report the number of removed entries.
+        batch = self._db.batch()
+        batch.sortedSetRemove('z', [ "1", "2" ])
+        batch.sortedSetAdd('z', { "2": 2 })
+        batch.hashDelete('order', [ "2" ])
+        self.assertEqual(batch.execute(), [ 1, True, 0 ])
+        # A failing batch is rolled back completely.
+        batch = self._db.batch()
+        batch.hashSet('order', "2", "o2")
+        batch._ops.append(("INSERT INTO unknown_table VALUES (?)", (1,)))
+        with self.assertRaises(Exception):
+            batch.execute()
+        self.assertIsNone(self._db.hashGet('order', "2"))
+
+    @attr('sqlitedb_datastores')
+    def test_datastores(self):
+        # Datamappers on the embedded backend, no external services needed.
+        import msapp.datamapper
+        from msapp.domain import Order
+        from msapp.datamapper.codec import MsgpackCodec
+        msapp.datamapper.initDatastores(self._db, MsgpackCodec())
+        o = Order(1, symbol="BTCUSDT", status=Order.STATUS_NEW)
+        msapp.datamapper.saveAll([ o ])
+        self.assertDictEqual(msapp.datamapper.orderstore.load("BTCUSDT", 1).toDict(), o.toDict())
+        self.assertEqual([ x.id() for x in msapp.datamapper.orderstore.loadMany("BTCUSDT", [ 1, 2 ]) if x is not None ], [ 1 ])
+        msapp.datamapper.saveAll([ Order(i, symbol="BTCUSDT", status=Order.STATUS_FILLED) for i in range(2, 12) ])
+        self.assertEqual(sorted(x.id() for x in msapp.datamapper.orderstore.iterAll(count=3)), list(range(1, 12)))
+        # Streamed positions come with their orders hydrated, page by page.
+        from msapp.domain.repository import Position
+        positions = [ Position(f"_p{i}", symbol="BTCUSDT") for i in range(5) ]
+        for i, p in enumerate(positions):
+            p.assignOrder(Order(i + 1))
+        msapp.datamapper.saveAll(positions)
+        streamed = sorted(msapp.datamapper.positionstore.iterAll(count=2), key=lambda p: p.id())
+        self.assertTrue(all(p._ordersLoaded for p in streamed))
+        self.assertEqual([ o.status() for p in streamed for o in p.orders(load=False) ], [ Order.STATUS_NEW ] + [ Order.STATUS_FILLED ] * 4)
+        self.assertEqual([ p.toDictWithFullOrders() for p in streamed ], [ p.toDictWithFullOrders() for p in positions ])
+
+    @attr('sqlitedb_symbolrecords')
+    def test_symbolrecords(self):
+        import msapp.datamapper
+        from msapp.domain import Order
+        from msapp.domain import Trade
+        from msapp.datamapper.codec import JsonCodec
+        codec = JsonCodec()
+        # Records of the former layout, all symbols in one hash.
+        self._db.hashSet('order', "7", codec.encode(Order(7, symbol="BTCUSDT", status=Order.STATUS_FILLED).toDict()))
+        self._db.hashSet('order', "_local", codec.encode(Order("_local").toDict()))
+        self._db.hashSet('trade', "5", codec.encode(Trade(5, orderId=7, symbol="BTCUSDT", timestamp=1000).toDict()))
+        self._db.set('trade:indexversion', "1")
+        msapp.datamapper.initDatastores(self._db, codec)
+        # Moved to their symbol on first use, and indexed.
+        self.assertEqual(msapp.datamapper.orderstore.load("BTCUSDT", 7).status(), Order.STATUS_FILLED)
+        self.assertEqual(msapp.datamapper.orderstore.load(None, "_local").id(), "_local")
+        self.assertIsNone(self._db.hashGet('order', "7"))
+        self.assertEqual(msapp.datamapper.tradestore.maxTradeId("BTCUSDT"), 5)
+        self.assertTrue(msapp.datamapper.tradestore.exists("BTCUSDT", 5))
+        # Exchange ids are unique per symbol only, the same id of another symbol is another record.
+        msapp.datamapper.saveAll([ Order(7, symbol="ETHBTC", status=Order.STATUS_NEW), Trade(5, orderId=7, symbol="ETHBTC", timestamp=2000) ])
+        self.assertEqual(msapp.datamapper.orderstore.load("BTCUSDT", 7).status(), Order.STATUS_FILLED)
+        self.assertEqual(msapp.datamapper.orderstore.load("ETHBTC", 7).status(), Order.STATUS_NEW)
+        self.assertEqual([ t.timestamp() for t in msapp.datamapper.tradestore.loadMany("BTCUSDT", [ 5 ]) ], [ 1000 ])
+        self.assertEqual([ t.timestamp() for t in msapp.datamapper.tradestore.loadMany("ETHBTC", [ 5 ]) ], [ 2000 ])
+        self.assertEqual(msapp.datamapper.orderstore.symbols(), [ "BTCUSDT", "ETHBTC" ])
+        self.assertEqual(len(list(msapp.datamapper.orderstore.iterAll())), 3)
+        self.assertEqual(len(msapp.datamapper.tradestore.loadAllTrades()), 2)
@@ -0,0 +1,41 @@
+import logging
+import unittest
+from nose.plugins.attrib import attr
+from decimal import Decimal
+
+from msapp.gateway.symbolFilters import SymbolFilters
+
+@attr('symbolfilters')
+class TestSymbolFilters(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def _symbolInfo(self):
+        return {
+            'symbol': "BTCUSDT",
+            'filters': [
+                { 'filterType': "PRICE_FILTER", 'minPrice': "0.01000000", 'maxPrice': "1000000.00000000", 'tickSize': "0.01000000" },
+                { 'filterType': "PERCENT_PRICE", 'multiplierUp': "5", 'multiplierDown': "0.2", 'avgPriceMins': 5 },
+                { 'filterType': "LOT_SIZE", 'minQty': "0.00000100", 'maxQty': "9000.00000000", 'stepSize': "0.00000100" },
+                { 'filterType': "MIN_NOTIONAL", 'minNotional': "10.00000000", 'applyToMarket': True, 'avgPriceMins': 5 },
+                { 'filterType': "MAX_NUM_ORDERS", 'maxNumOrders': 200 }
+            ]
+        }
+
+    @attr('symbolfilters_quantize')
+    def test_quantize(self):
+        filters = SymbolFilters(self._symbolInfo())
+        self.assertEqual(str(filters.quantizePrice(Decimal("6708.4987"))), "6708.49")
+        self.assertEqual(str(filters.quantizeQuantity(Decimal("0.0044721234"))), "0.004472")
+        self.assertEqual(str(filters.quantizePrice(Decimal("10000"))), "10000.00")
+
+    @attr('symbolfilters_validate')
+    def test_validate(self):
+        filters = SymbolFilters(self._symbolInfo())
+        self.assertIsNone(filters.validate(Decimal("3000.00"), Decimal("0.003334")))
+        self.assertRegex(filters.validate(Decimal("3000.00"), Decimal("0.003333")), "^MIN_NOTIONAL")
+        self.assertRegex(filters.validate(Decimal("3000.001"), Decimal("0.003334")), "^PRICE_FILTER")
+        self.assertRegex(filters.validate(Decimal("3000.00"), Decimal("0.0033341")), "^LOT_SIZE")
+        self.assertRegex(filters.validate(Decimal("3000.00"), Decimal("0.003334"), currentPrice=Decimal("20000")), "^PERCENT_PRICE")
+        self.assertRegex(filters.validate(Decimal("3000.00"), Decimal("0.003334"), openOrders=200), "^MAX_NUM_ORDERS")
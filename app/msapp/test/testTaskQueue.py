@@ -0,0 +1,61 @@
+import logging
+import datetime
+import time
+import unittest
+from nose.plugins.attrib import attr
+
+from msapp.domain.mscore import TaskQueue
+
+@attr('taskqueue')
+class TestTaskQueue(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    @attr('taskqueue_fifo')
+    def test_fifo(self):
+        queue = TaskQueue()
+        for i in range(3):
+            queue.add({ 'id': f"t{i}", 'data': {} })
+        self.assertTrue(queue.inList("t1"))
+        self.assertFalse(queue.inList("t3"))
+        self.assertEqual(queue.startNext()['id'], "t0")
+        self.assertEqual(queue.list(), [
+            { 'Job': "t0", 'Status': TaskQueue.TASK_STATUS_IN_PROGRESS },
+            { 'Job': "t1", 'Status': TaskQueue.TASK_STATUS_QUEUED },
+            { 'Job': "t2", 'Status': TaskQueue.TASK_STATUS_QUEUED }
+        ])
+        queue.finalize("t0")
+        self.assertFalse(queue.inList("t0"))
+        with self.assertRaises(Exception):
+            queue.finalize("t0")
+        self.assertEqual([ queue.startNext()['id'], queue.startNext()['id'] ], [ "t1", "t2" ])
+        self.assertIsNone(queue.startNext())
+        self.assertEqual(len(queue), 2)
+        # Started tasks go back to the front of the queue.
+        self.assertEqual(queue.recover(), 2)
+        self.assertEqual(queue.startNext()['id'], "t1")
+
+    @attr('taskqueue_deferred')
+    def test_deferred(self):
+        queue = TaskQueue()
+        notBefore = (datetime.datetime.utcnow() + datetime.timedelta(hours=1)).isoformat()
+        queue.add({ 'id': "later", 'JQ_not_before': notBefore, 'data': {} })
+        queue.add({ 'id': "soon", 'JQ_not_before': time.time() + 0.05, 'data': {} })
+        queue.add({ 'id': "now", 'data': {} })
+        self.assertEqual(queue.startNext()['id'], "now")
+        self.assertIsNone(queue.startNext(), "Deferred tasks must not start early.")
+        time.sleep(0.06)
+        task = queue.startNext()
+        self.assertEqual(task['id'], "soon")
+        self.assertNotIn('JQ_not_before', task)
+        # Rescheduled tasks go back into the deferred heap, ahead of ready tasks once due.
+        queue.finalize("soon", 0.05)
+        queue.add({ 'id': "next", 'data': {} })
+        self.assertTrue(queue.inList("soon"))
+        time.sleep(0.06)
+        self.assertEqual([ queue.startNext()['id'], queue.startNext()['id'] ], [ "soon", "next" ])
+        self.assertTrue(queue.inList("later"))
+        self.assertEqual(queue.flushQueued(), 1)
+        self.assertFalse(queue.inList("later"))
+        self.assertIsNone(queue.startNext())
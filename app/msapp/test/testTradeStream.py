@@ -0,0 +1,77 @@
+import logging
+import unittest
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+import simplejson as json
+
+from msapp.gateway import tradeStream
+from msapp.gateway.binanceApi import BinanceAPI
+from msapp.gateway.tradeStream import CombinedTradeStream
+from msapp.test.utils import offlineBinanceAPI
+
+def _trade(symbol, price, timestamp=1585157254418):
+    return { 'e': "trade", 'E': timestamp + 2, 's': symbol, 't': 279570946, 'p': price, 'q': "0.00254600", 'T': timestamp, 'm': True, 'M': True }
+
+@attr('tradestream')
+class TestTradeStream(unittest.TestCase):
+    '''
+      Symbol (un)subscription on the combined trade stream and routing of its events, without
+      exchange connection.
+    '''
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    def _sent(self, protocol):
+        return [ json.loads(c[0][0].decode('utf-8')) for c in protocol.sendMessage.call_args_list ]
+
+    @attr('tradestream_subscribe')
+    @mock.patch.object(tradeStream.reactor, 'callFromThread', side_effect=lambda fn, *args: fn(*args))
+    @mock.patch.object(tradeStream, 'connectWS')
+    def test_subscribe(self, mock_connectWS, mock_callFromThread):
+        bm = mock.MagicMock(STREAM_URL="wss://stream.binance.com:9443/", _conns={})
+        stream = CombinedTradeStream(bm, mock.Mock())
+        self.assertTrue(stream.add("BTCUSDT"))
+        self.assertEqual(stream.connKey(), "streams=btcusdt@trade")
+        mock_connectWS.assert_called_once()
+        # Not connected yet, symbols are synced on connect.
+        self.assertTrue(stream.add("ETHUSDT"))
+        self.assertFalse(stream.add("ETHUSDT"), "Symbol must be subscribed once.")
+        protocol = mock.Mock()
+        stream._opened(protocol)
+        sent = self._sent(protocol)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0]['method'], "SUBSCRIBE")
+        self.assertEqual(sorted(sent[0]['params']), [ "btcusdt@trade", "ethusdt@trade" ])
+        # Live connection, other symbols are not reconnected.
+        self.assertTrue(stream.add("BNBUSDT"))
+        self.assertTrue(stream.remove("ETHUSDT"))
+        self.assertFalse(stream.remove("ETHUSDT"))
+        sent = self._sent(protocol)
+        self.assertEqual([ (s['method'], s['params']) for s in sent[1:] ], [ ("SUBSCRIBE", [ "bnbusdt@trade" ]), ("UNSUBSCRIBE", [ "ethusdt@trade" ]) ])
+        self.assertEqual(len({ s['id'] for s in sent }), 3, "Request ids must be unique.")
+        mock_connectWS.assert_called_once()
+        self.assertEqual(stream.symbols(), { "BTCUSDT", "BNBUSDT" })
+
+    @attr('tradestream_routing')
+    def test_routing(self):
+        with offlineBinanceAPI() as api:
+            api.addSymbol("BTCUSDT")
+            api.addSymbol("ETHUSDT")
+            btc = mock.Mock()
+            eth = mock.Mock()
+            api.subscribeTrades("BTCUSDT", btc)
+            api.subscribeTrades("ETHUSDT", eth)
+            BinanceAPI._processStreamEvent({ 'stream': "btcusdt@trade", 'data': _trade("BTCUSDT", "6668.07000000") })
+            BinanceAPI._processStreamEvent({ 'stream': "ethusdt@trade", 'data': _trade("ETHUSDT", "140.12000000") })
+            # (Un)subscribe responses are not dispatched.
+            BinanceAPI._processStreamEvent({ 'result': None, 'id': 1 })
+            btc.assert_called_once_with("BTCUSDT", Decimal("6668.07000000"), 1585157254418)
+            eth.assert_called_once_with("ETHUSDT", Decimal("140.12000000"), 1585157254418)
+            self.assertEqual(api.getCurrentPrice("BTCUSDT"), Decimal("6668.07000000"))
+            # Events of removed symbols in flight are dropped.
+            api.removeSymbol("ETHUSDT")
+            BinanceAPI._processStreamEvent({ 'stream': "ethusdt@trade", 'data': _trade("ETHUSDT", "141.00000000") })
+            eth.assert_called_once()
+            self.assertEqual(api.getCurrentPrice("ETHUSDT"), Decimal("140.12000000"))
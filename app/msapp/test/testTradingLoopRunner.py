@@ -0,0 +1,81 @@
+import logging
+import threading
+import unittest
+from decimal import Decimal
+from unittest import mock
+from nose.plugins.attrib import attr
+
+import msapp.gateway
+from msapp.domain.service.tradingLoopRunner import TradingLoopRunner
+
+class _Gateway:
+    # Subscription hooks of BinanceAPI, stream events are fired by the test.
+    def __init__(self):
+        self.execReportSubscribers = []
+        self.tradeSubscribers = {}
+
+    def subscribeExecutionReports(self, callback):
+        self.execReportSubscribers.append(callback)
+
+    def unsubscribeExecutionReports(self, callback):
+        self.execReportSubscribers.remove(callback)
+
+    def subscribeTrades(self, symbol, callback):
+        self.tradeSubscribers.setdefault(symbol, []).append(callback)
+
+    def unsubscribeTrades(self, symbol, callback):
+        self.tradeSubscribers[symbol].remove(callback)
+
+class _Strategy:
+    def __init__(self, symbol, result=True):
+        self._symbol = symbol
+        self._result = result
+        self.steps = []
+        self.stepped = threading.Event()
+
+    def symbol(self):
+        return self._symbol
+
+    def backlog(self):
+        return False
+
+    def step(self, events=True):
+        self.steps.append(events)
+        self.stepped.set()
+        return self._result
+
+@attr('tradingloop')
+class TestTradingLoopRunner(unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        self._l = logging.getLogger(__name__)
+
+    @attr('tradingloop_wakeup')
+    @mock.patch.object(TradingLoopRunner, 'IDLE_TIMEOUT', 30)
+    @mock.patch.object(msapp.gateway, 'binanceAPI', _Gateway())
+    def test_wakeup(self):
+        strategy = _Strategy("BTCUSDT")
+        failing = _Strategy("ETHUSDT", result=False)
+        failed = []
+        runner = TradingLoopRunner([ failing, strategy ], onFailure=failed.append)
+        runner.start()
+        try:
+            # Initial step processes events queued during bootstrap, the failing strategy is stopped.
+            self.assertTrue(strategy.stepped.wait(5))
+            self.assertEqual(strategy.steps, [ True ])
+            self.assertEqual(failed, [ failing ])
+            # Trade ticks step without reading the execution report queue, execution reports with.
+            strategy.stepped.clear()
+            for callback in msapp.gateway.binanceAPI.tradeSubscribers["BTCUSDT"]:
+                callback("BTCUSDT", Decimal("6668.07"), 1585157254418)
+            self.assertTrue(strategy.stepped.wait(5), "Trade tick must wake up the loop.")
+            strategy.stepped.clear()
+            for callback in msapp.gateway.binanceAPI.execReportSubscribers:
+                callback(None, None)
+            self.assertTrue(strategy.stepped.wait(5), "Execution report must wake up the loop.")
+            self.assertEqual(strategy.steps, [ True, False, True ])
+            self.assertEqual(runner.status()['Strategies'], 1)
+        finally:
+            runner.stop(timeout=5)
+        self.assertFalse(runner.status()['Running'])
+        self.assertEqual(msapp.gateway.binanceAPI.execReportSubscribers, [])
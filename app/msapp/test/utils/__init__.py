@@ -1 +1,2 @@
 from .mockTools import mock_module_patch
+from .binanceTools import offlineBinanceAPI
@@ -0,0 +1,18 @@
+import contextlib
+from unittest import mock
+from binance.websockets import BinanceSocketManager
+
+from msapp.gateway import binanceApi
+from msapp.gateway import tradeStream
+
+@contextlib.contextmanager
+def offlineBinanceAPI():
+    # BinanceAPI with mocked exchange client and socket managers, set REST responses on api._client.
+    with mock.patch.object(binanceApi, 'Client'), mock.patch.object(binanceApi, 'BinanceSocketManager') as socketManager, mock.patch.object(tradeStream, 'connectWS'):
+        socketManager.return_value.STREAM_URL = BinanceSocketManager.STREAM_URL
+        api = binanceApi.BinanceAPI()
+        try:
+            yield api
+        finally:
+            api._restPool.shutdown(wait=False)
+            api._priceBoard.close()